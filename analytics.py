@@ -0,0 +1,174 @@
+import os
+import tkinter as tk
+import numpy as np
+from task_model import TaskRecord, parse_clock
+from utils import *
+
+DAYS_SHOWN = 14
+PERCENTILES = (50, 75, 90)
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+# === History ===
+def archived_records(data_manager):
+    """{id: TaskRecord} for the history archived to monthly files."""
+    return {rec["id"]: TaskRecord.from_json(rec) for rec in data_manager.iter_archived_history()}
+
+def history_records(data_manager, archived=None):
+    """Every history record, archived months included, as TaskRecords.
+
+    archived is a result of archived_records() to reuse. A record found
+    both in the archive and live (an interrupted archive run) counts once.
+    """
+    records = dict(archived_records(data_manager) if archived is None else archived)
+    if data_manager.backend is not None:
+        # The database also keeps the history older than the loaded window
+        records.update((rec["id"], TaskRecord.from_json(rec)) for rec in data_manager.backend.iter_history())
+    else:
+        with data_manager.lock:
+            records.update((rec.id, rec) for rec in data_manager.data["task_history"])
+    return list(records.values())
+
+
+# === Aggregation ===
+# Records are turned into columns once; every statistic below is then a
+# handful of array operations, whatever the length of the history.
+def _seconds(stamps):
+    """A datetime64[s] column from TaskRecord timestamps, None becoming NaT."""
+    values = np.array([np.nan if stamp is None else stamp for stamp in stamps], dtype=float)
+    column = np.floor(np.nan_to_num(values)).astype("int64").astype("datetime64[s]")
+    column[np.isnan(values)] = np.datetime64("NaT")
+    return column
+
+def _hour(scheduled_time):
+    """The hour of an "HH:MM" scheduled time, or -1 for none or anything else."""
+    clock = parse_clock(scheduled_time)
+    return -1 if clock is None else clock[0]
+
+def history_arrays(records):
+    """Convert task_history records (TaskRecord) into NumPy columns."""
+    created = _seconds([rec.created for rec in records])
+    completed = _seconds([rec.completed for rec in records])
+    modules, module_codes = np.unique(np.array([rec.module for rec in records], dtype=str),
+                                      return_inverse=True)
+    # Only a few distinct times occur, so each is parsed once
+    times = [rec.scheduled_time for rec in records]
+    hour_of = {scheduled_time: _hour(scheduled_time) for scheduled_time in set(times)}
+    hours = np.array([hour_of[scheduled_time] for scheduled_time in times], dtype=int)
+    return {
+        "created": created,
+        "completed": completed,
+        "modules": modules,
+        "module_codes": module_codes.reshape(-1),
+        "scheduled_hour": hours,
+    }
+
+def completions_per_day(arrays, today, days=DAYS_SHOWN):
+    """Return (dates, module names, counts[module, day]) for the last days."""
+    first = np.datetime64(today, "D") - (days - 1)
+    dates = first + np.arange(days)
+    done = arrays["completed"].astype("datetime64[D]")
+    day = (done - first).astype(int)
+    in_range = ~np.isnat(done) & (day >= 0) & (day < days)
+    module_count = len(arrays["modules"])
+    flat = np.bincount(arrays["module_codes"][in_range] * days + day[in_range],
+                       minlength=module_count * days)
+    return dates, arrays["modules"], flat.reshape(module_count, days)
+
+def completion_percentiles(arrays, percentiles=PERCENTILES):
+    """Hours from creation to completion at the given percentiles."""
+    done = ~np.isnat(arrays["completed"]) & ~np.isnat(arrays["created"])
+    if not done.any():
+        return {q: None for q in percentiles}
+    hours = (arrays["completed"][done] - arrays["created"][done]).astype(float) / 3600
+    return dict(zip(percentiles, np.percentile(hours, percentiles)))
+
+def hour_completion_rate(arrays):
+    """Completion rate by weekday (rows) and scheduled hour (columns).
+
+    Cells with no scheduled tasks are NaN.
+    """
+    scheduled = (arrays["scheduled_hour"] >= 0) & ~np.isnat(arrays["created"])
+    created = arrays["created"][scheduled]
+    # 1970-01-01 was a Thursday
+    weekday = (created.astype("datetime64[D]").astype(int) + 3) % 7
+    cell = weekday * 24 + arrays["scheduled_hour"][scheduled]
+    total = np.bincount(cell, minlength=7 * 24)
+    completed = np.bincount(cell, weights=~np.isnat(arrays["completed"][scheduled]), minlength=7 * 24)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = np.where(total > 0, completed / total, np.nan)
+    return rate.reshape(7, 24)
+
+
+# === Dashboard ===
+class AnalyticsDashboard:
+    """Analytics tab content; the figure is only built when first shown.
+
+    Statistics cover the whole history, archived months included. The
+    archive is read again only when its files change.
+    """
+
+    def __init__(self, parent, data_manager):
+        self.parent = parent
+        self.data_manager = data_manager
+        self.figure = None
+        self.canvas = None
+        self.archive_key = None
+        self.archived = {}
+
+        self.summary_label = tk.Label(parent, font=TITLE_FONT, bg=BG_COLOUR, fg=TEXT, justify="left")
+        self.summary_label.pack(anchor="w", padx=25, pady=(15, 5))
+
+    def build_figure(self):
+        # matplotlib is only imported once analytics are actually opened
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.figure = Figure(figsize=(10, 6), facecolor=BG_COLOUR)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.parent)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True, padx=25, pady=10)
+
+    def archived_history(self):
+        archive_dir = self.data_manager.archive_dir
+        key = [(month, os.path.getsize(os.path.join(archive_dir, f"{month}.jsonl")))
+               for month in self.data_manager.archived_months()]
+        if key != self.archive_key:
+            self.archived, self.archive_key = archived_records(self.data_manager), key
+        return self.archived
+
+    def refresh(self):
+        if self.figure is None:
+            self.build_figure()
+        arrays = history_arrays(history_records(self.data_manager, self.archived_history()))
+        today = np.datetime64("today")
+
+        percentiles = completion_percentiles(arrays)
+        summary = ", ".join(f"p{q}: {value:.1f} h" if value is not None else f"p{q}: –"
+                            for q, value in percentiles.items())
+        self.summary_label.config(text=f"⏱ Time to complete  {summary}")
+
+        self.figure.clear()
+        per_day, heatmap = self.figure.subplots(1, 2, gridspec_kw={"width_ratios": [3, 2]})
+
+        dates, modules, counts = completions_per_day(arrays, today)
+        bottom = np.zeros(len(dates))
+        labels = [str(date)[5:] for date in dates]
+        for module, row in zip(modules, counts):
+            if row.any():
+                per_day.bar(labels, row, bottom=bottom, label=module)
+                bottom += row
+        per_day.set_title("Completions per day")
+        per_day.tick_params(axis="x", rotation=60, labelsize=8)
+        if bottom.any():
+            per_day.legend(fontsize=8)
+
+        rate = hour_completion_rate(arrays)
+        image = heatmap.imshow(rate, aspect="auto", cmap="RdYlGn", vmin=0, vmax=1)
+        heatmap.set_title("Completion rate by scheduled hour")
+        heatmap.set_yticks(range(7), WEEKDAYS)
+        heatmap.set_xticks(range(0, 24, 3))
+        heatmap.set_xlabel("Hour")
+        self.figure.colorbar(image, ax=heatmap)
+
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
@@ -0,0 +1,306 @@
+"""Optional local HTTP/JSON API, so other tools can add and query tasks.
+
+Enable it with PLANNER_API_PORT=8765 python main.py. It listens on the
+loopback interface only; set PLANNER_API_TOKEN to also require an
+"Authorization: Bearer <token>" header.
+
+The server runs an asyncio loop on a background thread, but never touches
+the data itself: requests are queued and run on the Tk thread by drain(),
+which the UI calls every API_DRAIN_INTERVAL ms. Everything queued between
+two drains is persisted with one write (DataManager.batch()), and clients
+get their reply once it has been.
+
+    GET  /modules                      names with task counts
+    GET  /tasks?module=&status=&limit= tasks as {id, module, text, status}
+    GET  /timetable
+    GET  /history?module=&since=&until=&completed=&limit=
+    POST /tasks     {"module": ..., "tasks": ["text", ...], "scheduled_time": "09:00"}
+                    (scheduled_time must be HH:MM, 00:00 to 23:59, or left out)
+    PUT  /timetable {"slots": {"09:00": "Lecture"}}
+    POST /batch     {"ops": [{"op": "add_tasks", ...}, ...]}
+
+Batch ops are add_module, delete_module, add_tasks, delete_tasks,
+set_statuses, move_tasks, rename_task and update_timetable, with the same
+arguments as the PlannerModel methods (task ids as "ids"). Each op is its
+own undoable change; if one fails the reply says how many were applied.
+The Home module cannot be deleted.
+"""
+import asyncio
+import json
+import queue
+import threading
+from urllib.parse import parse_qs, unquote, urlsplit
+from model import STATUSES
+from task_model import clock_text
+
+API_HOST = "127.0.0.1"
+API_DRAIN_INTERVAL = 20  # ms between runs of queued requests on the Tk thread
+MAX_BODY = 64 * 1024 * 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 415: "Unsupported Media Type",
+           500: "Internal Server Error"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _resolve(future, result):
+    # The client may have gone away and the request been cancelled
+    if not future.done():
+        future.set_result(result)
+
+
+class ApiServer:
+    def __init__(self, model, port=0, host=API_HOST, token=None):
+        self.model = model
+        self.host = host
+        self.port = port
+        self.token = token
+        # (handler, arguments, changes data, future) waiting for the Tk thread
+        self.requests = queue.SimpleQueue()
+        self.loop = None
+        self._stop = None
+        self._ready = threading.Event()
+        self._thread = None
+        self.routes = {
+            ("GET", "/modules"): (self.get_modules, False),
+            ("GET", "/tasks"): (self.get_tasks, False),
+            ("GET", "/timetable"): (self.get_timetable, False),
+            ("GET", "/history"): (self.get_history, False),
+            ("POST", "/tasks"): (self.post_tasks, True),
+            ("PUT", "/timetable"): (self.put_timetable, True),
+            ("POST", "/batch"): (self.post_batch, True),
+        }
+
+    # === Server thread ===
+    def start(self):
+        """Start listening; returns once the port is bound (self.port is then set)."""
+        self._thread = threading.Thread(target=asyncio.run, args=(self._serve(),), daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join()
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await self._stop.wait()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._dispatch(request_line.decode("latin-1"), headers, body)
+                close = headers.get("connection", "").lower() == "close"
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, close=False):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write((f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                      f"Content-Type: application/json; charset=utf-8\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, request_line, headers, body):
+        try:
+            method, target, _ = request_line.split(" ", 2)
+        except ValueError:
+            return 400, {"error": "Malformed request line"}
+        url = urlsplit(target)
+        route = self.routes.get((method, unquote(url.path).rstrip("/") or "/"))
+        if route is None:
+            return 404, {"error": f"No route for {method} {url.path}"}
+        if self.token is not None and headers.get("authorization") != f"Bearer {self.token}":
+            return 401, {"error": "Missing or wrong token"}
+        handler, changes = route
+        if changes:
+            # A browser page cannot send JSON cross-origin without a preflight we never answer
+            if not headers.get("content-type", "").startswith("application/json"):
+                return 415, {"error": "Send the body as application/json"}
+            try:
+                arguments = json.loads(body)
+            except ValueError as exception:
+                return 400, {"error": f"Invalid JSON: {exception}"}
+            if not isinstance(arguments, dict):
+                return 400, {"error": "The body must be a JSON object"}
+        else:
+            arguments = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        future = self.loop.create_future()
+        self.requests.put((handler, arguments, changes, future))
+        return await future
+
+    # === Tk thread ===
+    def drain(self):
+        """Run every queued request, persisting them together; returns True if any changed data."""
+        if self.requests.empty():
+            return False
+        replies = []
+        try:
+            self._run_queued(replies)
+        except Exception as exception:
+            # The batch could not be written
+            replies = [(future, (500, {"error": f"Could not save: {exception}"}), changes)
+                       for future, _, changes in replies]
+        # Reply only once the batch has been written
+        for future, reply, _ in replies:
+            self.loop.call_soon_threadsafe(_resolve, future, reply)
+        return any(changes for _, _, changes in replies)
+
+    def _run_queued(self, replies):
+        with self.model.data_manager.batch():
+            while True:
+                try:
+                    handler, arguments, changes, future = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    reply = (200, handler(arguments))
+                except ApiError as exception:
+                    reply = (exception.status, {"error": str(exception)})
+                except (ValueError, KeyError, TypeError) as exception:
+                    reply = (400, {"error": f"{type(exception).__name__}: {exception}"})
+                except Exception as exception:
+                    reply = (500, {"error": str(exception)})
+                replies.append((future, reply, changes))
+
+    # === Handlers, run on the Tk thread ===
+    def _module(self, name):
+        if name not in self.model.data["modules"]:
+            raise ApiError(404, f"No module '{name}'")
+        return name
+
+    def _slots(self, slots):
+        if not isinstance(slots, dict) or not all(isinstance(text, str) for text in slots.values()):
+            raise ApiError(400, "Slots must map each slot to its text")
+        return slots
+
+    def get_modules(self, arguments):
+        stats = self.model.data_manager.stats
+        return {"modules": [{"name": name, "tasks": len(tasks), "open": stats.open_tasks(name)}
+                            for name, tasks in self.model.data["modules"].items()]}
+
+    def get_tasks(self, arguments):
+        modules = self.model.data["modules"]
+        names = [self._module(arguments["module"])] if "module" in arguments else list(modules)
+        status = arguments.get("status")
+        limit = int(arguments.get("limit", 0)) or None
+        tasks = []
+        for name in names:
+            for text, task_status, task_id in modules[name]:
+                if status is None or task_status == status:
+                    tasks.append({"id": task_id, "module": name, "text": text, "status": task_status})
+                    if len(tasks) == limit:
+                        return {"tasks": tasks}
+        return {"tasks": tasks}
+
+    def get_timetable(self, arguments):
+        return {"timetable": self.model.timetable()}
+
+    def get_history(self, arguments):
+        completed = arguments.get("completed")
+        if completed is not None:
+            completed = completed.lower() in ("1", "true", "yes")
+        records = self.model.history(arguments.get("module"), arguments.get("since"),
+                                     arguments.get("until"), completed)
+        limit = int(arguments.get("limit", 0))
+        return {"history": records[-limit:] if limit else records}
+
+    def post_tasks(self, arguments):
+        return {"ids": self.add_tasks(arguments)}
+
+    def put_timetable(self, arguments):
+        return {"changed": sorted(self.model.update_timetable(self._slots(arguments["slots"])))}
+
+    def post_batch(self, arguments):
+        results = []
+        for applied, op in enumerate(arguments.get("ops", [])):
+            method = self.batch_ops.get(op.get("op")) if isinstance(op, dict) else None
+            if method is None:
+                raise ApiError(400, f"Op {applied}: unknown op {op.get('op') if isinstance(op, dict) else op!r}"
+                                    f" ({applied} applied)")
+            try:
+                results.append(method(self, op))
+            except ApiError as exception:
+                raise ApiError(exception.status, f"Op {applied}: {exception} ({applied} applied)")
+            except (ValueError, KeyError, TypeError) as exception:
+                raise ApiError(400, f"Op {applied}: {type(exception).__name__}: {exception} ({applied} applied)")
+        return {"results": results}
+
+    # === Batch ops ===
+    def add_module(self, op):
+        return {"name": self.model.add_module(op["name"])}
+
+    def delete_module(self, op):
+        self.model.delete_module(self._module(op["name"]))
+
+    def add_tasks(self, op):
+        module = op["module"]
+        scheduled_time = op.get("scheduled_time")
+        if scheduled_time is not None:
+            # Checked before a module is created for the tasks
+            try:
+                scheduled_time = clock_text(scheduled_time)
+            except ValueError as exception:
+                raise ApiError(400, str(exception))
+        if module not in self.model.data["modules"]:
+            if not op.get("create_module"):
+                raise ApiError(404, f"No module '{module}'")
+            self.model.add_module(module)
+        return self.model.add_tasks(module, op["tasks"], scheduled_time)
+
+    def delete_tasks(self, op):
+        self.model.delete_tasks(self._module(op["module"]), op["ids"])
+
+    def set_statuses(self, op):
+        if op["status"] not in STATUSES:
+            raise ApiError(400, f"Status must be one of {' '.join(STATUSES)}")
+        self.model.set_statuses(self._module(op["module"]), op["ids"], op["status"])
+
+    def move_tasks(self, op):
+        self.model.move_tasks(self._module(op["module"]), op["target"], op["ids"])
+
+    def rename_task(self, op):
+        found = self.model.find_task(op["id"])
+        if found is None:
+            raise ApiError(404, f"No task '{op['id']}'")
+        self.model.rename_task(found[0], found[1], op["text"])
+
+    def update_timetable(self, op):
+        return sorted(self.model.update_timetable(self._slots(op["slots"])))
+
+    batch_ops = {"add_module": add_module, "delete_module": delete_module, "add_tasks": add_tasks,
+                 "delete_tasks": delete_tasks, "set_statuses": set_statuses, "move_tasks": move_tasks,
+                 "rename_task": rename_task, "update_timetable": update_timetable}
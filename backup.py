@@ -0,0 +1,259 @@
+"""Crash-safe writes and rotating backups of the planner document.
+
+Backups live in <data>_backups/ as gzip-compressed JSON: a full snapshot,
+then diffs against that snapshot, so restoring any point reads at most two
+files. A new full snapshot is taken once the diff grows past a fraction of
+the full one, and only the newest BACKUP_KEEP snapshots (with their diffs)
+are kept.
+
+Usage: python backup.py list [--file data.json]
+       python backup.py restore [STAMP] [--file data.json] [--backend json|sqlite]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from task_model import encode
+
+BACKUP_INTERVAL = 600     # seconds between backups taken by the background writer
+BACKUP_KEEP = 3           # full snapshots kept, each with the diffs based on it
+MAX_DIFFS = 50            # diffs per full snapshot
+FULL_RATIO = 0.5          # a diff bigger than this share of its full snapshot starts a new one
+
+
+def atomic_write(path, payload):
+    """Replace path with payload (bytes) so a crash leaves either the old or the new file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+def _fsync_directory(directory):
+    # Makes the rename itself durable; directories cannot be opened on Windows
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def backup_dir(filepath):
+    return os.path.splitext(filepath)[0] + "_backups"
+
+def _digest(value):
+    text = json.dumps(value, sort_keys=True, ensure_ascii=False, default=encode)
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+def _record_hash(rec):
+    try:
+        return hash(tuple(rec.items()))
+    except TypeError:
+        return _digest(rec)
+
+def _fingerprint(data):
+    """What a diff is computed against: a hash per key, module and history record."""
+    sessions = data.get("pomodoro_sessions", [])
+    return {
+        "keys": {key: _digest(value) for key, value in data.items()
+                 if key not in ("modules", "task_history", "pomodoro_sessions")},
+        "modules": {name: _digest(tasks) for name, tasks in data["modules"].items()},
+        "history": {rec["id"]: _record_hash(rec) for rec in data["task_history"]},
+        "sessions": (len(sessions), _digest(sessions)),
+    }
+
+def _read(path):
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return json.load(file)
+
+
+class BackupSet:
+    def __init__(self, directory, keep=BACKUP_KEEP, interval=BACKUP_INTERVAL):
+        self.directory = directory
+        self.keep = keep
+        self.interval = interval
+        self.last_backup = None
+        # The newest full snapshot: file name, compressed size, fingerprint
+        self.base = None
+        self.base_size = 0
+        self.base_fingerprint = None
+        self.diffs = 0
+
+    def due(self):
+        return self.last_backup is None or time.monotonic() - self.last_backup >= self.interval
+
+    # === Writing ===
+    def backup(self, data):
+        """Save data as a diff against the newest full snapshot, or as a new full one."""
+        self.last_backup = time.monotonic()
+        os.makedirs(self.directory, exist_ok=True)
+        if self.base_fingerprint is None:
+            self._load_base()
+        if self.base_fingerprint is not None and self.diffs < MAX_DIFFS:
+            diff = json.dumps(self._diff(data), ensure_ascii=False, default=encode)
+            payload = gzip.compress(diff.encode("utf-8"))
+            if len(payload) <= FULL_RATIO * self.base_size:
+                name = f"diff-{self._stamp()}.json.gz"
+                atomic_write(os.path.join(self.directory, name), payload)
+                self.diffs += 1
+                return name
+        return self._write_full(data)
+
+    def _write_full(self, data):
+        name = f"full-{self._stamp()}.json.gz"
+        payload = gzip.compress(json.dumps(data, ensure_ascii=False, default=encode).encode("utf-8"))
+        atomic_write(os.path.join(self.directory, name), payload)
+        self.base, self.base_size, self.diffs = name, len(payload), 0
+        self.base_fingerprint = _fingerprint(data)
+        self._rotate()
+        return name
+
+    def _diff(self, data):
+        base = self.base_fingerprint
+        history = base["history"]
+        sessions = data.get("pomodoro_sessions", [])
+        kept, base_digest = base["sessions"]
+        diff = {
+            "base": self.base,
+            "keys": {key: value for key, value in data.items()
+                     if key not in ("modules", "task_history", "pomodoro_sessions")
+                     and base["keys"].get(key) != _digest(value)},
+            "removed_keys": [key for key in base["keys"] if key not in data],
+            "module_order": list(data["modules"]),
+            "modules": {name: tasks for name, tasks in data["modules"].items()
+                        if base["modules"].get(name) != _digest(tasks)},
+            "history": [rec for rec in data["task_history"] if history.get(rec["id"]) != _record_hash(rec)],
+        }
+        ids = {rec["id"] for rec in data["task_history"]}
+        diff["removed_history"] = [task_id for task_id in history if task_id not in ids]
+        # Sessions are only ever appended
+        if len(sessions) >= kept and _digest(sessions[:kept]) == base_digest:
+            diff["sessions"] = {"keep": kept, "append": sessions[kept:]}
+        else:
+            diff["sessions"] = {"keep": 0, "append": sessions}
+        return diff
+
+    def _rotate(self):
+        fulls = self._names("full-")
+        if len(fulls) <= self.keep:
+            return
+        # Everything older than the oldest kept full snapshot goes
+        oldest_kept = fulls[-self.keep][len("full-"):]
+        for name in os.listdir(self.directory):
+            if name.endswith(".json.gz") and name.split("-", 1)[1] < oldest_kept:
+                os.remove(os.path.join(self.directory, name))
+
+    def _load_base(self):
+        fulls = self._names("full-")
+        if not fulls:
+            return
+        self.base = fulls[-1]
+        path = os.path.join(self.directory, self.base)
+        self.base_size = os.path.getsize(path)
+        self.base_fingerprint = _fingerprint(_read(path))
+        stamp = self.base[len("full-"):]
+        self.diffs = sum(1 for name in self._names("diff-") if name[len("diff-"):] > stamp)
+
+    @staticmethod
+    def _stamp():
+        return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+    def _names(self, prefix):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.startswith(prefix) and name.endswith(".json.gz"))
+
+    # === Restoring ===
+    def points(self):
+        """Retained backups as (stamp, file name), oldest first."""
+        names = self._names("full-") + self._names("diff-")
+        return sorted((name.split("-", 1)[1][:-len(".json.gz")], name) for name in names)
+
+    def restore(self, stamp=None):
+        """Rebuild the document as of a backup stamp (default the newest), or None."""
+        points = self.points()
+        if stamp is not None:
+            points = [point for point in points if point[0] == stamp]
+        if not points:
+            return None
+        document = _read(os.path.join(self.directory, points[-1][1]))
+        if "base" not in document:
+            return document
+        return self._apply_diff(_read(os.path.join(self.directory, document["base"])), document)
+
+    @staticmethod
+    def _apply_diff(data, diff):
+        for key in diff["removed_keys"]:
+            data.pop(key, None)
+        data.update(diff["keys"])
+        data["modules"] = {name: diff["modules"].get(name, data["modules"].get(name, []))
+                           for name in diff["module_order"]}
+        removed = set(diff["removed_history"])
+        changed = {rec["id"]: rec for rec in diff["history"]}
+        history = []
+        for rec in data["task_history"]:
+            if rec["id"] not in removed:
+                history.append(changed.pop(rec["id"], rec))
+        # Records left over were added after the base snapshot
+        history.extend(rec for rec in diff["history"] if rec["id"] in changed)
+        data["task_history"] = history
+        sessions = diff["sessions"]
+        data["pomodoro_sessions"] = data.get("pomodoro_sessions", [])[:sessions["keep"]] + sessions["append"]
+        return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List or restore planner backups")
+    parser.add_argument("command", choices=["list", "restore"])
+    parser.add_argument("stamp", nargs="?", help="backup to restore (default the newest)")
+    parser.add_argument("--file", default="data.json")
+    parser.add_argument("--backend", default="json", choices=["json", "sqlite"])
+    args = parser.parse_args()
+
+    backups = BackupSet(backup_dir(args.file))
+    if args.command == "list":
+        for stamp, name in backups.points():
+            kind = "full" if name.startswith("full-") else "diff"
+            print(f"{stamp}  {kind}  {os.path.getsize(os.path.join(backups.directory, name)) / 1024:8.1f} KB")
+        return
+
+    data = backups.restore(args.stamp)
+    if data is None:
+        print(f"No backup found{' for ' + args.stamp if args.stamp else ''}")
+        return
+    from data_manager import DataManager
+    if args.backend == "json" and os.path.exists(args.file):
+        with open(args.file, "rb") as current, open(args.file + ".before-restore", "wb") as saved:
+            saved.write(current.read())
+    data_manager = DataManager(args.file, write_behind=False, backend=args.backend, archive_days=None,
+                               backup_interval=None)
+    data_manager.replace_data(data)
+    data_manager.close()
+    # Journal records describe the document being replaced
+    if os.path.exists(data_manager.journal_path):
+        os.remove(data_manager.journal_path)
+    print(f"Restored {args.file} from backup {args.stamp or backups.points()[-1][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""Benchmarks for the planner's data layer on large synthetic datasets.
+
+Usage: python benchmark.py [--modules 50] [--tasks 100000] [--history 1000000]
+                           [--backend json journal sqlite] [--output results.json]
+
+No display is needed: everything runs through PlannerModel and DataManager.
+Memory per task is reported for the document as json.load gives it and
+once its tasks and records are compacted (task_model.py).
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from data_manager import DEFAULT_DATA, DataManager
+from model import STATUSES, PlannerModel
+from next_up import NextUpQueue
+from task_model import compact_data
+
+
+def generate_data(modules=50, tasks=100_000, history=1_000_000, seed=1):
+    """Build a planner document with the given number of modules, tasks and history records.
+
+    Every task has a history record; the remaining records are completed
+    history spread over the last two years.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    names = ["Home"] + [f"Module {i}" for i in range(1, modules)]
+    data = {key: value for key, value in DEFAULT_DATA.items() if key not in ("modules", "task_history")}
+    data["timetable"] = dict(DEFAULT_DATA["timetable"])
+    data["modules"] = {name: [] for name in names}
+    data["task_history"] = []
+
+    def record(i, module, completed):
+        created = now - timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+        return {
+            "id": f"task_bench_{i}",
+            "text": f"Task {i}",
+            "module": module,
+            "created_at": created.isoformat(),
+            "completed_at": (created + timedelta(minutes=rng.randrange(1, 7 * 24 * 60))).isoformat()
+            if completed else None,
+            "scheduled_time": f"{rng.randrange(24):02d}:00",
+        }
+
+    for i in range(max(history - tasks, 0)):
+        data["task_history"].append(record(i, rng.choice(names), True))
+    for i in range(history, history + tasks):
+        module = rng.choice(names)
+        status = rng.choice(STATUSES)
+        rec = record(i, module, status == "🟢")
+        data["task_history"].append(rec)
+        data["modules"][module].append([rec["text"], status, rec["id"]])
+    data["task_history"].sort(key=lambda rec: rec["created_at"])
+    return data
+
+
+def _timed(func, repeat):
+    """Call func repeat times and return the per-call latencies in milliseconds."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def _summary(latencies):
+    latencies = sorted(latencies)
+    return {
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)],
+    }
+
+
+def task_memory(source):
+    """Bytes per task (its history record and module entry), as loaded from JSON and compacted."""
+    with open(source, "r", encoding="utf-8") as file:
+        text = file.read()
+    tracemalloc.start()
+    data = json.loads(text)
+    loaded = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    compact_data(data)
+    compact_ms = (time.perf_counter() - start) * 1000
+    compacted = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Every task has a history record; those still in a module also have an entry there
+    count = max(len(data["task_history"]), 1)
+    return {"json_bytes_per_task": loaded / count, "compact_bytes_per_task": compacted / count,
+            "compact_ms": compact_ms}
+
+
+def _open(path, backend):
+    return DataManager(path, journal=backend == "journal", archive_days=None, backup_interval=None,
+                       backend="sqlite" if backend == "sqlite" else "json")
+
+
+def run_backend(source, backend, repeat, workdir):
+    """Run every benchmark against one backend, starting from a copy of source."""
+    path = os.path.join(workdir, f"{backend}.json")
+    shutil.copy(source, path)
+    results = {}
+
+    # The first SQLite open includes the one-time migration from JSON
+    start = time.perf_counter()
+    _open(path, backend).close()
+    results["first_open_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    data_manager = _open(path, backend)
+    results["load_ms"] = (time.perf_counter() - start) * 1000
+    model = PlannerModel(data_manager)
+    modules = model.module_names()
+    rng = random.Random(2)
+    # Built first so adds and status changes include keeping it up to date, as in the app
+    start = time.perf_counter()
+    next_up = NextUpQueue(data_manager)
+    results["next_up_build_ms"] = (time.perf_counter() - start) * 1000
+
+    results["save"] = _summary(_timed(data_manager.save_data, max(repeat // 100, 3)))
+    results["add_task"] = _summary(_timed(lambda: model.add_task(rng.choice(modules), "Benchmark task"), repeat))
+
+    def change_status():
+        module = rng.choice(modules)
+        if model.tasks(module):
+            model.cycle_status(module, rng.randrange(len(model.tasks(module))))
+    results["status_change"] = _summary(_timed(change_status, repeat))
+
+    results["query_history_module"] = _summary(
+        _timed(lambda: model.history(module=rng.choice(modules), completed=False), max(repeat // 100, 3)))
+    results["next_up_top"] = _summary(_timed(next_up.top, repeat))
+    results["query_stats"] = _summary(
+        _timed(lambda: (data_manager.stats.open_tasks(rng.choice(modules)),
+                        data_manager.stats.completion_rate()), repeat))
+
+    start = time.perf_counter()
+    data_manager.close()
+    results["close_ms"] = (time.perf_counter() - start) * 1000
+
+    tracemalloc.start()
+    data_manager = _open(path, backend)
+    results["memory_mb"] = tracemalloc.get_traced_memory()[0] / 2 ** 20
+    tracemalloc.stop()
+    data_manager.close()
+    return results
+
+
+def print_results(results):
+    memory = results["task_memory"]
+    print(f"\nMemory per task: {memory['json_bytes_per_task']:.0f} bytes as loaded from JSON, "
+          f"{memory['compact_bytes_per_task']:.0f} bytes compacted (in {memory['compact_ms']:.0f} ms)")
+    for backend, result in results["backends"].items():
+        print(f"\n== {backend} ==")
+        for name, value in result.items():
+            if isinstance(value, dict):
+                print(f"  {name:<22} mean {value['mean_ms']:9.3f} ms   "
+                      f"p50 {value['p50_ms']:9.3f} ms   p95 {value['p95_ms']:9.3f} ms")
+            else:
+                unit = "MB" if name.endswith("_mb") else "ms"
+                print(f"  {name:<22} {value:9.1f} {unit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planner data layer benchmarks")
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--history", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=1000, help="operations timed per latency benchmark")
+    parser.add_argument("--backend", nargs="+", default=["json", "journal", "sqlite"],
+                        choices=["json", "journal", "sqlite"])
+    parser.add_argument("--output", help="also write the results as JSON, to compare between versions")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="planner-bench-")
+    try:
+        start = time.perf_counter()
+        source = os.path.join(workdir, "source.json")
+        with open(source, "w", encoding="utf-8") as file:
+            json.dump(generate_data(args.modules, args.tasks, args.history), file, ensure_ascii=False)
+        print(f"Generated {args.modules} modules, {args.tasks} tasks, {args.history} history records "
+              f"({os.path.getsize(source) / 2 ** 20:.0f} MB) in {time.perf_counter() - start:.1f} s")
+
+        results = {
+            "dataset": {"modules": args.modules, "tasks": args.tasks, "history": args.history},
+            "task_memory": task_memory(source),
+            "backends": {backend: run_backend(source, backend, args.repeat, workdir) for backend in args.backend},
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
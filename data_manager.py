@@ -1,6 +1,21 @@
+import copy
+import hashlib
+import heapq
 import json
 import os
-from datetime import datetime
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from operator import attrgetter, itemgetter
+from datetime import datetime, timedelta
+from backup import BACKUP_INTERVAL, BACKUP_KEEP, BackupSet, atomic_write, backup_dir
+from day_store import DayStore
+from locking import FileLock
+from merge import SKIP_KEYS, STRUCTURED_KEYS, merge_documents
+from profiling import timed
+from stats import PlannerStats
+from task_model import EPOCH, Task, TaskRecord, compact_data, encode, status_code, to_document, to_stamp
 
 DEFAULT_DATA = {
     "target_date": "2025-06-15",
@@ -13,7 +28,11 @@ DEFAULT_DATA = {
         "PROJECT": []
     },
     "timetable": {},
-    "task_history": []
+    "task_history": [],
+    "pomodoro_sessions": [],
+    # Recurring task rules, and a min-heap of [next_due, rule id] over them
+    "recurring": {},
+    "recurring_due": []
 }
 
 # Generate 24-hour timetable (4am → 3am)
@@ -21,29 +40,950 @@ for h in range(24):
     hour = (4 + h) % 24
     DEFAULT_DATA["timetable"][f"{hour:02d}:00"] = ""
 
+# Seconds of quiet after the last change before the background writer saves
+SAVE_DELAY = 0.5
+# Journal size in bytes after which it is compacted into a new snapshot
+JOURNAL_LIMIT = 256 * 1024
+# Completed history older than this many days moves to monthly archive files
+# (with the SQLite backend it stays in the database and is not loaded)
+ARCHIVE_DAYS = 90
+HISTORY_PAGE = 1000       # records read at a time by iter_history()
+
+
+# Add task history logging helper
+def create_task_record(task_text, module_name, scheduled_time=None):
+    now = datetime.now()
+    record = TaskRecord(
+        # 48 random bits: bulk imports create thousands of ids within one second
+        f"task_{int(now.timestamp())}_{uuid.uuid4().hex[:12]}",
+        task_text,
+        module_name,
+        scheduled_time=scheduled_time,
+    )
+    record.created = (now - EPOCH).total_seconds()
+    return record
+
+
+class TaskIndex:
+    """In-memory indexes over task_history.
+
+    Tasks in data["modules"] are Task objects whose id is the id of their
+    task_history record, so lookups and completion are dict hits.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.open_tasks = {}
+
+    def rebuild(self, data):
+        self.records = {rec.id: rec for rec in data["task_history"]}
+        self.open_tasks = {}
+        for module, tasks in data["modules"].items():
+            for task in tasks:
+                rec = self.records.get(task.id)
+                if rec is not None and rec.completed is None:
+                    self.open_tasks.setdefault(module, {})[task.id] = rec
+
+    def add(self, rec):
+        self.records[rec.id] = rec
+        if rec.completed is None:
+            self.open_tasks.setdefault(rec.module, {})[rec.id] = rec
+
+    def pop_open(self, module, task_id):
+        return self.open_tasks.get(module, {}).pop(task_id, None)
+
+    def drop_module(self, module):
+        self.open_tasks.pop(module, None)
+
+    def move(self, module, target, task_ids):
+        source = self.open_tasks.get(module, {})
+        for task_id in task_ids:
+            rec = self.records.get(task_id)
+            if rec is not None:
+                rec.module = target
+            if task_id in source:
+                self.open_tasks.setdefault(target, {})[task_id] = source.pop(task_id)
+
+
+def migrate_task_ids(data):
+    """Give (text, status) tasks from older files the id of their history record.
+
+    Each task is matched to the oldest open history record with the same
+    module and text; tasks with no record get a new one. Returns True if
+    anything changed.
+    """
+    unmatched = {}
+    for rec in data["task_history"]:
+        if rec["completed_at"] is None:
+            unmatched.setdefault((rec["module"], rec["text"]), []).append(rec)
+    taken = {task[2] for tasks in data["modules"].values() for task in tasks if len(task) > 2}
+
+    changed = False
+    for module, tasks in data["modules"].items():
+        for position, task in enumerate(tasks):
+            if len(task) > 2:
+                continue
+            candidates = [rec for rec in unmatched.get((module, task[0]), []) if rec["id"] not in taken]
+            if candidates:
+                rec = candidates[0]
+            else:
+                rec = create_task_record(task[0], module)
+                data["task_history"].append(rec)
+            taken.add(rec["id"])
+            tasks[position] = (task[0], task[1], rec["id"])
+            changed = True
+    return changed
+
+
+# === Operations ===
+# Every change to the data is one small record. The same functions apply a
+# record live and when the journal is replayed on top of the last snapshot.
+def _task_position(tasks, record):
+    # index is a hint from the UI; task_id is authoritative when present
+    index, task_id = record.get("index"), record.get("task_id")
+    if index is not None and 0 <= index < len(tasks) and (task_id is None or tasks[index].id == task_id):
+        return index
+    for position, task in enumerate(tasks):
+        if task.id == task_id:
+            return position
+    return None
+
+# Records arrive as TaskRecord from the model and as dicts from the journal
+# and imports. Tasks are replaced rather than changed in place, so a view
+# holding the old Task can tell what changed.
+def _task_added(data, index, record):
+    history = TaskRecord.from_json(record["record"])
+    data["task_history"].append(history)
+    index.add(history)
+    data["modules"].setdefault(record["module"], []).append(Task(record["text"], record["status"], history.id))
+
+def _task_deleted(data, index, record):
+    tasks = data["modules"].get(record["module"], [])
+    position = _task_position(tasks, record)
+    if position is not None:
+        index.pop_open(record["module"], tasks[position].id)
+        del tasks[position]
+
+def _status_changed(data, index, record):
+    tasks = data["modules"].get(record["module"], [])
+    position = _task_position(tasks, record)
+    if position is None:
+        return
+    task = tasks[position]
+    tasks[position] = Task(task.text, record["status"], task.id)
+    if record.get("completed_at"):
+        rec = index.pop_open(record["module"], task.id)
+        if rec is not None:
+            rec["completed_at"] = record["completed_at"]
+
+def _task_renamed(data, index, record):
+    tasks = data["modules"].get(record["module"], [])
+    position = _task_position(tasks, record)
+    if position is None:
+        return
+    task = tasks[position]
+    tasks[position] = Task(record["text"], task.status, task.id)
+    rec = index.records.get(task.id)
+    if rec is not None:
+        rec.text = record["text"]
+
+# Bulk operations touch many tasks of one module in a single pass, and are
+# one journal line, one SQLite transaction and one listener call
+def _tasks_added(data, index, record):
+    tasks = data["modules"].setdefault(record["module"], [])
+    for text, status, history in record["tasks"]:
+        history = TaskRecord.from_json(history)
+        data["task_history"].append(history)
+        index.add(history)
+        tasks.append(Task(text, status, history.id))
+
+def _tasks_deleted(data, index, record):
+    tasks = data["modules"].get(record["module"], [])
+    task_ids = set(record["task_ids"])
+    for task_id in task_ids:
+        index.pop_open(record["module"], task_id)
+    tasks[:] = [task for task in tasks if task.id not in task_ids]
+
+def _statuses_changed(data, index, record):
+    tasks = data["modules"].get(record["module"], [])
+    task_ids = set(record["task_ids"])
+    status = status_code(record["status"])
+    for position, task in enumerate(tasks):
+        if task.id not in task_ids:
+            continue
+        tasks[position] = Task(task.text, status, task.id)
+        if record.get("completed_at") and task.status != status:
+            rec = index.pop_open(record["module"], task.id)
+            if rec is not None:
+                rec["completed_at"] = record["completed_at"]
+
+def _tasks_moved(data, index, record):
+    tasks = data["modules"].get(record["module"], [])
+    task_ids = set(record["task_ids"])
+    data["modules"].setdefault(record["target"], []).extend(task for task in tasks if task.id in task_ids)
+    tasks[:] = [task for task in tasks if task.id not in task_ids]
+    index.move(record["module"], record["target"], task_ids)
+
+# Inverse operations, applied by undo
+def _tasks_removed(data, index, record):
+    # Undoing an add also drops the history records, which are usually the
+    # last ones in task_history
+    _tasks_deleted(data, index, record)
+    history = data["task_history"]
+    remaining = set(record["task_ids"])
+    position = len(history)
+    while remaining and position:
+        position -= 1
+        if history[position].id in remaining:
+            remaining.discard(history[position].id)
+            del history[position]
+    for task_id in record["task_ids"]:
+        index.records.pop(task_id, None)
+
+def _tasks_restored(data, index, record):
+    # Merge the restored tasks back in at their old positions in one pass
+    tasks = data["modules"].setdefault(record["module"], [])
+    merged, remaining = [], iter(tasks)
+    for position, text, status, task_id in record["tasks"]:
+        while len(merged) < position:
+            task = next(remaining, None)
+            if task is None:
+                break
+            merged.append(task)
+        merged.append(Task(text, status, task_id))
+        rec = index.records.get(task_id)
+        if rec is not None:
+            rec.module = record["module"]
+            if rec.completed is None:
+                index.open_tasks.setdefault(record["module"], {})[task_id] = rec
+    merged.extend(remaining)
+    tasks[:] = merged
+
+def _statuses_restored(data, index, record):
+    restored = {task_id: (status, completed_at) for task_id, status, completed_at in record["tasks"]}
+    tasks = data["modules"].get(record["module"], [])
+    for position, task in enumerate(tasks):
+        if task.id not in restored:
+            continue
+        status, completed_at = restored[task.id]
+        tasks[position] = Task(task.text, status, task.id)
+        rec = index.records.get(task.id)
+        if rec is not None:
+            rec["completed_at"] = completed_at
+            if completed_at is None:
+                index.open_tasks.setdefault(record["module"], {})[task.id] = rec
+            else:
+                index.pop_open(record["module"], task.id)
+
+def _timetable_changed(data, index, record):
+    data["timetable"].update(record["slots"])
+
+def _module_added(data, index, record):
+    data["modules"].setdefault(record["name"], [])
+
+def _module_deleted(data, index, record):
+    data["modules"].pop(record["name"], None)
+    index.drop_module(record["name"])
+
+def _settings_changed(data, index, record):
+    data.update(record["values"])
+
+def _session_logged(data, index, record):
+    data["pomodoro_sessions"].append(record["session"])
+
+def _history_added(data, index, record):
+    # Records only: imported history of tasks no longer in any module
+    for rec in record["records"]:
+        rec = TaskRecord.from_json(rec)
+        data["task_history"].append(rec)
+        index.records[rec.id] = rec
+
+def _history_archived(data, index, record):
+    archived = set(record["ids"])
+    data["task_history"][:] = [rec for rec in data["task_history"] if rec.id not in archived]
+    for task_id in archived:
+        index.records.pop(task_id, None)
+
+def _rule_added(data, index, record):
+    data["recurring"][record["rule_id"]] = record["rule"]
+    heapq.heappush(data["recurring_due"], [record["rule"]["next_due"], record["rule_id"]])
+
+def _rule_deleted(data, index, record):
+    # Its heap entry is dropped when it reaches the top
+    data["recurring"].pop(record["rule_id"], None)
+
+def _rules_advanced(data, index, record):
+    rules, heap = data["recurring"], data["recurring_due"]
+    for rule_id, next_due in record["next_due"].items():
+        if rule_id in rules:
+            rules[rule_id]["next_due"] = next_due
+    # Every entry up to the window end is now stale: its rule has moved past it
+    while heap and heap[0][0] <= record["through"]:
+        heapq.heappop(heap)
+    for rule_id, next_due in record["next_due"].items():
+        if rule_id in rules:
+            heapq.heappush(heap, [next_due, rule_id])
+
+def rebuild_due(data):
+    """A fresh heap over data["recurring"], for documents merged from elsewhere."""
+    data["recurring_due"][:] = sorted([rule["next_due"], rule_id] for rule_id, rule in data["recurring"].items())
+
+OPERATIONS = {
+    "task_added": _task_added,
+    "task_deleted": _task_deleted,
+    "status_changed": _status_changed,
+    "task_renamed": _task_renamed,
+    "tasks_added": _tasks_added,
+    "tasks_deleted": _tasks_deleted,
+    "statuses_changed": _statuses_changed,
+    "tasks_moved": _tasks_moved,
+    "tasks_removed": _tasks_removed,
+    "tasks_restored": _tasks_restored,
+    "statuses_restored": _statuses_restored,
+    "timetable_changed": _timetable_changed,
+    "module_added": _module_added,
+    "module_deleted": _module_deleted,
+    "settings_changed": _settings_changed,
+    "history_added": _history_added,
+    "history_archived": _history_archived,
+    "rule_added": _rule_added,
+    "rule_deleted": _rule_deleted,
+    "rules_advanced": _rules_advanced,
+    "session_logged": _session_logged,
+}
+
+
 class DataManager:
-    def __init__(self, filepath="data.json"):
+    def __init__(self, filepath="data.json", write_behind=True, save_delay=SAVE_DELAY,
+                 journal=False, journal_limit=JOURNAL_LIMIT, backend="json", archive_days=ARCHIVE_DAYS,
+                 backup_interval=BACKUP_INTERVAL, backup_keep=BACKUP_KEEP):
         self.filepath = filepath
+        # backup_interval=None turns backups off
+        self.backups = None
+        if backup_interval is not None:
+            self.backups = BackupSet(backup_dir(filepath), backup_keep, backup_interval)
+        self._unbacked = False
+        self.archive_dir = os.path.splitext(filepath)[0] + "_archive"
+        self.archive_days = archive_days
+        self.backend = None
+        if backend == "sqlite":
+            from sqlite_backend import SqliteBackend
+            self.backend = SqliteBackend(os.path.splitext(filepath)[0] + ".db", archive_days)
+            # Row-level writes already cost O(change)
+            journal = False
+        self.journal_path = os.path.splitext(filepath)[0] + ".journal"
+        # Held by whichever instance is writing the data file
+        self.lock_path = os.path.splitext(filepath)[0] + ".lock"
+        # Dated timetables live outside the data document, a shard per week
+        self.days = DayStore(os.path.splitext(filepath)[0] + "_timetable", self.lock_path, self.backend)
+        # Only one instance appends to the journal; any other replays it at
+        # load and then saves straight to the data file
+        self._journal_lock = None
+        self._journal_reader = False
+        if journal:
+            self._journal_lock = FileLock(self.journal_path + ".lock")
+            if not self._journal_lock.acquire(blocking=False):
+                print("Another Planner instance owns the journal; saving to the data file directly")
+                self._journal_lock = None
+                self._journal_reader = True
+                journal = False
+        self.journal = journal
+        self.journal_limit = journal_limit
+        self._journal_file = None
+        self._journal_size = 0
+        self._seq = 0
+        # Operations held back by batch() until it ends: encoded lines in
+        # journal mode, otherwise (op, record)
+        self._batch_depth = 0
+        self._batched = []
+        self.tasks = TaskIndex()
+        self.stats = PlannerStats()
+        # Called with (op, record) after each apply(), on the calling thread
+        self.listeners = []
+        self._migrated = False
+        self._recovered = False
+        # The data file as last read or written: (mtime, size), hash and content
+        self._disk = None
+        self._disk_digest = None
+        self._base_text = None
+        # Merged changes from other instances not yet passed to listeners
+        self._external = []
+        # Set once another instance has written the file
+        self._shared = False
         self.data = self.load_data()
+        if journal:
+            self._journal_file = open(self.journal_path, "a", encoding="utf-8")
+            self._journal_size = self._journal_file.tell()
+
+        # Held while self.data is being changed or serialized
+        self.lock = threading.RLock()
+        self._io_lock = threading.Lock()
+        self._wakeup = threading.Condition(self.lock)
+        # Snapshots are numbered as they are taken; one older than the
+        # snapshot last written is dropped rather than written over it
+        self._generation = 0
+        self._written_generation = 0
+        self._dirty = False
+        self._pending = 0
+        self._last_change = 0.0
+        self._closed = False
+        self.save_delay = save_delay
 
+        # Write-behind counters
+        self.save_requests = 0
+        self.saves_written = 0
+        self.coalesced_saves = 0
+
+        self._writer = None
+        if write_behind:
+            self._writer = threading.Thread(target=self._write_loop, name="planner-writer", daemon=True)
+            self._writer.start()
+        if self._migrated or self._recovered:
+            self.mark_dirty()
+        if archive_days is not None:
+            self.archive_history()
+
+    @timed("data.load")
     def load_data(self):
+        if self.backend is not None:
+            if self.backend.is_empty():
+                # One-time migration from the JSON document
+                self.backend.write(self._load_json())
+            data = self.backend.load()
+            for key, value in DEFAULT_DATA.items():
+                if key not in data:
+                    data[key] = copy.deepcopy(value)
+            self._migrated = migrate_task_ids(data)
+            compact_data(data)
+            self.tasks.rebuild(data)
+            self.stats.load(data)
+            return data
+        data = self._load_json()
+        self._migrated = migrate_task_ids(data)
+        compact_data(data)
+        self.tasks.rebuild(data)
+        # Saved stats describe the snapshot; replayed records then update them
+        self.stats.load(data)
+        if self.journal or self._journal_reader:
+            self._replay_journal(data)
+        return data
+
+    def _load_json(self):
         try:
             if os.path.exists(self.filepath):
-                with open(self.filepath, "r", encoding="utf-8") as file:
-                    data = json.load(file)
+                with open(self.filepath, "rb") as file:
+                    raw = file.read()
+                data = json.loads(raw)
+                self._remember_disk(raw)
                 for key, value in DEFAULT_DATA.items():
                     if key not in data:
-                        data[key] = value
-                return data
+                        data[key] = copy.deepcopy(value)
             else:
-                return DEFAULT_DATA.copy()
+                data = copy.deepcopy(DEFAULT_DATA)
         except Exception as exception:
             print(f"Error loading data: {exception}")
-            return DEFAULT_DATA.copy()
+            data = self._recover()
+        return data
+
+    def _recover(self):
+        """Load the newest backup in place of an unreadable data file."""
+        data = None
+        if self.backups is not None:
+            try:
+                data = self.backups.restore()
+            except Exception as exception:
+                print(f"Error reading backup: {exception}")
+        if data is None:
+            return copy.deepcopy(DEFAULT_DATA)
+        # Keep the unreadable file for inspection; the next save replaces it
+        if os.path.exists(self.filepath):
+            os.replace(self.filepath, self.filepath + ".corrupt")
+        self._recovered = True
+        print(f"Loaded the newest backup instead; the unreadable file was kept as {self.filepath}.corrupt")
+        for key, value in DEFAULT_DATA.items():
+            if key not in data:
+                data[key] = copy.deepcopy(value)
+        return data
+
+    def replace_data(self, data):
+        """Swap in a whole document, such as a restored backup, and save it."""
+        with self.lock:
+            for key, value in DEFAULT_DATA.items():
+                if key not in data:
+                    data[key] = copy.deepcopy(value)
+            migrate_task_ids(data)
+            compact_data(data)
+            self.data = data
+            self.tasks.rebuild(data)
+            self.stats.rebuild(data)
+        self.save_data()
+
+    def _replay_journal(self, data):
+        """Apply journal records newer than the snapshot in data."""
+        self._seq = data.get("journal_seq", 0)
+        if not os.path.exists(self.journal_path):
+            return
+        valid_size = 0
+        with open(self.journal_path, "rb") as file:
+            for line in file:
+                # A torn last line from a crash mid-append is dropped
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid_size += len(line)
+                if record["seq"] <= self._seq:
+                    continue
+                self._run(data, record["op"], record)
+                self._seq = record["seq"]
+        # Only the owner may cut a torn line; it could still be mid-append
+        if self.journal and valid_size < os.path.getsize(self.journal_path):
+            os.truncate(self.journal_path, valid_size)
+        data["journal_seq"] = self._seq
 
+    @timed("data.save")
     def save_data(self):
+        """Serialize and write the whole document now, on the calling thread."""
+        with self.lock:
+            snapshot, seq, generation = self._serialize()
+            self._dirty = False
+            self._pending = 0
+        self._write(snapshot, seq, generation)
+
+    @timed("data.serialize")
+    def _serialize(self):
+        """(snapshot, journal seq, generation) of self.data; call with the lock held."""
+        self._generation += 1
+        self.data["stats"] = self.stats.to_json(self.data)
+        if self.backend is not None:
+            return copy.deepcopy(self.data), None, self._generation
+        if self.journal or self._journal_reader:
+            self.data["journal_seq"] = self._seq
+        snapshot = json.dumps(to_document(self.data), indent=4, ensure_ascii=False, default=encode)
+        return snapshot, self._seq, self._generation
+
+    @timed("data.write")
+    def _write(self, snapshot, seq, generation):
         try:
-            with open(self.filepath, "w", encoding="utf-8") as file:
-                json.dump(self.data, file, indent=4, ensure_ascii=False)
+            with self._io_lock:
+                # The writer thread can take a snapshot, then lose the race to a
+                # save_data() on another thread; the newer one holds its changes
+                if generation < self._written_generation:
+                    return
+                self._written_generation = generation
+                if self.backend is not None:
+                    self.backend.write(snapshot)
+                else:
+                    with FileLock(self.lock_path):
+                        # Fold in anything another instance saved since we last looked
+                        raw = self._read_external()
+                        if raw is not None:
+                            with self.lock:
+                                self._merge_external(raw)
+                                snapshot, seq, generation = self._serialize()
+                                self._written_generation = generation
+                        # Write a temp file and rename it over the old one, so a crash
+                        # mid-write never leaves a truncated data file
+                        payload = snapshot.encode("utf-8")
+                        atomic_write(self.filepath, payload)
+                        self._remember_disk(payload)
+                self.saves_written += 1
         except Exception as exception:
             print(f"Error saving data: {exception}")
+            return
+        if self.journal:
+            self._compact_journal(seq)
+        if self.backups is not None and self._unbacked and self.backups.due():
+            # The SQLite snapshot is already a document
+            self._backup(snapshot if self.backend is not None else json.loads(snapshot))
+
+    # === Other instances ===
+    def _remember_disk(self, raw):
+        stat = os.stat(self.filepath)
+        self._disk = (stat.st_mtime_ns, stat.st_size)
+        self._disk_digest = hashlib.sha256(raw).digest()
+        self._base_text = raw
+
+    def _changed_on_disk(self):
+        try:
+            stat = os.stat(self.filepath)
+        except FileNotFoundError:
+            return False
+        return (stat.st_mtime_ns, stat.st_size) != self._disk
+
+    def _read_external(self):
+        """Return the data file's content if another instance changed it, else None.
+
+        The cheap mtime/size check comes first; the content hash rules out
+        files that were only touched.
+        """
+        if not self._changed_on_disk():
+            return None
+        with open(self.filepath, "rb") as file:
+            raw = file.read()
+        if hashlib.sha256(raw).digest() == self._disk_digest:
+            stat = os.stat(self.filepath)
+            self._disk = (stat.st_mtime_ns, stat.st_size)
+            return None
+        return raw
+
+    def _merge_external(self, raw):
+        """Three-way merge another instance's save into self.data, in place.
+
+        Returns True if our side contributed changes that still need saving.
+        """
+        theirs = json.loads(raw)
+        for key, value in DEFAULT_DATA.items():
+            if key not in theirs:
+                theirs[key] = copy.deepcopy(value)
+        migrate_task_ids(theirs)
+        if self._base_text is not None:
+            base = json.loads(self._base_text)
+        else:
+            base = {"modules": {}, "timetable": {}, "task_history": [], "pomodoro_sessions": []}
+        merged, merge = merge_documents(base, self.data, theirs)
+        compact_data(merged)
+        changes = self._adopt(merged)
+        changes["conflicts"] = merge.conflicts
+        if "recurring" in changes["settings"]:
+            rebuild_due(self.data)
+        self._seq = max(self._seq, theirs.get("journal_seq", 0))
+        self._remember_disk(raw)
+        self.tasks.rebuild(self.data)
+        self.stats.rebuild(self.data)
+        self._external.append(changes)
+        self._shared = True
+        return merge.local
+
+    def _adopt(self, merged):
+        """Update self.data to merged without replacing the lists the UI holds."""
+        data = self.data
+        changes = {"modules": [], "added": [], "removed": [], "slots": [], "settings": [], "sessions": False}
+        for name in [name for name in data["modules"] if name not in merged["modules"]]:
+            del data["modules"][name]
+            changes["removed"].append(name)
+        for name, tasks in merged["modules"].items():
+            if name not in data["modules"]:
+                data["modules"][name] = tasks
+                changes["added"].append(name)
+            elif [tuple(task) for task in data["modules"][name]] != tasks:
+                data["modules"][name][:] = tasks
+                changes["modules"].append(name)
+        timetable = data["timetable"]
+        for slot in list(timetable) + [slot for slot in merged["timetable"] if slot not in timetable]:
+            if timetable.get(slot) != merged["timetable"].get(slot):
+                if slot in merged["timetable"]:
+                    timetable[slot] = merged["timetable"][slot]
+                else:
+                    del timetable[slot]
+                changes["slots"].append(slot)
+        for key in [key for key in data if key not in merged and key not in STRUCTURED_KEYS + SKIP_KEYS]:
+            del data[key]
+            changes["settings"].append(key)
+        for key, value in merged.items():
+            if key not in STRUCTURED_KEYS and data.get(key) != value:
+                data[key] = value
+                changes["settings"].append(key)
+        data["task_history"][:] = merged["task_history"]
+        if data["pomodoro_sessions"] != merged["pomodoro_sessions"]:
+            data["pomodoro_sessions"][:] = merged["pomodoro_sessions"]
+            changes["sessions"] = True
+        return changes
+
+    def poll_external(self):
+        """Merge changes another instance saved to the data file, then notify listeners.
+
+        Call periodically from the thread that owns the listeners (the Tk
+        mainloop); merges the background writer made are delivered here too,
+        as one "data_reloaded" call per merge.
+        """
+        if self.backend is None and self._changed_on_disk():
+            local = False
+            try:
+                with self._io_lock, FileLock(self.lock_path):
+                    raw = self._read_external()
+                    if raw is not None:
+                        with self.lock:
+                            local = self._merge_external(raw)
+            except Exception as exception:
+                print(f"Error reading changes from another instance: {exception}")
+            if local:
+                self.mark_dirty()
+        with self.lock:
+            pending, self._external = self._external, []
+        for changes in pending:
+            for listener in self.listeners:
+                listener("data_reloaded", changes)
+
+    def _backup(self, data):
+        self._unbacked = False
+        try:
+            self.backups.backup(data)
+        except Exception as exception:
+            print(f"Error writing backup: {exception}")
+
+    # === Journal ===
+    @timed("data.apply")
+    def apply(self, op, **record):
+        """Apply one operation to the data and persist it.
+
+        With the SQLite backend the change is written as single rows, and in
+        journal mode it is appended to the journal, so the cost is the size of
+        the change. Otherwise a write-behind save is scheduled. Dated
+        timetable changes (day_changed) go straight to their week's shard.
+        """
+        if op == "day_changed":
+            # The shard is written under the file lock, so this takes the
+            # writer's order (io lock, then file lock) and not self.lock, which
+            # the writer takes last. For the same reason it cannot be batched.
+            if self._batch_depth:
+                raise RuntimeError("day_changed cannot be applied inside batch()")
+            with self._io_lock:
+                self.days.change(record["day"], record["slots"])
+            for listener in self.listeners:
+                listener(op, record)
+            return
+        with self.lock:
+            self._run(self.data, op, record)
+            self._unbacked = True
+            if self.journal:
+                self._seq += 1
+                self._batched.append(json.dumps({"seq": self._seq, "op": op, **record}, ensure_ascii=False,
+                                                  default=encode) + "\n")
+            else:
+                self._batched.append((op, record))
+            if not self._batch_depth:
+                self._persist()
+        for listener in self.listeners:
+            listener(op, record)
+
+    @contextmanager
+    def batch(self):
+        """Persist every apply() made inside the block with a single write.
+
+        One SQLite transaction, one journal append and fsync, or one save.
+        The lock is held throughout, so the writer never sees half a batch.
+        """
+        with self.lock:
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._persist()
+
+    def _persist(self):
+        batched, self._batched = self._batched, []
+        if not batched:
+            return
+        if self.backend is not None:
+            with self._io_lock:
+                self.backend.apply_many(batched, settings={"stats": self.stats.to_json(self.data)})
+            # Changes never reach _write() here, so backups are taken as they are saved
+            if self.backups is not None and self.backups.due():
+                self._backup(self.data)
+        elif self.journal:
+            lines = "".join(batched)
+            self._journal_file.write(lines)
+            self._journal_file.flush()
+            os.fsync(self._journal_file.fileno())
+            self._journal_size += len(lines.encode("utf-8"))
+            # Once another instance is saving too, publish changes to the data file
+            if self._journal_size >= self.journal_limit or self._shared:
+                self.mark_dirty()
+        else:
+            self.mark_dirty()
+
+    def _run(self, data, op, record):
+        position = None
+        if op in ("task_deleted", "status_changed"):
+            position = _task_position(data["modules"].get(record["module"], []), record)
+        self.stats.observe(op, record, data, position)
+        OPERATIONS[op](data, self.tasks, record)
+
+    def _compact_journal(self, snapshot_seq):
+        """Drop journal records now covered by the snapshot."""
+        with self.lock:
+            # Records appended while the snapshot was written stay until next time
+            if snapshot_seq != self._seq or self._journal_file is None:
+                return
+            self._journal_file.seek(0)
+            self._journal_file.truncate()
+            self._journal_size = 0
+
+    # === Write-behind ===
+    @contextmanager
+    def change(self):
+        """Mutate self.data under the lock, then schedule a background save."""
+        with self.lock:
+            yield self.data
+        self.mark_dirty()
+
+    def mark_dirty(self):
+        self._unbacked = True
+        if self._writer is None:
+            self.save_data()
+            return
+        with self._wakeup:
+            self.save_requests += 1
+            self._pending += 1
+            self._dirty = True
+            self._last_change = time.monotonic()
+            self._wakeup.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._wakeup:
+                while not self._dirty and not self._closed:
+                    self._wakeup.wait()
+                if not self._dirty:
+                    return
+                # Wait for a quiet period so a burst of clicks becomes one save
+                while not self._closed:
+                    remaining = self._last_change + self.save_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                snapshot, seq, generation = self._serialize()
+                self.coalesced_saves += self._pending - 1
+                self._dirty = False
+                self._pending = 0
+            self._write(snapshot, seq, generation)
+
+    def flush(self):
+        """Write any pending changes immediately."""
+        with self.lock:
+            if not self._dirty:
+                return
+            snapshot, seq, generation = self._serialize()
+            self.coalesced_saves += self._pending - 1
+            self._dirty = False
+            self._pending = 0
+        self._write(snapshot, seq, generation)
+
+    def close(self):
+        """Flush pending changes and stop the background writer."""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+        if self.backups is not None and self._unbacked:
+            with self.lock:
+                self._backup(self.data)
+        if self._journal_file is not None:
+            self._journal_file.close()
+            self._journal_file = None
+        if self._journal_lock is not None:
+            self._journal_lock.release()
+            self._journal_lock = None
+        if self.backend is not None:
+            self.backend.close()
+
+    # === Archive ===
+    def archive_history(self, days=None):
+        """Move completed history older than days into per-month archive files.
+
+        Records are appended to <archive_dir>/YYYY-MM.jsonl (by completion
+        month) before they are dropped from the live document. The record of
+        a task still listed in a module stays, however old: exports,
+        reminders and Next Up read it from tasks.records.
+        """
+        days = self.archive_days if days is None else days
+        cutoff = to_stamp((datetime.now() - timedelta(days=days)).isoformat())
+        with self.lock:
+            listed = {task.id for tasks in self.data["modules"].values() for task in tasks}
+            old = [rec for rec in self.data["task_history"]
+                   if rec.completed is not None and rec.completed < cutoff and rec.id not in listed]
+        if not old:
+            return 0
+
+        by_month = {}
+        for rec in old:
+            rec = rec.to_json()
+            by_month.setdefault(rec["completed_at"][:7], []).append(rec)
+        os.makedirs(self.archive_dir, exist_ok=True)
+        for month, records in by_month.items():
+            path = os.path.join(self.archive_dir, f"{month}.jsonl")
+            # Skip records an interrupted earlier run already archived
+            archived = {rec["id"] for rec in self._read_archive(path)} if os.path.exists(path) else set()
+            with open(path, "a", encoding="utf-8") as file:
+                for rec in records:
+                    if rec["id"] not in archived:
+                        file.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+
+        self.apply("history_archived", ids=[rec.id for rec in old])
+        return len(old)
+
+    def archived_months(self):
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(name[:-len(".jsonl")] for name in os.listdir(self.archive_dir) if name.endswith(".jsonl"))
+
+    def iter_archived_history(self, first_month=None, last_month=None):
+        """Yield archived history records one at a time, oldest month first.
+
+        Months are "YYYY-MM" strings; only the files in range are opened.
+        """
+        for month in self.archived_months():
+            if (first_month is None or month >= first_month) and (last_month is None or month <= last_month):
+                yield from self._read_archive(os.path.join(self.archive_dir, f"{month}.jsonl"))
+
+    def iter_history(self, archived=True):
+        """Yield every history record, archived months first, without building a list.
+
+        Records are plain dicts. The SQLite backend is read a page at a time;
+        live JSON records are copied out under the lock in slices.
+        """
+        if archived:
+            yield from self.iter_archived_history()
+        if self.backend is not None:
+            yield from self.backend.iter_history()
+            return
+        position = 0
+        while True:
+            with self.lock:
+                page = [rec.to_json() for rec in self.data["task_history"][position:position + HISTORY_PAGE]]
+            if not page:
+                return
+            yield from page
+            position += len(page)
+
+    def _read_archive(self, path):
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+    def query_history(self, module=None, since=None, until=None, completed=None):
+        """Return task_history records matching the given filters.
+
+        since and until compare against created_at ISO strings, and records
+        come back as plain dicts. The SQLite backend answers from its
+        indexes; otherwise the loaded list is scanned, comparing numeric
+        timestamps when the bounds are whole dates or times. Archived
+        records are not included; see iter_archived_history().
+        """
+        if self.backend is not None:
+            return self.backend.query_history(module, since, until, completed)
+        if all(bound is None or to_stamp(bound) is not None for bound in (since, until)):
+            since, until = (None if bound is None else to_stamp(bound) for bound in (since, until))
+            created = attrgetter("created")
+        else:
+            # A partial bound such as "2026-10" only compares as text
+            created = itemgetter("created_at")
+        with self.lock:
+            return [
+                rec.to_json() for rec in self.data["task_history"]
+                if (module is None or rec.module == module)
+                and (since is None or created(rec) >= since)
+                and (until is None or created(rec) < until)
+                and (completed is None or (rec.completed is not None) == completed)
+            ]
@@ -0,0 +1,109 @@
+"""Dated timetables, stored one ISO week per shard and loaded when first viewed.
+
+With the JSON backend each week is a file in <data>_timetable/ named like
+2026-W42.json, holding {"YYYY-MM-DD": {"HH:00": text}}. With SQLite the
+rows live in a day_slots table keyed by day. A day stores only the slots
+that differ from the template in data["timetable"] ("" for a slot left
+empty that day), so an unedited day costs nothing. Viewing a day
+reads only its week, and saving writes only the slots that changed: the
+week file is re-read under the data file lock, patched and replaced, so
+two windows editing different slots do not overwrite each other.
+"""
+import json
+import os
+from datetime import date, timedelta
+from backup import atomic_write
+from locking import FileLock
+
+
+def week_key(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+def week_days(day):
+    monday = day - timedelta(days=day.weekday())
+    return monday, monday + timedelta(days=6)
+
+
+class DayStore:
+    def __init__(self, directory, lock_path, backend=None):
+        self.directory = directory
+        self.lock_path = lock_path
+        self.backend = backend
+        # week key -> ({day: {slot: text}}, (mtime, size) of its file when read)
+        self.weeks = {}
+        self.shards_read = 0
+        self.shards_written = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _stat(self, key):
+        try:
+            stat = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_week(self, day):
+        key = week_key(day)
+        self.shards_read += 1
+        if self.backend is not None:
+            first, last = week_days(day)
+            return self.backend.load_days(first.isoformat(), last.isoformat()), None
+        stat = self._stat(key)
+        if stat is None:
+            return {}, None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                return json.load(file), stat
+        except (OSError, ValueError) as exception:
+            print(f"Error reading timetable shard {key}: {exception}")
+            return {}, stat
+
+    def stale(self, day):
+        """Whether another window has saved day's week since it was read."""
+        key = week_key(day)
+        return self.backend is None and key in self.weeks and self.weeks[key][1] != self._stat(key)
+
+    def _week(self, day):
+        key = week_key(day)
+        if key not in self.weeks or self.stale(day):
+            self.weeks[key] = self._read_week(day)
+        return self.weeks[key][0]
+
+    def day(self, day):
+        """{slot: text} saved for day (a date) over the template; empty if none."""
+        return dict(self._week(day).get(day.isoformat(), {}))
+
+    def has_day(self, day):
+        return day.isoformat() in self._week(day)
+
+    def change(self, day, slots):
+        """Save slots ({slot: text}, None goes back to the template) for the ISO date string day."""
+        day_date = date.fromisoformat(day)
+        key = week_key(day_date)
+        if self.backend is not None:
+            self.backend.change_day(day, slots)
+            week = self._week(day_date)
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            with FileLock(self.lock_path):
+                week, _ = self._read_week(day_date)
+                self._patch(week, day, slots)
+                atomic_write(self._path(key), json.dumps(week, ensure_ascii=False, indent=1).encode("utf-8"))
+                self.weeks[key] = (week, self._stat(key))
+                self.shards_written += 1
+            return
+        self._patch(week, day, slots)
+
+    @staticmethod
+    def _patch(week, day, slots):
+        entries = week.setdefault(day, {})
+        for slot, text in slots.items():
+            if text is None:
+                entries.pop(slot, None)
+            else:
+                entries[slot] = text
+        if not entries:
+            del week[day]
@@ -0,0 +1,64 @@
+import os
+import time
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(file):
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(file):
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(file):
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock:
+    """Advisory lock on a separate lock file, shared by every process using it.
+
+    Used as a context manager it waits up to timeout seconds and raises
+    TimeoutError; acquire(blocking=False) just reports whether it got it.
+    """
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._file = None
+
+    def acquire(self, blocking=True):
+        deadline = time.monotonic() + self.timeout
+        file = open(self.path, "a+")
+        while True:
+            try:
+                _lock(file)
+                self._file = file
+                return True
+            except OSError:
+                if not blocking or time.monotonic() >= deadline:
+                    file.close()
+                    return False
+                time.sleep(0.05)
+
+    def release(self):
+        if self._file is not None:
+            try:
+                _unlock(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        if not self.acquire():
+            raise TimeoutError(f"Could not lock {self.path}")
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
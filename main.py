@@ -1,20 +1,65 @@
+import time
+_START = time.perf_counter()  # Taken before the heavy imports below
+
+import os
 import tkinter as tk
 import tkinter.messagebox as messagebox
 from ui import PlannerUI
 from data_manager import DataManager
+from api_server import API_DRAIN_INTERVAL, ApiServer
+from profiling import PROFILER
+
+
+def report_startup(ui):
+    built = sum(1 for tab in ui.tab_frames.values() if str(tab) not in ui.pending_tabs)
+    print(f"Startup: {(time.perf_counter() - _START) * 1000:.0f} ms "
+          f"({built} of {len(ui.tab_frames)} tabs built)")
+
+
+def start_api(window, ui, port):
+    """Serve the local API and run its queued requests on the Tk thread."""
+    api = ApiServer(ui.model, port, token=os.environ.get("PLANNER_API_TOKEN"))
+    api.start()
+    print(f"API listening on http://{api.host}:{api.port}")
+
+    def drain():
+        if api.drain():
+            ui.sync_with_data()
+        window.after(API_DRAIN_INTERVAL, drain)
+    window.after(API_DRAIN_INTERVAL, drain)
+    return api
 
 
 def run_app():
+    # PLANNER_TIMING=1 prints the startup time; PLANNER_TIMING=eager also builds
+    # every tab up front, for comparison with the default lazy tabs
+    timing = os.environ.get("PLANNER_TIMING")
+    # PLANNER_PROFILE=1 times the hot paths from the start (F12 shows them);
+    # PLANNER_PROFILE=trace.json also writes a trace there on close
+    profile = os.environ.get("PLANNER_PROFILE")
+    if profile:
+        PROFILER.enable()
     window = tk.Tk()
-    data_manager = DataManager()
+    # PLANNER_BACKEND=sqlite moves the data into data.db (migrated from data.json once)
+    data_manager = DataManager(journal=True, backend=os.environ.get("PLANNER_BACKEND", "json"))
+    api = None
     def save_on_close():
-        data_manager.data["priority"] = ui.priority_var.get().strip()
-        data_manager.data["priority_rag"] = ui.priority_rag
-        data_manager.save_data()
+        if api is not None:
+            api.stop()
+        ui.model.set_priority(ui.priority_var.get(), ui.priority_rag)
+        data_manager.close()  # Flushes the write-behind queue
+        if profile and profile.endswith(".json"):
+            print(f"Trace written to {PROFILER.export_trace(profile)}")
         window.destroy()
 
-    ui = PlannerUI(window, data_manager, save_on_close)
+    ui = PlannerUI(window, data_manager, save_on_close, lazy_tabs=timing != "eager")
     ui.build()
+    # PLANNER_API_PORT=8765 serves the scripting API on the loopback interface
+    if os.environ.get("PLANNER_API_PORT"):
+        api = start_api(window, ui, int(os.environ["PLANNER_API_PORT"]))
+    if timing:
+        # The first idle callback runs once the window has been drawn
+        window.after_idle(report_startup, ui)
 
     try:
         window.mainloop()
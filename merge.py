@@ -0,0 +1,172 @@
+"""Three-way merge of planner documents saved by different instances.
+
+base is the document both sides started from (the file as this instance
+last read or wrote it), ours is this instance's data and theirs is what
+another instance has since written. Tasks, history records, timetable
+slots and settings are merged individually, so edits to different tasks
+never conflict. The order of a module's tasks (and of the history) is
+merged the same way, so two instances adding tasks at once end up with
+the same list rather than each keeping, and writing back, its own. When
+both sides changed the same value, ours is kept and the conflict is
+reported.
+"""
+
+MISSING = object()
+# Derived or per-instance keys that are not merged
+SKIP_KEYS = ("stats", "journal_seq", "recurring_due")
+STRUCTURED_KEYS = ("modules", "timetable", "task_history", "pomodoro_sessions")
+
+
+class Merge:
+    def __init__(self):
+        self.conflicts = []
+        # True when the result differs from theirs, so it has to be written back
+        self.local = False
+
+    def pick(self, base, ours, theirs, label=None):
+        """Choose between two edits of one value; returns MISSING for a deletion."""
+        if ours == theirs or theirs == base:
+            return ours
+        if ours == base:
+            return theirs
+        if label is not None:
+            self.conflicts.append(label)
+        return ours
+
+
+def _tasks_by_id(tasks):
+    return {task[2]: (task[0], task[1]) for task in tasks}
+
+def _order(ours, theirs):
+    """Ids in our order, followed by ids only they have, in their order."""
+    seen = set(ours)
+    return list(ours) + [key for key in theirs if key not in seen]
+
+def _interleave(first, second):
+    """Ids in first's order, with ids only second has placed after the id they follow there."""
+    seen, after, anchor = set(first), {}, None
+    for key in second:
+        if key in seen:
+            anchor = key
+        else:
+            after.setdefault(anchor, []).append(key)
+    result = list(after.get(None, ()))
+    for key in first:
+        result.append(key)
+        result.extend(after.get(key, ()))
+    return result
+
+def _sequence(merge, base, ours, theirs, label=None):
+    """Three-way order of the ids of a list, so both instances settle on the same list.
+
+    The order of the ids all three have is picked like any other value;
+    the side whose order is kept places its own new ids, and the other
+    side's new ids go after the id they follow there.
+    """
+    shared = [key for key in base if key in ours and key in theirs]
+    ours_order = [key for key in ours if key in base and key in theirs]
+    theirs_order = [key for key in theirs if key in base and key in ours]
+    if merge.pick(shared, ours_order, theirs_order, label) is theirs_order:
+        return _interleave(theirs, ours)
+    return _interleave(ours, theirs)
+
+
+def _merge_tasks(merge, module, base, ours, theirs):
+    base, ours, theirs = _tasks_by_id(base), _tasks_by_id(ours), _tasks_by_id(theirs)
+    result = []
+    for task_id in _sequence(merge, base, ours, theirs, f"{module}: order"):
+        b, o, t = base.get(task_id, MISSING), ours.get(task_id, MISSING), theirs.get(task_id, MISSING)
+        if MISSING in (b, o, t):
+            # Added or deleted on one side; a deletion against an edit keeps
+            # the edited task
+            value = merge.pick(b, o, t)
+            if value is MISSING and t is not MISSING:
+                value = t
+        else:
+            # Text and status merge separately
+            label = f"{module}: {o[0]}"
+            value = (merge.pick(b[0], o[0], t[0], label), merge.pick(b[1], o[1], t[1], label))
+        if value is not MISSING:
+            result.append((value[0], value[1], task_id))
+    return result
+
+
+def _merge_modules(merge, base, ours, theirs):
+    result = {}
+    for name in _order(ours, theirs):
+        b, o, t = base.get(name), ours.get(name), theirs.get(name)
+        if b is not None and (o is None or t is None):
+            # Deleted on one side: gone unless the other side changed its tasks
+            kept = t if o is None else o
+            if kept is None or _tasks_by_id(kept) == _tasks_by_id(b):
+                continue
+            merge.conflicts.append(f"module {name}")
+            result[name] = [tuple(task) for task in kept]
+            continue
+        result[name] = _merge_tasks(merge, name, b or [], o or [], t or [])
+    return result
+
+
+def _merge_keyed(merge, base, ours, theirs, label):
+    """Merge dicts key by key (timetable slots, recurring rules)."""
+    result = {}
+    for key in _order(ours, theirs):
+        value = merge.pick(base.get(key, MISSING), ours.get(key, MISSING), theirs.get(key, MISSING),
+                           f"{label} {key}")
+        if value is not MISSING:
+            result[key] = value
+    return result
+
+
+def _merge_history(merge, base, ours, theirs):
+    base = {rec["id"]: rec for rec in base}
+    ours_by_id = {rec["id"]: rec for rec in ours}
+    theirs_by_id = {rec["id"]: rec for rec in theirs}
+    result = []
+    # Records have no order of their own, so it is never a conflict
+    for task_id in _sequence(merge, base, ours_by_id, theirs_by_id):
+        b, o, t = base.get(task_id, MISSING), ours_by_id.get(task_id, MISSING), theirs_by_id.get(task_id, MISSING)
+        if MISSING in (o, t) or o == t:
+            value = merge.pick(b, o, t)
+        else:
+            b = b if b is not MISSING else {}
+            value = {key: merge.pick(b.get(key, MISSING), o.get(key, MISSING), t.get(key, MISSING))
+                     for key in _order(o, t)}
+            value = {key: item for key, item in value.items() if item is not MISSING}
+        if value is not MISSING:
+            result.append(value)
+    return result
+
+
+def merge_documents(base, ours, theirs):
+    """Return (merged document, Merge with the conflicts and whether ours contributed)."""
+    merge = Merge()
+    merged = {}
+    for key in _order(ours, theirs):
+        if key in SKIP_KEYS or key in STRUCTURED_KEYS or key == "recurring":
+            continue
+        value = merge.pick(base.get(key, MISSING), ours.get(key, MISSING), theirs.get(key, MISSING), key)
+        if value is not MISSING:
+            merged[key] = value
+    merged["modules"] = _merge_modules(merge, base.get("modules", {}), ours["modules"], theirs["modules"])
+    merged["timetable"] = _merge_keyed(merge, base.get("timetable", {}), ours["timetable"],
+                                       theirs["timetable"], "timetable")
+    if "recurring" in ours or "recurring" in theirs:
+        merged["recurring"] = _merge_keyed(merge, base.get("recurring", {}), ours.get("recurring", {}),
+                                           theirs.get("recurring", {}), "repeating task")
+    merged["task_history"] = _merge_history(merge, base.get("task_history", []), ours["task_history"],
+                                            theirs["task_history"])
+    # Sessions are only ever appended: keep every session either side logged
+    sessions = {tuple(session): session for session in theirs["pomodoro_sessions"]}
+    for session in ours["pomodoro_sessions"]:
+        sessions.setdefault(tuple(session), session)
+    merged["pomodoro_sessions"] = sorted(sessions.values(), key=lambda session: session[0])
+    merge.local = _normalized(merged) != _normalized(theirs)
+    return merged, merge
+
+
+def _normalized(data):
+    # Tasks are tuples in memory and lists once loaded from JSON
+    return ({key: value for key, value in data.items() if key not in SKIP_KEYS and key != "modules"},
+            {name: [tuple(task) for task in tasks] for name, tasks in data["modules"].items()},
+            [tuple(session) for session in data["pomodoro_sessions"]])
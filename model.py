@@ -0,0 +1,296 @@
+import copy
+from datetime import datetime
+from data_manager import create_task_record
+from recurrence import RecurrenceEngine, make_rule, new_rule_id
+from sessions import SessionLog
+from task_model import STATUSES, Status, clock_text, status_code
+from undo import UNDO_LIMIT, UndoStack
+
+DONE = STATUSES[Status.GREEN]
+
+
+def next_status(status):
+    """The status after this one in the RAG cycle."""
+    code = status_code(status)
+    if isinstance(code, Status):
+        return STATUSES[(code + 1) % len(Status)]
+    return STATUSES[0]
+
+def guess_scheduled_time():
+    hour = datetime.now().hour
+    return f"{hour:02d}:00"
+
+def scheduled_or_guess(scheduled_time):
+    """A given scheduled time as "HH:MM" (ValueError if it is not one), or the current hour."""
+    return clock_text(scheduled_time) if scheduled_time else guess_scheduled_time()
+
+
+class PlannerModel:
+    """Planner operations with no Tk dependency.
+
+    PlannerUI delegates every change to this class, and scripts and
+    benchmarks can drive it directly. All changes go through
+    DataManager.apply(), so they are persisted and observed the same way,
+    and each records its inverse on the undo stack.
+    """
+
+    def __init__(self, data_manager, undo_limit=UNDO_LIMIT):
+        self.data_manager = data_manager
+        self.sessions = SessionLog(data_manager)
+        self.undo_stack = UndoStack(data_manager, undo_limit)
+        self.recurrence = RecurrenceEngine(data_manager)
+
+    @property
+    def data(self):
+        return self.data_manager.data
+
+    # === Modules ===
+    def module_names(self):
+        return list(self.data["modules"])
+
+    def tasks(self, module):
+        """The live (text, status, id) list for module."""
+        return self.data["modules"][module]
+
+    def add_module(self, name):
+        name = name.strip()
+        if not name:
+            raise ValueError("Please enter a module name!")
+        if name in self.data["modules"]:
+            raise ValueError(f"Module '{name}' already exists!")
+        self._change(f"add module '{name}'", [("module_added", {"name": name})],
+                     [("module_deleted", {"name": name})])
+        return name
+
+    def delete_module(self, name):
+        if name == "Home":
+            # The Home tab is built from it on every start
+            raise ValueError("The Home module cannot be deleted!")
+        tasks = self._positions(name, None)
+        self._change(f"delete module '{name}'", [("module_deleted", {"name": name})],
+                     [("module_added", {"name": name}), ("tasks_restored", {"module": name, "tasks": tasks})],
+                     len(tasks) + 1)
+
+    # === Tasks ===
+    def add_task(self, module, text, scheduled_time=None):
+        """Add a task and its history record; returns the task id."""
+        text = text.strip()
+        if not text:
+            raise ValueError("Please enter a task!")
+        record = create_task_record(text, module, scheduled_or_guess(scheduled_time))
+        self._change("add task",
+                     [("task_added", {"module": module, "text": text, "status": STATUSES[0], "record": record})],
+                     [("tasks_removed", {"module": module, "task_ids": [record["id"]],
+                                         "created_at": [record["created_at"]]})])
+        return record["id"]
+
+    def delete_task(self, module, index):
+        tasks = self.tasks(module)
+        if 0 <= index < len(tasks):
+            text, status, task_id = tasks[index]
+            self._change("delete task",
+                         [("task_deleted", {"module": module, "task_id": task_id, "index": index})],
+                         [("tasks_restored", {"module": module, "tasks": [[index, text, status, task_id]]})])
+
+    def rename_task(self, module, index, text):
+        text = text.strip()
+        if not text:
+            raise ValueError("Please enter a task!")
+        tasks = self.tasks(module)
+        if 0 <= index < len(tasks) and tasks[index][0] != text:
+            old_text, _, task_id = tasks[index]
+            self._change("rename task",
+                         [("task_renamed", {"module": module, "task_id": task_id, "index": index, "text": text})],
+                         [("task_renamed", {"module": module, "task_id": task_id, "text": old_text})])
+
+    def set_status(self, module, index, status):
+        tasks = self.tasks(module)
+        if not 0 <= index < len(tasks):
+            return
+        current_status, task_id = tasks[index][1], tasks[index][2]
+        # If turned green, log completion time
+        completed_at = None
+        if status == DONE and current_status != DONE:
+            completed_at = datetime.now().isoformat()
+        self._change("change status",
+                     [("status_changed", {"module": module, "task_id": task_id, "index": index,
+                                          "status": status, "completed_at": completed_at})],
+                     [self._status_inverse(module, [tasks[index]], status, completed_at)])
+
+    def cycle_status(self, module, index):
+        """Move a task to its next RAG status; returns the new status."""
+        tasks = self.tasks(module)
+        if not 0 <= index < len(tasks):
+            return None
+        status = next_status(tasks[index][1])
+        self.set_status(module, index, status)
+        return status
+
+    # === Bulk changes: one operation however many tasks they touch ===
+    def add_tasks(self, module, lines, scheduled_time=None):
+        """Add a task per non-blank line; returns the new ids."""
+        scheduled_time = scheduled_or_guess(scheduled_time)
+        tasks = []
+        for line in lines:
+            text = line.strip()
+            if text:
+                tasks.append((text, STATUSES[0], create_task_record(text, module, scheduled_time)))
+        if tasks:
+            self._change(f"add {len(tasks)} tasks", [("tasks_added", {"module": module, "tasks": tasks})],
+                         [("tasks_removed", {"module": module, "task_ids": [record["id"] for _, _, record in tasks],
+                                             "created_at": [record["created_at"] for _, _, record in tasks]})],
+                         len(tasks))
+        return [record["id"] for _, _, record in tasks]
+
+    def delete_tasks(self, module, task_ids):
+        if not task_ids:
+            return
+        tasks = self._positions(module, task_ids)
+        self._change(f"delete {len(tasks)} tasks", [("tasks_deleted", {"module": module, "task_ids": list(task_ids)})],
+                     [("tasks_restored", {"module": module, "tasks": tasks})], len(tasks))
+
+    def set_statuses(self, module, task_ids, status):
+        if not task_ids:
+            return
+        completed_at = datetime.now().isoformat() if status == DONE else None
+        selected = set(task_ids)
+        touched = [task for task in self.tasks(module) if task[2] in selected]
+        self._change(f"change {len(touched)} statuses",
+                     [("statuses_changed", {"module": module, "task_ids": list(task_ids),
+                                            "status": status, "completed_at": completed_at})],
+                     [self._status_inverse(module, touched, status, completed_at)], len(touched))
+
+    def move_tasks(self, module, target, task_ids):
+        if target not in self.data["modules"]:
+            raise ValueError(f"Module '{target}' does not exist!")
+        if target == module or not task_ids:
+            return
+        tasks = self._positions(module, task_ids)
+        self._change(f"move {len(tasks)} tasks to '{target}'",
+                     [("tasks_moved", {"module": module, "target": target, "task_ids": list(task_ids)})],
+                     [("tasks_deleted", {"module": target, "task_ids": list(task_ids)}),
+                      ("tasks_restored", {"module": module, "tasks": tasks})], len(tasks))
+
+    # === Recurring tasks ===
+    def rules(self, module=None):
+        """(rule id, rule) for the recurring tasks of module, or of every module."""
+        return [(rule_id, rule) for rule_id, rule in self.data["recurring"].items()
+                if module is None or rule["module"] == module]
+
+    def add_rule(self, module, text, kind, days=None, interval=None, start=None, scheduled_time=None):
+        """Repeat text in module; returns the rule id. Tasks appear as they fall due."""
+        rule = make_rule(module, text, kind, days, interval, start, scheduled_or_guess(scheduled_time))
+        rule_id = new_rule_id()
+        self._change(f"repeat '{rule['text']}'", [("rule_added", {"rule_id": rule_id, "rule": rule})],
+                     [("rule_deleted", {"rule_id": rule_id})])
+        return rule_id
+
+    def delete_rule(self, rule_id):
+        """Stop repeating; tasks already created stay."""
+        rule = self.data["recurring"].get(rule_id)
+        if rule is None:
+            return
+        self._change(f"stop repeating '{rule['text']}'", [("rule_deleted", {"rule_id": rule_id})],
+                     [("rule_added", {"rule_id": rule_id, "rule": copy.deepcopy(rule)})])
+
+    def generate_recurring(self, today=None):
+        """Add the recurring tasks that are due; returns the modules that got some."""
+        return self.recurrence.generate(today)
+
+    # === Undo ===
+    def _change(self, label, forward, inverse, size=1):
+        """Apply forward operations and record how to reverse them."""
+        for op, record in forward:
+            self.data_manager.apply(op, **record)
+        self.undo_stack.push(label, forward, inverse, size)
+
+    def _positions(self, module, task_ids):
+        """[position, text, status, id] for the given tasks (all if None), for tasks_restored."""
+        selected = None if task_ids is None else set(task_ids)
+        return [[position, text, status, task_id]
+                for position, (text, status, task_id) in enumerate(self.data["modules"].get(module, []))
+                if selected is None or task_id in selected]
+
+    def _status_inverse(self, module, tasks, status, completed_at):
+        entries, cleared = [], []
+        for _, current_status, task_id in tasks:
+            record = self.task_record(task_id)
+            entries.append([task_id, current_status, record["completed_at"] if record is not None else None])
+            # Completions counted by the stats, to take back off on undo
+            if completed_at and current_status != status:
+                cleared.append(completed_at)
+        return ("statuses_restored", {"module": module, "tasks": entries, "cleared": cleared})
+
+    def undo(self):
+        """Reverse the last change; returns its label or None."""
+        return self.undo_stack.undo()
+
+    def redo(self):
+        return self.undo_stack.redo()
+
+    def task_record(self, task_id):
+        return self.data_manager.tasks.records.get(task_id)
+
+    def find_task(self, task_id):
+        """Return (module, index) of a task, or None."""
+        record = self.task_record(task_id)
+        modules = [record["module"]] if record is not None else list(self.data["modules"])
+        for module in modules:
+            for index, task in enumerate(self.data["modules"].get(module, [])):
+                if task.id == task_id:
+                    return module, index
+        return None
+
+    def open_tasks(self):
+        """(module, text, id) for every task not yet completed."""
+        return [(module, task.text, task.id) for module, tasks in self.data["modules"].items()
+                for task in tasks if task.status != Status.GREEN]
+
+    # === Timetable ===
+    def timetable(self):
+        return self.data["timetable"]
+
+    def update_timetable(self, entries):
+        """Save the slots in entries that differ from the stored timetable."""
+        timetable = self.timetable()
+        slots = {key: text.strip() for key, text in entries.items() if text.strip() != timetable.get(key, "")}
+        if slots:
+            self._change("edit timetable", [("timetable_changed", {"slots": slots})],
+                         [("timetable_changed", {"slots": {key: timetable.get(key, "") for key in slots}})],
+                         len(slots))
+        return slots
+
+    def day_timetable(self, day):
+        """The timetable for day (a date): the template with that day's own slots over it."""
+        return {**self.timetable(), **self.data_manager.days.day(day)}
+
+    def has_day(self, day):
+        """Whether day has any slot of its own rather than only the template."""
+        return self.data_manager.days.has_day(day)
+
+    def update_day(self, day, entries):
+        """Save the slots in entries that differ from day's timetable, as that day's own."""
+        template, saved = self.timetable(), self.data_manager.days.day(day)
+        current = {**template, **saved}
+        # A slot set back to the template's text follows the template again
+        slots = {key: (None if text.strip() == template.get(key, "") else text.strip())
+                 for key, text in entries.items() if text.strip() != current.get(key, "")}
+        if slots:
+            iso = day.isoformat()
+            self._change(f"edit timetable for {iso}", [("day_changed", {"day": iso, "slots": slots})],
+                         [("day_changed", {"day": iso, "slots": {key: saved.get(key) for key in slots}})],
+                         len(slots))
+        return slots
+
+    # === History ===
+    def history(self, module=None, since=None, until=None, completed=None):
+        return self.data_manager.query_history(module, since, until, completed)
+
+    # === Pomodoro ===
+    def log_session(self, kind, start, end, task_id=None):
+        """Record a finished work or break interval (epoch seconds)."""
+        self.data_manager.apply("session_logged", session=[round(start), round(end), kind, task_id])
+
+    # === Settings ===
+    def set_priority(self, text, rag):
+        self.data_manager.apply("settings_changed", values={"priority": text.strip(), "priority_rag": rag})
@@ -0,0 +1,136 @@
+"""Open tasks from every module, most pressing first, kept in a min-heap.
+
+A task's key is (rank, due, created). rank puts 🔴 before 🟡 before 🔘,
+and 🟢 tasks are left out. due is when the task is for, in seconds
+since EPOCH: its scheduled time on the day it was added (or its "due"
+day), or a day after it was added if it has no time. So overdue tasks
+come first, then the ones due soonest, and an unscheduled task rises as
+it ages. The key does not depend on the current time, so it never has
+to be recomputed.
+
+Heap entries are (key, task id), and current maps each task to its live
+key, as in ReminderQueue. Adding a task or changing its status pushes
+one entry, and deleting one only forgets its key. Stale entries are
+skipped when read, and the heap is rebuilt once they outnumber the live
+ones. top() walks only the first few levels of the heap, so showing the
+top N costs O(N log N) however many tasks there are.
+"""
+import heapq
+from datetime import date
+from task_model import EPOCH_ORDINAL, Status, parse_clock, status_code
+
+ORDER = (Status.RED, Status.AMBER, Status.GREY)
+RANKS = {status: rank for rank, status in enumerate(ORDER)}
+# How long after it was added a task with no scheduled time counts as due
+UNSCHEDULED_DUE = 24 * 60 * 60
+NEXT_UP_COUNT = 5
+
+
+def due_time(rec):
+    """Seconds since EPOCH at which the task is due, in local wall-clock time."""
+    created = rec.created or 0.0
+    clock = parse_clock(rec.scheduled_time)
+    if clock is None:
+        return created + UNSCHEDULED_DUE
+    moment = clock[0] * 3600 + clock[1] * 60
+    # "due" (set on recurring occurrences) is one of the keys kept in extra
+    due = rec.extra.get("due") if rec.extra else None
+    day = date.fromisoformat(due).toordinal() - EPOCH_ORDINAL if due else created // 86400
+    return day * 86400 + moment
+
+
+class NextUpQueue:
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self.heap = []
+        self.current = {}
+        self.rebuild()
+        data_manager.listeners.append(self.handle_data_changed)
+
+    def rebuild(self):
+        records = self.data_manager.tasks.records
+        self.current = {}
+        for tasks in self.data_manager.data["modules"].values():
+            for task in tasks:
+                rank, rec = RANKS.get(task.status), records.get(task.id)
+                if rank is not None and rec is not None:
+                    self.current[task.id] = (rank, due_time(rec), rec.created or 0.0)
+        self._compact()
+
+    def _compact(self):
+        self.heap = [(key, task_id) for task_id, key in self.current.items()]
+        heapq.heapify(self.heap)
+
+    def _set(self, task_id, status):
+        rank, rec = RANKS.get(status_code(status)), self.data_manager.tasks.records.get(task_id)
+        if rank is None or rec is None:
+            self.current.pop(task_id, None)
+            return
+        key = (rank, due_time(rec), rec.created or 0.0)
+        if self.current.get(task_id) != key:
+            self.current[task_id] = key
+            heapq.heappush(self.heap, (key, task_id))
+
+    def _forget(self, task_ids):
+        for task_id in task_ids:
+            self.current.pop(task_id, None)
+
+    # === Keeping up with changes ===
+    def handle_data_changed(self, op, record):
+        if op == "task_added":
+            self._set(record["record"]["id"], record["status"])
+        elif op == "tasks_added":
+            for _, status, rec in record["tasks"]:
+                self._set(rec["id"], status)
+        elif op == "status_changed":
+            self._set(record["task_id"], record["status"])
+        elif op == "statuses_changed":
+            for task_id in record["task_ids"]:
+                self._set(task_id, record["status"])
+        elif op == "statuses_restored":
+            for task_id, status, _ in record["tasks"]:
+                self._set(task_id, status)
+        elif op == "tasks_restored":
+            for _, _, status, task_id in record["tasks"]:
+                self._set(task_id, status)
+        elif op == "task_deleted":
+            self._forget([record["task_id"]])
+        elif op in ("tasks_deleted", "tasks_removed"):
+            # A move deletes from the target before restoring to the source
+            self._forget(record["task_ids"])
+        elif op == "module_deleted":
+            # Rare enough to scan for; records still name the module their task was in.
+            # A task whose record has gone could not be shown anyway.
+            records = self.data_manager.tasks.records
+            self._forget([task_id for task_id in self.current
+                          if records.get(task_id) is None or records[task_id].module == record["name"]])
+        elif op == "data_reloaded":
+            self.rebuild()
+            return
+        if len(self.heap) > 2 * len(self.current) + 64:
+            self._compact()
+
+    # === Reading ===
+    def _live(self, entry):
+        """The entry's record, or None if the entry is stale."""
+        key, task_id = entry
+        return self.data_manager.tasks.records.get(task_id) if self.current.get(task_id) == key else None
+
+    def top(self, count=NEXT_UP_COUNT):
+        """The count most pressing open tasks as (status, TaskRecord), most pressing first."""
+        heap = self.heap
+        while heap and self._live(heap[0]) is None:
+            heapq.heappop(heap)
+        found, taken, frontier = [], set(), [(heap[0], 0)] if heap else []
+        # Best-first walk of the heap; only the children of a taken entry can be next
+        while frontier and len(found) < count:
+            entry, position = heapq.heappop(frontier)
+            rec = self._live(entry)
+            # A task deleted and restored with the same key has a second, identical entry
+            if rec is not None and rec.id not in taken:
+                taken.add(rec.id)
+                found.append((ORDER[entry[0][0]], rec))
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return found
@@ -1,5 +1,100 @@
 import tkinter as tk
+from tkinter import ttk
 import math
+import time
+from profiling import timed
+
+
+class ManualClock:
+    """A clock that only moves when told to; lets tests run hours of cycles instantly."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class PomodoroCycle:
+    """Work/break sequence driven by deadlines on a monotonic clock, without Tk.
+
+    Time remaining is always worked out from the current phase's deadline,
+    so late ticks never add up to drift. After a stall, every phase that
+    should have finished is closed at its own deadline and the next one
+    starts from there.
+    """
+
+    def __init__(self, work_min, short_break_min, long_break_min, clock=time.monotonic, on_phase_end=None):
+        self.work_min = work_min
+        self.short_break_min = short_break_min
+        self.long_break_min = long_break_min
+        self.clock = clock
+        # Called with (kind, started, ended) in clock time for each finished phase
+        self.on_phase_end = on_phase_end
+        self.reset()
+
+    def reset(self):
+        self.reps = 0
+        self.kind = None
+        self.started = None
+        self.deadline = None
+        # Seconds left in the current phase while paused, else None
+        self.paused_left = None
+
+    @property
+    def running(self):
+        return self.deadline is not None
+
+    @property
+    def paused(self):
+        return self.paused_left is not None
+
+    def _begin_phase(self, start):
+        self.reps += 1
+        if self.reps % 8 == 0:
+            self.kind, minutes = "long_break", self.long_break_min
+        elif self.reps % 2 == 0:
+            self.kind, minutes = "short_break", self.short_break_min
+        else:
+            self.kind, minutes = "work", self.work_min
+        self.started = start
+        self.deadline = start + minutes * 60
+
+    def start(self):
+        if not self.running:
+            self._begin_phase(self.clock())
+
+    def pause(self):
+        """Stop the current phase's countdown; returns the seconds left in it."""
+        if self.running and not self.paused:
+            self.paused_left = self.advance()
+        return self.paused_left
+
+    def resume(self):
+        if self.paused:
+            now = self.clock()
+            # The phase keeps its length: the pause moves its start as well as its deadline
+            self.started += now - (self.deadline - self.paused_left)
+            self.deadline = now + self.paused_left
+            self.paused_left = None
+
+    def advance(self):
+        """Close any phases whose deadline has passed; return seconds left in the current one."""
+        if self.paused:
+            return self.paused_left
+        now = self.clock()
+        while now >= self.deadline:
+            if self.on_phase_end is not None:
+                self.on_phase_end(self.kind, self.started, self.deadline)
+            self._begin_phase(self.deadline)  # Auto-start next phase
+        return self.deadline - now
+
+    def completed_work_sessions(self):
+        return self.reps // 2
+
 
 class PomodoroTimer:
     PINK = "#e2979c"
@@ -11,15 +106,24 @@ class PomodoroTimer:
     DEFAULT_SHORT_BREAK_MIN = 5
     DEFAULT_LONG_BREAK_MIN = 15
 
-    def __init__(self, parent):
+    NO_TASK = "(no task)"
+
+    def __init__(self, parent, model=None, clock=time.monotonic):
         self.parent = parent
-        self.reps = 0
+        self.model = model
+        self.clock = clock
         self.timer = None
         self.is_running = False
+        self.shown_text = None
+        self.shown_kind = None
 
         self.work_min = self.DEFAULT_WORK_MIN
         self.short_break_min = self.DEFAULT_SHORT_BREAK_MIN
         self.long_break_min = self.DEFAULT_LONG_BREAK_MIN
+        self.cycle = PomodoroCycle(self.work_min, self.short_break_min, self.long_break_min, clock,
+                                   on_phase_end=self.handle_phase_end)
+        # Open tasks offered in the task picker, as (label, task id)
+        self.task_choices = []
 
         self.setup_window()
 
@@ -30,6 +134,7 @@ class PomodoroTimer:
         self.window.resizable(False, False)
         self.window.grab_set()  # Makes it modal (optional)
         self.window.focus_force()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
 
         config_frame = tk.Frame(self.window, bg="black")
         config_frame.pack(pady=10)
@@ -60,6 +165,17 @@ class PomodoroTimer:
         )
         apply_btn.grid(row=0, column=6, padx=10)
 
+        if self.model is not None:
+            task_frame = tk.Frame(self.window, bg="black")
+            task_frame.pack(pady=(5, 0), fill="x")
+            tk.Label(task_frame, text="Task:", fg=self.GREEN, bg="black",
+                     font=("Helvetica", 10)).pack(side="left", padx=5)
+            self.task_choices = [(f"{module}: {text}", task_id) for module, text, task_id in self.model.open_tasks()]
+            self.task_picker = ttk.Combobox(task_frame, state="readonly", font=("Helvetica", 10),
+                                            values=[self.NO_TASK] + [label for label, _ in self.task_choices])
+            self.task_picker.current(0)
+            self.task_picker.pack(side="left", fill="x", expand=True, padx=5)
+
         # === Main Timer UI ===
         self.title_label = tk.Label(
             self.window,
@@ -100,6 +216,18 @@ class PomodoroTimer:
         )
         self.start_button.pack(side="left", padx=5)
 
+        self.pause_button = tk.Button(
+            btn_frame,
+            text="⏸ Pause",
+            command=self.toggle_pause,
+            bg=self.YELLOW,
+            fg="black",
+            font=("Helvetica", 10, "bold"),
+            relief="flat",
+            padx=12
+        )
+        self.pause_button.pack(side="left", padx=5)
+
         self.reset_button = tk.Button(
             btn_frame,
             text="⏹ Reset",
@@ -133,9 +261,9 @@ class PomodoroTimer:
             if work <= 0 or short_break <= 0 or long_break <= 0:
                 raise ValueError
 
-            self.work_min = work
-            self.short_break_min = short_break
-            self.long_break_min = long_break
+            self.work_min = self.cycle.work_min = work
+            self.short_break_min = self.cycle.short_break_min = short_break
+            self.long_break_min = self.cycle.long_break_min = long_break
 
             self.title_label.config(text="Settings Applied!", fg=self.GREEN)
             self.window.after(1500, lambda: self.title_label.config(text="Pomodoro"))
@@ -148,43 +276,77 @@ class PomodoroTimer:
             return
         self.is_running = True
         self.start_button.config(state="disabled")
+        self.cycle.start()
+        self.tick()
 
-        work_sec = self.work_min * 60
-        short_break_sec = self.short_break_min * 60
-        long_break_sec = self.long_break_min * 60
-
-        self.reps += 1
-
-        if self.reps % 8 == 0:
-            self.count_down(long_break_sec)
-            self.title_label.config(text="Break", fg=self.RED)
-        elif self.reps % 2 == 0:
-            self.count_down(short_break_sec)
-            self.title_label.config(text="Break", fg=self.PINK)
+    def toggle_pause(self):
+        if not self.is_running:
+            return
+        if self.cycle.paused:
+            self.cycle.resume()
+            self.pause_button.config(text="⏸ Pause")
+            self.tick()
         else:
-            self.count_down(work_sec)
-            self.title_label.config(text="Work", fg=self.GREEN)
+            self.cycle.pause()
+            if self.timer:
+                self.window.after_cancel(self.timer)
+                self.timer = None
+            self.pause_button.config(text="▶ Resume")
 
     def reset_timer(self):
         self.is_running = False
         self.start_button.config(state="normal")
+        self.pause_button.config(text="⏸ Pause")
         if self.timer:
             self.window.after_cancel(self.timer)
+            self.timer = None
+        self.cycle.reset()
+        self.shown_text = self.shown_kind = None
         self.canvas.itemconfig(self.timer_text, text="00:00")
         self.title_label.config(text="Pomodoro", fg=self.GREEN)
         self.check_marks.config(text="")
-        self.reps = 0
 
-    def count_down(self, count):
-        count_min = count // 60
-        count_sec = count % 60
-        self.canvas.itemconfig(self.timer_text, text=f"{count_min:02d}:{count_sec:02d}")
+    def selected_task_id(self):
+        if self.model is None or self.task_picker.current() <= 0:
+            return None
+        return self.task_choices[self.task_picker.current() - 1][1]
 
-        if count > 0:
-            self.timer = self.window.after(1000, self.count_down, count - 1)
-        else:
-            self.is_running = False
-            self.start_button.config(state="normal")
-            self.start_timer()  # Auto-start next phase
-            marks = "✔" * (self.reps // 2)
-            self.check_marks.config(text=marks)
+    def handle_phase_end(self, kind, started, ended):
+        if self.model is None:
+            return
+        # Convert from the timer's clock to wall-clock epoch seconds
+        offset = time.time() - self.clock()
+        task_id = self.selected_task_id() if kind == "work" else None
+        self.model.log_session(kind, started + offset, ended + offset, task_id)
+
+    def close(self):
+        if self.timer:
+            self.window.after_cancel(self.timer)
+            self.timer = None
+        self.window.destroy()
+
+    @timed("pomodoro.tick")
+    def tick(self):
+        remaining = self.cycle.advance()
+        # Only touch the widgets when what they show has changed and is visible
+        if self.window.winfo_viewable():
+            self.show(math.ceil(remaining))
+
+        # Wake just after the next whole second before the deadline
+        delay = remaining % 1 or 1
+        self.timer = self.window.after(int(delay * 1000) + 1, self.tick)
+
+    def show(self, seconds):
+        text = f"{seconds // 60:02d}:{seconds % 60:02d}"
+        if text != self.shown_text:
+            self.canvas.itemconfig(self.timer_text, text=text)
+            self.shown_text = text
+        if self.cycle.kind != self.shown_kind:
+            if self.cycle.kind == "long_break":
+                self.title_label.config(text="Break", fg=self.RED)
+            elif self.cycle.kind == "short_break":
+                self.title_label.config(text="Break", fg=self.PINK)
+            else:
+                self.title_label.config(text="Work", fg=self.GREEN)
+            self.check_marks.config(text="✔" * self.cycle.completed_work_sessions())
+            self.shown_kind = self.cycle.kind
@@ -0,0 +1,87 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from profiling import PROFILER
+from utils import *
+
+REFRESH_MS = 500
+COLUMNS = (("count", "Count", "{:d}"), ("p50_ms", "p50 ms", "{:.2f}"), ("p95_ms", "p95 ms", "{:.2f}"),
+           ("max_ms", "Max ms", "{:.2f}"), ("total_ms", "Total ms", "{:.0f}"))
+
+
+class ProfilerOverlay:
+    """A small always-on-top window with live timings of the instrumented operations.
+
+    Opening it turns the profiler on; closing it puts it back as it was, so
+    it stays on if PLANNER_PROFILE started it.
+    """
+
+    def __init__(self, parent, on_close=None):
+        self.on_close = on_close
+        self.was_enabled = PROFILER.enabled
+        PROFILER.enable()
+        self.after_id = None
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Profiler")
+        self.window.config(bg=BG_COLOUR, padx=10, pady=10)
+        self.window.attributes("-topmost", True)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.bind("<F12>", lambda event: self.close())
+
+        self.table = ttk.Treeview(self.window, columns=[key for key, _, _ in COLUMNS], height=12)
+        self.table.heading("#0", text="Operation")
+        self.table.column("#0", width=160)
+        for key, title, _ in COLUMNS:
+            self.table.heading(key, text=title)
+            self.table.column(key, width=75, anchor="e")
+        self.table.pack(fill="both", expand=True)
+
+        buttons = tk.Frame(self.window, bg=BG_COLOUR)
+        buttons.pack(fill="x", pady=(8, 0))
+        button_options = dict(bg=ACCENT, fg="white", font=FONT, relief="flat")
+        self.pause_button = tk.Button(buttons, text="Pause", command=self.toggle_recording, **button_options)
+        self.pause_button.pack(side="left", padx=2)
+        tk.Button(buttons, text="Reset", command=PROFILER.reset, **button_options).pack(side="left", padx=2)
+        tk.Button(buttons, text="Export trace…", command=self.export_trace,
+                  **button_options).pack(side="right", padx=2)
+
+        self.refresh()
+
+    def refresh(self):
+        summary = PROFILER.summary()
+        self.table.delete(*self.table.get_children())
+        for name, row in summary.items():
+            self.table.insert("", "end", text=name,
+                              values=[form.format(row[key]) for key, _, form in COLUMNS])
+        self.after_id = self.window.after(REFRESH_MS, self.refresh)
+
+    def toggle_recording(self):
+        if PROFILER.enabled:
+            PROFILER.disable()
+            self.pause_button.config(text="Record")
+        else:
+            PROFILER.enable()
+            self.pause_button.config(text="Pause")
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window, title="Export trace", defaultextension=".json",
+            initialfile="planner-trace.json", filetypes=[("Trace events", "*.json")])
+        if not path:
+            return
+        try:
+            PROFILER.export_trace(path)
+        except OSError as exception:
+            messagebox.showerror("Export trace", f"Could not write the trace: {exception}", parent=self.window)
+            return
+        messagebox.showinfo("Export trace", f"Saved {len(PROFILER.spans)} spans to {path}.\n"
+                            "Open it in chrome://tracing or ui.perfetto.dev.", parent=self.window)
+
+    def close(self):
+        if self.after_id is not None:
+            self.window.after_cancel(self.after_id)
+            self.after_id = None
+        PROFILER.enabled = self.was_enabled
+        self.window.destroy()
+        if self.on_close is not None:
+            self.on_close()
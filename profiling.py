@@ -0,0 +1,154 @@
+"""Opt-in timing of the planner's hot paths.
+
+Functions decorated with @timed(name), and blocks run under span(name),
+are timed only while PROFILER.enabled is set. When it is not set, a
+decorated call costs one flag check and span() returns a shared no-op
+context. So the hooks can stay in the code permanently.
+
+For each operation the profiler keeps a count, a total, a max and a
+histogram with four buckets per doubling (so p50 and p95 are read to
+within about 19%). It also keeps the most recent spans. export_trace()
+writes them in the Chrome trace-event format, which chrome://tracing and
+https://ui.perfetto.dev open directly.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+# Bucket upper bounds in nanoseconds, from 1 µs to about 4.6 minutes
+BUCKET_BOUNDS = [int(1000 * 2 ** (step / 4)) for step in range(113)]
+TRACE_LIMIT = 200_000
+
+_OFF = nullcontext()
+
+
+class Histogram:
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, duration_ns):
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.buckets[bisect_left(BUCKET_BOUNDS, duration_ns)] += 1
+
+    def percentile(self, fraction):
+        """The upper bound of the bucket holding that fraction of the samples, in ns."""
+        if not self.count:
+            return 0
+        wanted, seen = fraction * self.count, 0
+        for position, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted and count:
+                bound = BUCKET_BOUNDS[position] if position < len(BUCKET_BOUNDS) else self.max_ns
+                return min(bound, self.max_ns)
+        return self.max_ns
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            # (name, start ns, duration ns, thread id) of the latest spans
+            self.spans = deque(maxlen=TRACE_LIMIT)
+            self.thread_names = {}
+            self.origin_ns = time.perf_counter_ns()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def record(self, name, start_ns, end_ns):
+        thread = threading.current_thread()
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(end_ns - start_ns)
+            self.spans.append((name, start_ns, end_ns - start_ns, thread.ident))
+            self.thread_names[thread.ident] = thread.name
+
+    def summary(self):
+        """{name: {count, total_ms, p50_ms, p95_ms, max_ms}}, slowest total first."""
+        with self._lock:
+            histograms = sorted(self.histograms.items(), key=lambda item: -item[1].total_ns)
+            return {name: {"count": histogram.count,
+                           "total_ms": histogram.total_ns / 1e6,
+                           "p50_ms": histogram.percentile(0.5) / 1e6,
+                           "p95_ms": histogram.percentile(0.95) / 1e6,
+                           "max_ms": histogram.max_ns / 1e6}
+                    for name, histogram in histograms}
+
+    def trace_events(self):
+        with self._lock:
+            spans, thread_names, origin = list(self.spans), dict(self.thread_names), self.origin_ns
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in thread_names.items()]
+        # Complete ("X") events; timestamps are microseconds since the last reset
+        events += [{"name": name, "cat": name.split(".")[0], "ph": "X", "pid": pid, "tid": tid,
+                    "ts": (start - origin) / 1000, "dur": duration / 1000}
+                   for name, start, duration, tid in spans]
+        return events
+
+    def export_trace(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, file)
+        return path
+
+
+PROFILER = Profiler()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        PROFILER.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+def span(name):
+    """Time a with-block as name, while the profiler is on."""
+    return _Span(name) if PROFILER.enabled else _OFF
+
+
+def timed(name):
+    """Decorator timing every call as name, while the profiler is on."""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                PROFILER.record(name, start, time.perf_counter_ns())
+        return wrapper
+    return decorate
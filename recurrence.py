@@ -0,0 +1,126 @@
+"""Recurring tasks: rules that add a fresh task each time they come round.
+
+Rules live in data["recurring"] (id -> rule) and data["recurring_due"], a
+min-heap of [next_due, id] that is saved in heap order. Generating
+occurrences only pops the rules at the top of the heap that are due, so
+the cost at startup and on each new day does not depend on how many rules
+exist. Entries for deleted or rescheduled rules stay in the heap until
+they reach the top and are then dropped.
+
+Occurrences are created lazily, only for dates inside the window (today
+plus lookahead days). After time away, a rule with nothing in the window
+gets just its latest missed occurrence, not one per day missed.
+"""
+import uuid
+from datetime import date, timedelta
+from data_manager import create_task_record
+
+KINDS = ("daily", "weekdays", "weekly", "every")
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+LOOKAHEAD_DAYS = 0
+NEW_STATUS = "🔴"
+
+
+def new_rule_id():
+    return f"rule_{uuid.uuid4().hex[:12]}"
+
+def describe(rule):
+    if rule["kind"] == "weekly":
+        return "Weekly on " + ", ".join(DAY_NAMES[day] for day in rule["days"])
+    if rule["kind"] == "every":
+        return f"Every {rule['interval']} days"
+    return rule["kind"].capitalize()
+
+def make_rule(module, text, kind, days=None, interval=None, start=None, scheduled_time=None):
+    """Validate a rule and set its first due date; raises ValueError."""
+    text = text.strip()
+    if not text:
+        raise ValueError("Please enter a task!")
+    if kind not in KINDS:
+        raise ValueError(f"Repeat must be one of {', '.join(KINDS)}")
+    start = start or date.today()
+    rule = {"module": module, "text": text, "kind": kind, "start": start.isoformat(),
+            "scheduled_time": scheduled_time}
+    if kind == "weekly":
+        days = sorted(set(days or []))
+        if not days or not all(0 <= day <= 6 for day in days):
+            raise ValueError("Pick at least one day of the week")
+        rule["days"] = days
+    elif kind == "every":
+        if not interval or int(interval) < 1:
+            raise ValueError("Repeat every N days needs N of 1 or more")
+        rule["interval"] = int(interval)
+    rule["next_due"] = next_occurrence(rule, start - timedelta(days=1)).isoformat()
+    return rule
+
+def next_occurrence(rule, after):
+    """The first date the rule falls on strictly after the date after."""
+    day = after + timedelta(days=1)
+    kind = rule["kind"]
+    if kind == "daily":
+        return day
+    if kind == "every":
+        start = date.fromisoformat(rule["start"])
+        if day <= start:
+            return start
+        steps = -(-(day - start).days // rule["interval"])
+        return start + timedelta(days=steps * rule["interval"])
+    allowed = range(5) if kind == "weekdays" else rule["days"]
+    while day.weekday() not in allowed:
+        day += timedelta(days=1)
+    return day
+
+
+class RecurrenceEngine:
+    def __init__(self, data_manager, lookahead=LOOKAHEAD_DAYS):
+        self.data_manager = data_manager
+        self.lookahead = lookahead
+
+    def generate(self, today=None):
+        """Add the occurrences due up to today + lookahead; returns the modules that got tasks."""
+        data_manager = self.data_manager
+        today = today or date.today()
+        through = (today + timedelta(days=self.lookahead)).isoformat()
+        with data_manager.lock:
+            rules, heap = data_manager.data["recurring"], data_manager.data["recurring_due"]
+            if not heap or heap[0][0] > through:
+                return set()
+            # Walk only the due part of the heap; _rules_advanced pops it
+            due, stack = [], [0]
+            while stack:
+                position = stack.pop()
+                if position < len(heap) and heap[position][0] <= through:
+                    due.append(heap[position])
+                    stack += [2 * position + 1, 2 * position + 2]
+            tasks, next_due = {}, {}
+            for entry_due, rule_id in due:
+                rule = rules.get(rule_id)
+                if rule is None or rule["next_due"] != entry_due or rule_id in next_due:
+                    continue
+                for day in self._occurrences(rule, date.fromisoformat(entry_due), today, through):
+                    record = create_task_record(rule["text"], rule["module"], rule["scheduled_time"])
+                    record["rule"] = rule_id
+                    record["due"] = day.isoformat()
+                    tasks.setdefault(rule["module"], []).append((rule["text"], NEW_STATUS, record))
+                next_due[rule_id] = next_occurrence(rule, date.fromisoformat(through)).isoformat()
+            with data_manager.batch():
+                for module, module_tasks in tasks.items():
+                    if module not in data_manager.data["modules"]:
+                        data_manager.apply("module_added", name=module)
+                    data_manager.apply("tasks_added", module=module, tasks=module_tasks)
+                data_manager.apply("rules_advanced", next_due=next_due, through=through)
+        return set(tasks)
+
+    @staticmethod
+    def _occurrences(rule, day, today, through):
+        """Dates to create: each one in the window, or else the latest one missed before today."""
+        through = date.fromisoformat(through)
+        missed = None
+        while day < today:
+            missed = day
+            day = next_occurrence(rule, day)
+        days = []
+        while day <= through:
+            days.append(day)
+            day = next_occurrence(rule, day)
+        return days or ([missed] if missed is not None else [])
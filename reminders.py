@@ -0,0 +1,144 @@
+"""Upcoming reminders for timetable slots and scheduled tasks, kept in a min-heap.
+
+Heap entries are [when, key] with key ("slot", "09:00") or ("task", id),
+and current maps each key to its live time. Editing a slot or task just
+pushes a new entry; the old one is skipped when it reaches the top, and a
+task that was completed or deleted is checked when it is due. So every
+change and every reminder costs O(log n), and the UI only ever needs one
+timer, set for the time at the top of the heap.
+
+Slots follow the timetable of the day they fall on, so a slot that is
+empty today but set for tomorrow is reminded tomorrow. Only today and
+tomorrow are looked at; the UI rebuilds the queue when the date changes.
+"""
+import heapq
+import time
+from datetime import date, datetime, timedelta
+from task_model import parse_clock, to_date
+
+
+def _at(day, clock):
+    """Epoch seconds for day at "HH:MM" local time, or None if clock is not a time of day."""
+    parsed = parse_clock(clock)
+    if parsed is None:
+        return None
+    return datetime.combine(day, datetime.min.time()).replace(hour=parsed[0], minute=parsed[1]).timestamp()
+
+
+class ReminderQueue:
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self.heap = []
+        self.current = {}
+        self.rebuild()
+        data_manager.listeners.append(self.handle_data_changed)
+
+    def rebuild(self, now=None):
+        now = time.time() if now is None else now
+        self.heap, self.current = [], {}
+        today = date.fromtimestamp(now)
+        slots = set(self.data_manager.data["timetable"])
+        for day in (today, today + timedelta(days=1)):
+            slots.update(self.data_manager.days.day(day))
+        for slot in slots:
+            self._push_slot(slot, now)
+        for tasks in self.data_manager.tasks.open_tasks.values():
+            for rec in tasks.values():
+                self._push_task(rec, now)
+        heapq.heapify(self.heap)
+
+    def _schedule(self, key, when, push=True):
+        self.current[key] = when
+        if push:
+            heapq.heappush(self.heap, [when, key])
+        else:
+            self.heap.append([when, key])
+
+    def _slot_text(self, day, slot):
+        text = self.data_manager.days.day(day).get(slot)
+        return self.data_manager.data["timetable"].get(slot, "") if text is None else text
+
+    def _push_slot(self, slot, now, push=False):
+        """Remind at the slot's next time today or tomorrow that has something in it."""
+        today = date.fromtimestamp(now)
+        for day in (today, today + timedelta(days=1)):
+            when = _at(day, slot)
+            if when is None:
+                break
+            if when > now and self._slot_text(day, slot):
+                self._schedule(("slot", slot), when, push)
+                return
+        self.current.pop(("slot", slot), None)
+
+    def _push_task(self, rec, now, push=False):
+        """Remind at the task's scheduled time on the day it is for, if that is still ahead.
+
+        A time that is not HH:MM (free text from an import) gets no reminder.
+        """
+        if not rec.scheduled_time or rec.completed is not None:
+            return
+        due = rec.get("due")
+        if due:
+            day = date.fromisoformat(due)
+        elif rec.created is not None:
+            day = to_date(rec.created)
+        else:
+            return
+        when = _at(day, rec.scheduled_time)
+        if when is not None and when > now:
+            self._schedule(("task", rec["id"]), when, push)
+
+    # === Keeping up with changes ===
+    def handle_data_changed(self, op, record):
+        now = time.time()
+        # The index holds the TaskRecord; imports pass plain dicts
+        records = self.data_manager.tasks.records
+        if op == "task_added":
+            self._push_task(records[record["record"]["id"]], now, push=True)
+        elif op == "tasks_added":
+            for _, _, rec in record["tasks"]:
+                self._push_task(records[rec["id"]], now, push=True)
+        elif op == "tasks_restored":
+            for _, _, _, task_id in record["tasks"]:
+                rec = records.get(task_id)
+                if rec is not None:
+                    self._push_task(rec, now, push=True)
+        elif op in ("timetable_changed", "day_changed"):
+            for slot in record["slots"]:
+                self._push_slot(slot, now, push=True)
+        elif op == "data_reloaded":
+            self.rebuild(now)
+
+    # === Firing ===
+    def next_time(self):
+        """Epoch seconds of the next live reminder, or None."""
+        heap = self.heap
+        while heap and self.current.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now=None):
+        """Remove and return the reminders due by now as (key, text), oldest first."""
+        now = time.time() if now is None else now
+        due = []
+        while self.next_time() is not None and self.heap[0][0] <= now:
+            when, key = heapq.heappop(self.heap)
+            del self.current[key]
+            text = self._text(key, when)
+            if text:
+                due.append((key, text))
+            if key[0] == "slot":
+                # Slots come round again tomorrow
+                self._push_slot(key[1], now, push=True)
+        return due
+
+    def _text(self, key, when):
+        """The reminder's text, or None if its slot was cleared or its task is done or gone."""
+        if key[0] == "slot":
+            text = self._slot_text(date.fromtimestamp(when), key[1])
+            return f"{key[1]}  {text}" if text else None
+        rec = self.data_manager.tasks.records.get(key[1])
+        if rec is None or rec.completed is not None or key[1] not in self.data_manager.tasks.open_tasks.get(
+                rec.module, {}):
+            return None
+        return f"{rec.scheduled_time}  {rec.text} ({rec.module})"
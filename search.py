@@ -0,0 +1,194 @@
+import gc
+import heapq
+import re
+from bisect import bisect_left, insort
+
+WORD = re.compile(r"\w+")
+# Scores for how a query word matched an indexed word
+EXACT, PREFIX, TYPO = 3, 2, 1
+# Words shorter than this must match exactly or by prefix
+MIN_TYPO_LENGTH = 4
+
+
+def tokenize(text):
+    return WORD.findall(text.lower())
+
+def _variants(word):
+    """The word and its single-character deletions; numbers get no typo matching."""
+    if word.isdigit():
+        return {word}
+    return {word[:i] + word[i + 1:] for i in range(len(word))} | {word}
+
+
+class SearchIndex:
+    """Incremental inverted index over tasks, modules, timetable and history.
+
+    Documents are keyed by (kind, key) where kind is "task", "module",
+    "slot" or "history". Query words match exactly, by prefix (so results
+    update as the user types) or with one typo, found through an index of
+    single-character deletions.
+    """
+
+    def __init__(self):
+        self.postings = {}      # word -> {doc key}
+        self.vocabulary = []    # sorted words, for prefix ranges
+        self.deletes = {}       # word or one-deletion variant -> {word}
+        self.documents = {}     # doc key -> (title, module, words)
+        self.module_docs = {}   # module -> {task doc keys}
+
+    # === Building ===
+    def build(self, data):
+        # Building allocates a few containers per document, which would
+        # otherwise trigger repeated full collections over the growing index
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            # Sort the vocabulary once at the end instead of inserting each new word
+            for name, tasks in data["modules"].items():
+                self.add("module", name, name, name, sort=False)
+                for text, _, task_id, *_ in tasks:
+                    self.add("task", task_id, text, name, sort=False)
+            for slot, text in data["timetable"].items():
+                self.add("slot", slot, text, None, sort=False)
+            for rec in data["task_history"]:
+                self.add("history", rec["id"], rec["text"], rec["module"], sort=False)
+            self.vocabulary = sorted(self.postings)
+        finally:
+            if enabled:
+                gc.enable()
+
+    def add(self, kind, key, title, module, sort=True):
+        doc = (kind, key)
+        self.remove(kind, key)
+        words = set(tokenize(title))
+        if not words:
+            return
+        self.documents[doc] = (title, module, words)
+        if kind == "task":
+            self.module_docs.setdefault(module, set()).add(doc)
+        for word in words:
+            if word not in self.postings:
+                self.postings[word] = set()
+                if sort:
+                    insort(self.vocabulary, word)
+                for variant in _variants(word):
+                    self.deletes.setdefault(variant, set()).add(word)
+            self.postings[word].add(doc)
+
+    def remove(self, kind, key):
+        doc = (kind, key)
+        entry = self.documents.pop(doc, None)
+        if entry is None:
+            return
+        title, module, words = entry
+        if kind == "task":
+            self.module_docs.get(module, set()).discard(doc)
+        for word in words:
+            docs = self.postings[word]
+            docs.discard(doc)
+            if not docs:
+                del self.postings[word]
+                del self.vocabulary[bisect_left(self.vocabulary, word)]
+                for variant in _variants(word):
+                    self.deletes[variant].discard(word)
+                    if not self.deletes[variant]:
+                        del self.deletes[variant]
+
+    def remove_module(self, module):
+        self.remove("module", module)
+        for kind, key in list(self.module_docs.pop(module, ())):
+            self.remove(kind, key)
+
+    def handle_data_changed(self, op, record):
+        """DataManager listener keeping the index in step with each operation."""
+        if op == "task_added":
+            self.add("task", record["record"]["id"], record["text"], record["module"])
+            self.add("history", record["record"]["id"], record["text"], record["module"])
+        elif op == "task_deleted":
+            self.remove("task", record["task_id"])
+        elif op == "task_renamed":
+            self.add("task", record["task_id"], record["text"], record["module"])
+            self.add("history", record["task_id"], record["text"], record["module"])
+        elif op == "tasks_added":
+            for text, _, history in record["tasks"]:
+                self.add("task", history["id"], text, record["module"])
+                self.add("history", history["id"], text, record["module"])
+        elif op == "tasks_deleted":
+            for task_id in record["task_ids"]:
+                self.remove("task", task_id)
+        elif op == "tasks_removed":
+            for task_id in record["task_ids"]:
+                self.remove("task", task_id)
+                self.remove("history", task_id)
+        elif op == "tasks_restored":
+            for _, text, _, task_id in record["tasks"]:
+                self.add("task", task_id, text, record["module"])
+                if ("history", task_id) in self.documents:
+                    self.add("history", task_id, self.documents[("history", task_id)][0], record["module"])
+        elif op == "tasks_moved":
+            for task_id in record["task_ids"]:
+                for kind in ("task", "history"):
+                    if (kind, task_id) in self.documents:
+                        self.add(kind, task_id, self.documents[(kind, task_id)][0], record["target"])
+        elif op == "module_added":
+            self.add("module", record["name"], record["name"], record["name"])
+        elif op == "module_deleted":
+            self.remove_module(record["name"])
+        elif op == "timetable_changed":
+            for slot, text in record["slots"].items():
+                self.add("slot", slot, text, None)
+        elif op == "history_added":
+            for rec in record["records"]:
+                self.add("history", rec["id"], rec["text"], rec["module"])
+        elif op == "history_archived":
+            for task_id in record["ids"]:
+                self.remove("history", task_id)
+
+    # === Querying ===
+    def _matches(self, term):
+        """word -> score for indexed words matching one query word."""
+        matches = {}
+        vocabulary = self.vocabulary
+        position = bisect_left(vocabulary, term)
+        while position < len(vocabulary) and vocabulary[position].startswith(term):
+            word = vocabulary[position]
+            matches[word] = EXACT if word == term else PREFIX
+            position += 1
+        if len(term) >= MIN_TYPO_LENGTH:
+            for variant in _variants(term):
+                for word in self.deletes.get(variant, ()):
+                    matches.setdefault(word, TYPO)
+        return matches
+
+    def search(self, query, limit=20):
+        """Return up to limit (score, kind, key, title, module), best first.
+
+        Every query word has to match; history entries for tasks that are
+        still listed are left out in favour of the task itself.
+        """
+        terms = [self._matches(term) for term in tokenize(query)]
+        if not terms:
+            return []
+        # Collect documents for the most selective word, then check the
+        # others against each candidate's own words
+        terms.sort(key=lambda matches: sum(len(self.postings[word]) for word in matches))
+        scores = {}
+        for word, score in terms[0].items():
+            for doc in self.postings[word]:
+                if scores.get(doc, 0) < score:
+                    scores[doc] = score
+        for matches in terms[1:]:
+            narrowed = {}
+            for doc, total in scores.items():
+                score = max((matches.get(word, 0) for word in self.documents[doc][2]), default=0)
+                if score:
+                    narrowed[doc] = total + score
+            scores = narrowed
+            if not scores:
+                return []
+
+        documents = self.documents
+        candidates = (item for item in scores.items()
+                      if item[0][0] != "history" or ("task", item[0][1]) not in documents)
+        best = heapq.nsmallest(limit, candidates, key=lambda item: (-item[1], documents[item[0]][0]))
+        return [(score, kind, key) + documents[(kind, key)][:2] for (kind, key), score in best]
@@ -0,0 +1,87 @@
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+
+# A session is [start, end, kind, task_id] with start/end in epoch seconds
+START, END, KIND, TASK = range(4)
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min).timestamp()
+    return start, start + 24 * 3600
+
+
+class SessionLog:
+    """Queries over data["pomodoro_sessions"], cached per day.
+
+    Sessions are appended in start order, so one day's sessions are found
+    by bisecting on the start time. Per-day totals are cached and updated
+    as new sessions are logged, so today's figures never scan past days.
+    """
+
+    def __init__(self, data_manager):
+        self.data_manager = data_manager
+        self.days = {}  # date -> {"minutes": float, "tasks": {task_id: minutes}}
+        data_manager.listeners.append(self.handle_data_changed)
+
+    @property
+    def sessions(self):
+        return self.data_manager.data["pomodoro_sessions"]
+
+    def handle_data_changed(self, op, record):
+        if op == "session_logged":
+            session = record["session"]
+            day = date.fromtimestamp(session[START])
+            if day in self.days:
+                self._add(self.days[day], session)
+        elif op == "data_reloaded" and record["sessions"]:
+            self.days.clear()
+
+    def _add(self, totals, session):
+        if session[KIND] != "work":
+            return
+        minutes = (session[END] - session[START]) / 60
+        totals["minutes"] += minutes
+        totals["tasks"][session[TASK]] = totals["tasks"].get(session[TASK], 0) + minutes
+
+    def day_sessions(self, day):
+        start, end = _day_bounds(day)
+        sessions = self.sessions
+        first = bisect_left(sessions, start, key=lambda session: session[START])
+        last = bisect_left(sessions, end, lo=first, key=lambda session: session[START])
+        return sessions[first:last]
+
+    def day_totals(self, day):
+        if day not in self.days:
+            totals = {"minutes": 0.0, "tasks": {}}
+            for session in self.day_sessions(day):
+                self._add(totals, session)
+            self.days[day] = totals
+        return self.days[day]
+
+    # === Queries ===
+    def focus_minutes(self, day=None):
+        """Work minutes logged on day (default today)."""
+        return self.day_totals(day or date.today())["minutes"]
+
+    def minutes_by_task(self, first_day, last_day=None):
+        """Work minutes per task id (None for no task) between two dates inclusive."""
+        result = {}
+        day = first_day
+        while day <= (last_day or first_day):
+            for task_id, minutes in self.day_totals(day)["tasks"].items():
+                result[task_id] = result.get(task_id, 0) + minutes
+            day += timedelta(days=1)
+        return result
+
+    def minutes_by_module(self, first_day, last_day=None):
+        records = self.data_manager.tasks.records
+        result = {}
+        for task_id, minutes in self.minutes_by_task(first_day, last_day).items():
+            record = records.get(task_id)
+            module = record["module"] if record is not None else None
+            result[module] = result.get(module, 0) + minutes
+        return result
+
+    def minutes_by_day(self, first_day, last_day):
+        return {first_day + timedelta(days=offset): self.day_totals(first_day + timedelta(days=offset))["minutes"]
+                for offset in range((last_day - first_day).days + 1)}
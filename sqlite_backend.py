@@ -0,0 +1,381 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# Keys of the document that get their own tables; everything else is a setting
+TABLE_KEYS = ("modules", "timetable", "task_history", "pomodoro_sessions", "recurring", "recurring_due")
+HISTORY_FIELDS = ("id", "text", "module", "created_at", "completed_at", "scheduled_time")
+# The history load() reads: open records, recent completions and records of
+# tasks still listed. Everything else is only read by the history queries
+LOADED_HISTORY = "completed_at IS NULL OR completed_at >= ? OR id IN (SELECT id FROM tasks WHERE id IS NOT NULL)"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS modules (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    module TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL,
+    id TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_by_position ON tasks (module, position);
+CREATE TABLE IF NOT EXISTS history (
+    id TEXT UNIQUE,
+    text TEXT,
+    module TEXT,
+    created_at TEXT,
+    completed_at TEXT,
+    scheduled_time TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS history_by_module ON history (module, completed_at);
+CREATE INDEX IF NOT EXISTS history_by_created ON history (created_at);
+CREATE INDEX IF NOT EXISTS history_by_completed ON history (completed_at);
+CREATE TABLE IF NOT EXISTS timetable (
+    slot TEXT PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    kind TEXT NOT NULL,
+    task_id TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_by_start ON sessions (start);
+CREATE TABLE IF NOT EXISTS rules (
+    id TEXT PRIMARY KEY,
+    next_due TEXT NOT NULL,
+    rule TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rules_by_due ON rules (next_due);
+CREATE TABLE IF NOT EXISTS day_slots (
+    day TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (day, slot)
+);
+"""
+
+
+def _history_row(record):
+    extra = {key: value for key, value in record.items() if key not in HISTORY_FIELDS}
+    return tuple(record.get(key) for key in HISTORY_FIELDS) + (json.dumps(extra) if extra else None,)
+
+def _history_record(row):
+    record = dict(zip(HISTORY_FIELDS, row[:-1]))
+    if row[-1]:
+        record.update(json.loads(row[-1]))
+    return record
+
+def _rule_row(rule_id, rule):
+    return rule_id, rule["next_due"], json.dumps({key: value for key, value in rule.items() if key != "next_due"},
+                                                 ensure_ascii=False)
+
+
+class SqliteBackend:
+    """Stores the planner document in indexed SQLite tables.
+
+    Each DataManager operation becomes a handful of single-row statements,
+    so saving a change no longer rewrites the whole document. With
+    history_days set, history completed longer ago than that (of tasks no
+    longer listed) stays in the database and is not loaded, so memory
+    follows the working set rather than the whole history.
+    """
+
+    def __init__(self, path, history_days=None):
+        self.path = path
+        self.history_days = history_days
+        # completed_at bound of the history last loaded; None when all of it was
+        self.history_cutoff = None
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(tasks)")]
+        if columns and "id" not in columns:
+            # Databases created before tasks carried their history id
+            self.connection.execute("ALTER TABLE tasks ADD COLUMN id TEXT")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS tasks_by_id ON tasks (id)")
+
+    def is_empty(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM modules").fetchone()[0] == 0 and \
+                self.connection.execute("SELECT COUNT(*) FROM settings").fetchone()[0] == 0
+
+    def load(self):
+        with self.lock:
+            db = self.connection
+            data = {key: json.loads(value) for key, value in db.execute("SELECT key, value FROM settings")}
+            data["modules"] = {name: [] for (name,) in db.execute("SELECT name FROM modules ORDER BY rowid")}
+            for module, text, status, task_id in db.execute(
+                    "SELECT module, text, status, id FROM tasks ORDER BY module, position"):
+                task = [text, status] if task_id is None else [text, status, task_id]
+                data["modules"].setdefault(module, []).append(task)
+            data["timetable"] = dict(db.execute("SELECT slot, text FROM timetable ORDER BY rowid"))
+            data["pomodoro_sessions"] = [list(row) for row in db.execute(
+                "SELECT start, end, kind, task_id FROM sessions ORDER BY start")]
+            if self.history_days is None:
+                where, params = "", ()
+            else:
+                self.history_cutoff = (datetime.now() - timedelta(days=self.history_days)).isoformat()
+                where, params = f"WHERE {LOADED_HISTORY}", (self.history_cutoff,)
+            data["task_history"] = [_history_record(row) for row in db.execute(
+                f"SELECT {', '.join(HISTORY_FIELDS)}, extra FROM history {where} ORDER BY rowid", params)]
+            data["recurring"] = {}
+            # Sorted by due date, which is already a valid heap
+            data["recurring_due"] = []
+            for rule_id, next_due, rule in db.execute("SELECT id, next_due, rule FROM rules ORDER BY next_due"):
+                data["recurring"][rule_id] = {**json.loads(rule), "next_due": next_due}
+                data["recurring_due"].append([next_due, rule_id])
+        return data
+
+    def write(self, data):
+        """Replace everything with data; used for migration and full saves.
+
+        History that load() left in the database is kept.
+        """
+        with self.lock, self.connection as db:
+            # Before the tasks go, as they decide which records were loaded
+            if self.history_cutoff is None:
+                db.execute("DELETE FROM history")
+            else:
+                db.execute(f"DELETE FROM history WHERE {LOADED_HISTORY}", (self.history_cutoff,))
+            for table in ("settings", "modules", "tasks", "timetable", "sessions", "rules"):
+                db.execute(f"DELETE FROM {table}")
+            db.executemany("INSERT INTO settings VALUES (?, ?)",
+                           [(key, json.dumps(value, ensure_ascii=False))
+                            for key, value in data.items() if key not in TABLE_KEYS])
+            db.executemany("INSERT INTO modules VALUES (?)", [(name,) for name in data["modules"]])
+            db.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?)",
+                           [(module, position, task[0], task[1], task[2] if len(task) > 2 else None)
+                            for module, tasks in data["modules"].items()
+                            for position, task in enumerate(tasks)])
+            db.executemany("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           [_history_row(record) for record in data["task_history"]])
+            db.executemany("INSERT INTO timetable VALUES (?, ?)", list(data["timetable"].items()))
+            db.executemany("INSERT INTO sessions VALUES (?, ?, ?, ?)", data.get("pomodoro_sessions", []))
+            db.executemany("INSERT INTO rules VALUES (?, ?, ?)",
+                           [_rule_row(rule_id, rule) for rule_id, rule in data.get("recurring", {}).items()])
+
+    def apply(self, op, record, settings=None):
+        """Persist one DataManager operation as row-level writes.
+
+        settings are extra setting rows to update in the same transaction.
+        """
+        self.apply_many([(op, record)], settings)
+
+    def apply_many(self, ops, settings=None):
+        """Persist a list of (op, record) in one transaction."""
+        with self.lock, self.connection as db:
+            for op, record in ops:
+                getattr(self, f"_{op}")(db, record)
+            if settings:
+                self._settings_changed(db, {"values": settings})
+
+    # Positions only order a module's tasks and may have gaps, so adding,
+    # deleting or moving a task writes its own rows and never renumbers
+    def _next_position(self, db, module):
+        # One step down the (module, position) index
+        return db.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM tasks WHERE module = ?",
+                          (module,)).fetchone()[0]
+
+    def _task_added(self, db, record):
+        db.execute("INSERT OR IGNORE INTO modules VALUES (?)", (record["module"],))
+        position = self._next_position(db, record["module"])
+        db.execute("INSERT INTO tasks VALUES (?, ?, ?, ?, ?)",
+                   (record["module"], position, record["text"], record["status"], record["record"]["id"]))
+        db.execute("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                   _history_row(record["record"]))
+
+    def _task_row(self, db, record):
+        if record.get("task_id") is not None:
+            return db.execute("SELECT position, id FROM tasks WHERE id = ?", (record["task_id"],)).fetchone()
+        return db.execute("SELECT position, id FROM tasks WHERE module = ? ORDER BY position LIMIT 1 OFFSET ?",
+                          (record["module"], record["index"])).fetchone()
+
+    def _task_deleted(self, db, record):
+        row = self._task_row(db, record)
+        if row is None:
+            return
+        db.execute("DELETE FROM tasks WHERE id = ?", (row[1],))
+
+    def _status_changed(self, db, record):
+        row = self._task_row(db, record)
+        if row is None:
+            return
+        db.execute("UPDATE tasks SET status = ? WHERE id = ?", (record["status"], row[1]))
+        if record.get("completed_at"):
+            db.execute("UPDATE history SET completed_at = ? WHERE id = ? AND completed_at IS NULL",
+                       (record["completed_at"], row[1]))
+
+    def _task_renamed(self, db, record):
+        row = self._task_row(db, record)
+        if row is None:
+            return
+        db.execute("UPDATE tasks SET text = ? WHERE id = ?", (record["text"], row[1]))
+        db.execute("UPDATE history SET text = ? WHERE id = ?", (record["text"], row[1]))
+
+    def _tasks_added(self, db, record):
+        db.execute("INSERT OR IGNORE INTO modules VALUES (?)", (record["module"],))
+        start = self._next_position(db, record["module"])
+        db.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?)",
+                       [(record["module"], start + offset, text, status, history["id"])
+                        for offset, (text, status, history) in enumerate(record["tasks"])])
+        db.executemany("INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       [_history_row(history) for _, _, history in record["tasks"]])
+
+    def _tasks_deleted(self, db, record):
+        db.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in record["task_ids"]])
+
+    def _statuses_changed(self, db, record):
+        task_ids = [(task_id,) for task_id in record["task_ids"]]
+        if record.get("completed_at"):
+            db.executemany("UPDATE history SET completed_at = ? WHERE id = ? AND completed_at IS NULL AND EXISTS "
+                           "(SELECT 1 FROM tasks WHERE tasks.id = history.id AND status != ?)",
+                           [(record["completed_at"], task_id, record["status"]) for (task_id,) in task_ids])
+        db.executemany("UPDATE tasks SET status = ? WHERE id = ?",
+                       [(record["status"], task_id) for (task_id,) in task_ids])
+
+    def _tasks_moved(self, db, record):
+        start = self._next_position(db, record["target"])
+        # Keep the moved tasks in their source order
+        rows = [db.execute("SELECT position, id FROM tasks WHERE id = ? AND module = ?",
+                           (task_id, record["module"])).fetchone() for task_id in record["task_ids"]]
+        moved = [task_id for _, task_id in sorted(row for row in rows if row is not None)]
+        db.executemany("UPDATE tasks SET module = ?, position = ? WHERE id = ?",
+                       [(record["target"], start + offset, task_id) for offset, task_id in enumerate(moved)])
+        db.executemany("UPDATE history SET module = ? WHERE id = ?",
+                       [(record["target"], task_id) for task_id in moved])
+
+    def _tasks_removed(self, db, record):
+        self._tasks_deleted(db, record)
+        db.executemany("DELETE FROM history WHERE id = ?", [(task_id,) for task_id in record["task_ids"]])
+
+    def _tasks_restored(self, db, record):
+        # Only undo puts tasks back at given places, so this one rewrites the module
+        module = record["module"]
+        db.execute("INSERT OR IGNORE INTO modules VALUES (?)", (module,))
+        remaining = iter(db.execute("SELECT text, status, id FROM tasks WHERE module = ? ORDER BY position",
+                                    (module,)).fetchall())
+        merged = []
+        for position, text, status, task_id in record["tasks"]:
+            while len(merged) < position:
+                task = next(remaining, None)
+                if task is None:
+                    break
+                merged.append(task)
+            merged.append((text, status, task_id))
+        merged.extend(remaining)
+        db.execute("DELETE FROM tasks WHERE module = ?", (module,))
+        db.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?)",
+                       [(module, position, text, status, task_id)
+                        for position, (text, status, task_id) in enumerate(merged)])
+        db.executemany("UPDATE history SET module = ? WHERE id = ?",
+                       [(module, task[3]) for task in record["tasks"]])
+
+    def _statuses_restored(self, db, record):
+        db.executemany("UPDATE tasks SET status = ? WHERE id = ?",
+                       [(status, task_id) for task_id, status, _ in record["tasks"]])
+        db.executemany("UPDATE history SET completed_at = ? WHERE id = ?",
+                       [(completed_at, task_id) for task_id, _, completed_at in record["tasks"]])
+
+    def _timetable_changed(self, db, record):
+        db.executemany("INSERT INTO timetable VALUES (?, ?) ON CONFLICT (slot) DO UPDATE SET text = excluded.text",
+                       list(record["slots"].items()))
+
+    def _module_added(self, db, record):
+        db.execute("INSERT OR IGNORE INTO modules VALUES (?)", (record["name"],))
+
+    def _module_deleted(self, db, record):
+        db.execute("DELETE FROM modules WHERE name = ?", (record["name"],))
+        db.execute("DELETE FROM tasks WHERE module = ?", (record["name"],))
+
+    def _settings_changed(self, db, record):
+        db.executemany("INSERT OR REPLACE INTO settings VALUES (?, ?)",
+                       [(key, json.dumps(value, ensure_ascii=False))
+                        for key, value in record["values"].items()])
+
+    def _session_logged(self, db, record):
+        db.execute("INSERT INTO sessions VALUES (?, ?, ?, ?)", record["session"])
+
+    def _history_added(self, db, record):
+        db.executemany("INSERT OR IGNORE INTO history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       [_history_row(rec) for rec in record["records"]])
+
+    def _rule_added(self, db, record):
+        db.execute("INSERT OR REPLACE INTO rules VALUES (?, ?, ?)", _rule_row(record["rule_id"], record["rule"]))
+
+    def _rule_deleted(self, db, record):
+        db.execute("DELETE FROM rules WHERE id = ?", (record["rule_id"],))
+
+    def _rules_advanced(self, db, record):
+        db.executemany("UPDATE rules SET next_due = ? WHERE id = ?",
+                       [(next_due, rule_id) for rule_id, next_due in record["next_due"].items()])
+
+    def _history_archived(self, db, record):
+        db.executemany("DELETE FROM history WHERE id = ?", [(task_id,) for task_id in record["ids"]])
+
+    def query_history(self, module=None, since=None, until=None, completed=None):
+        """Return history records filtered on the indexed columns."""
+        clauses, params = [], []
+        if module is not None:
+            clauses.append("module = ?")
+            params.append(module)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if completed is not None:
+            clauses.append("completed_at IS NOT NULL" if completed else "completed_at IS NULL")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(HISTORY_FIELDS)}, extra FROM history {where} ORDER BY rowid", params
+            ).fetchall()
+        return [_history_record(row) for row in rows]
+
+    # === Dated timetables (see day_store.py) ===
+    def load_days(self, first, last):
+        """{day: {slot: text}} for the days from first to last inclusive."""
+        days = {}
+        with self.lock:
+            for day, slot, text in self.connection.execute(
+                    "SELECT day, slot, text FROM day_slots WHERE day BETWEEN ? AND ?", (first, last)):
+                days.setdefault(day, {})[slot] = text
+        return days
+
+    def change_day(self, day, slots):
+        with self.lock, self.connection as db:
+            db.executemany("INSERT OR REPLACE INTO day_slots VALUES (?, ?, ?)",
+                           [(day, slot, text) for slot, text in slots.items() if text is not None])
+            db.executemany("DELETE FROM day_slots WHERE day = ? AND slot = ?",
+                           [(day, slot) for slot, text in slots.items() if text is None])
+
+    def iter_history(self, page=1000):
+        """Yield history records in insertion order, reading page rows at a time."""
+        last = 0
+        while True:
+            with self.lock:
+                rows = self.connection.execute(
+                    f"SELECT rowid, {', '.join(HISTORY_FIELDS)}, extra FROM history WHERE rowid > ? "
+                    f"ORDER BY rowid LIMIT ?", (last, page)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield _history_record(row[1:])
+            last = rows[-1][0]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
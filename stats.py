@@ -0,0 +1,194 @@
+import hashlib
+import json
+from datetime import date, timedelta
+from task_model import status_text, to_iso, to_stamp
+
+DONE = "🟢"
+WINDOW_DAYS = 7
+
+
+def data_fingerprint(data):
+    """Cheap summary of data used to tell whether saved stats still match it."""
+    return [len(data["modules"]), sum(len(tasks) for tasks in data["modules"].values()),
+            len(data["task_history"])]
+
+
+class PlannerStats:
+    """Running aggregates kept up to date as operations are applied.
+
+    observe() is called with each operation before it changes the data,
+    so every update and every query is O(1) instead of a scan of the
+    modules and task_history.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.by_module = {}          # module -> {status: count}
+        self.by_status = {}          # status -> count
+        self.completed_by_day = {}   # "YYYY-MM-DD" -> completions, last WINDOW_DAYS only
+        self.added_by_day = {}       # "YYYY-MM-DD" -> tasks added, last WINDOW_DAYS only
+
+    # === Queries ===
+    def open_tasks(self, module=None):
+        if module is None:
+            return sum(count for status, count in self.by_status.items() if status != DONE)
+        return sum(count for status, count in self.by_module.get(module, {}).items() if status != DONE)
+
+    def status_counts(self):
+        return dict(self.by_status)
+
+    def completions_today(self):
+        return self.completed_by_day.get(date.today().isoformat(), 0)
+
+    def completion_rate(self):
+        """Completions over tasks added in the last WINDOW_DAYS, or None."""
+        self._prune()
+        added = sum(self.added_by_day.values())
+        if not added:
+            return None
+        return sum(self.completed_by_day.values()) / added
+
+    # === Updates ===
+    def _count(self, module, status, delta):
+        # Counts that reach zero are dropped, as rebuild() never makes them
+        statuses = self.by_module.setdefault(module, {})
+        statuses[status] = statuses.get(status, 0) + delta
+        if not statuses[status]:
+            del statuses[status]
+            if not statuses:
+                del self.by_module[module]
+        self.by_status[status] = self.by_status.get(status, 0) + delta
+        if not self.by_status[status]:
+            del self.by_status[status]
+
+    def _count_day(self, days, timestamp, start=None):
+        if timestamp and timestamp[:10] >= (start or self._window_start()):
+            days[timestamp[:10]] = days.get(timestamp[:10], 0) + 1
+
+    def _uncount_day(self, days, timestamp):
+        if timestamp and timestamp[:10] in days:
+            days[timestamp[:10]] -= 1
+            if not days[timestamp[:10]]:
+                del days[timestamp[:10]]
+
+    def _window_start(self):
+        return (date.today() - timedelta(days=WINDOW_DAYS - 1)).isoformat()
+
+    def _prune(self):
+        start = self._window_start()
+        for days in (self.completed_by_day, self.added_by_day):
+            for day in [day for day in days if day < start]:
+                del days[day]
+
+    def observe(self, op, record, data, position=None):
+        """Update the aggregates for an operation that is about to be applied.
+
+        position is the index of the affected task in its module list, for
+        task_deleted and status_changed.
+        """
+        if op == "task_added":
+            self._count(record["module"], record["status"], 1)
+            self._count_day(self.added_by_day, record["record"]["created_at"])
+        elif op == "task_deleted" and position is not None:
+            self._count(record["module"], data["modules"][record["module"]][position][1], -1)
+        elif op == "status_changed" and position is not None:
+            self._count(record["module"], data["modules"][record["module"]][position][1], -1)
+            self._count(record["module"], record["status"], 1)
+            self._count_day(self.completed_by_day, record.get("completed_at"))
+        elif op == "tasks_added":
+            for _, status, history in record["tasks"]:
+                self._count(record["module"], status, 1)
+                self._count_day(self.added_by_day, history["created_at"])
+                # Imported tasks can arrive already completed
+                self._count_day(self.completed_by_day, history["completed_at"])
+        elif op == "history_added":
+            for history in record["records"]:
+                self._count_day(self.added_by_day, history["created_at"])
+                self._count_day(self.completed_by_day, history["completed_at"])
+        elif op == "tasks_restored":
+            for _, _, status, _ in record["tasks"]:
+                self._count(record["module"], status, 1)
+        elif op == "statuses_restored":
+            restored = {task_id: status for task_id, status, _ in record["tasks"]}
+            for task in data["modules"].get(record["module"], []):
+                if task.id in restored:
+                    self._count(record["module"], status_text(task.status), -1)
+                    self._count(record["module"], restored[task.id], 1)
+            for timestamp in record["cleared"]:
+                self._uncount_day(self.completed_by_day, timestamp)
+        elif op in ("tasks_deleted", "tasks_removed", "statuses_changed", "tasks_moved"):
+            task_ids = set(record["task_ids"])
+            for task in data["modules"].get(record["module"], []):
+                if task.id not in task_ids:
+                    continue
+                status = status_text(task.status)
+                self._count(record["module"], status, -1)
+                if op == "statuses_changed":
+                    self._count(record["module"], record["status"], 1)
+                    if status != record["status"]:
+                        self._count_day(self.completed_by_day, record.get("completed_at"))
+                elif op == "tasks_moved":
+                    self._count(record["target"], status, 1)
+            for timestamp in record.get("created_at", []):
+                self._uncount_day(self.added_by_day, timestamp)
+        elif op == "module_deleted":
+            for status, count in self.by_module.pop(record["name"], {}).items():
+                self.by_status[status] -= count
+                if not self.by_status[status]:
+                    del self.by_status[status]
+
+    def rebuild(self, data):
+        self.reset()
+        for module, tasks in data["modules"].items():
+            for task in tasks:
+                self._count(module, status_text(task.status), 1)
+        start = self._window_start()
+        # Compare numeric timestamps, and format only the few in the window
+        cutoff = to_stamp(start)
+        for rec in data["task_history"]:
+            for days, stamp in ((self.added_by_day, rec.created), (self.completed_by_day, rec.completed)):
+                if stamp is not None and stamp >= cutoff:
+                    self._count_day(days, to_iso(stamp), start)
+
+    # === Persistence ===
+    def _aggregates(self):
+        return {
+            "by_module": self.by_module,
+            "completed_by_day": self.completed_by_day,
+            "added_by_day": self.added_by_day,
+        }
+
+    @staticmethod
+    def _checksum(aggregates, fingerprint):
+        text = json.dumps([aggregates, fingerprint], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def to_json(self, data):
+        self._prune()
+        aggregates = self._aggregates()
+        return {"aggregates": aggregates, "checksum": self._checksum(aggregates, data_fingerprint(data))}
+
+    def load(self, data):
+        """Restore saved aggregates from data["stats"], or rebuild them.
+
+        Returns True if the saved copy was used.
+        """
+        saved = data.get("stats")
+        try:
+            aggregates = saved["aggregates"]
+            if saved["checksum"] == self._checksum(aggregates, data_fingerprint(data)):
+                self.reset()
+                self.by_module = aggregates["by_module"]
+                self.completed_by_day = aggregates["completed_by_day"]
+                self.added_by_day = aggregates["added_by_day"]
+                for statuses in self.by_module.values():
+                    for status, count in statuses.items():
+                        self.by_status[status] = self.by_status.get(status, 0) + count
+                self._prune()
+                return True
+        except (KeyError, TypeError):
+            pass
+        self.rebuild(data)
+        return False
@@ -0,0 +1,153 @@
+import tkinter as tk
+from profiling import timed
+from utils import *
+
+ROW_HEIGHT = 34
+
+
+class _Row:
+    """One pooled row of widgets, shown at whichever task index it is bound to."""
+
+    def __init__(self, canvas, on_delete, on_status_click, on_rename, on_select):
+        self.index = None
+        self.task = None
+        self.selected = False
+
+        self.frame = tk.Frame(canvas, bg="white")
+        self.delete_btn = tk.Button(self.frame, text="❌", command=lambda: on_delete(self.index),
+                                    bg="lightcoral", fg="white", width=2, font=(FONT_NAME, 8))
+        self.delete_btn.pack(side="left", padx=2)
+
+        self.text_label = tk.Label(self.frame, bg="white", font=FONT, anchor="w")
+        self.text_label.pack(side="left", padx=6, fill="x", expand=True)
+        if on_rename is not None:
+            self.text_label.bind("<Double-Button-1>", lambda event: on_rename(self.index))
+        self.text_label.bind("<Button-1>", lambda event: on_select(self.index))
+        self.text_label.bind("<Control-Button-1>", lambda event: on_select(self.index, "toggle"))
+        self.text_label.bind("<Shift-Button-1>", lambda event: on_select(self.index, "range"))
+
+        self.rag_label = tk.Label(self.frame, width=3, font=TITLE_FONT)
+        self.rag_label.pack(side="right", padx=6)
+        self.rag_label.bind("<Button-1>", lambda event: on_status_click(self.index))
+
+        self.item = canvas.create_window(10, 0, window=self.frame, anchor="nw", height=ROW_HEIGHT - 4)
+
+    def show(self, index, task, selected=False):
+        # Skip widget updates when the row already shows this task
+        if index == self.index and task == self.task and selected == self.selected:
+            return
+        text, status = task[0], task[1]
+        if self.task is None or self.task[0] != text:
+            self.text_label.config(text=text)
+        if selected != self.selected:
+            self.text_label.config(bg=HIGHLIGHT_COLOUR if selected else "white",
+                                   fg="white" if selected else "black")
+            self.selected = selected
+        if self.task is None or self.task[1] != status:
+            self.rag_label.config(text=status)
+            set_rag_color(self.rag_label, status)
+        self.index = index
+        self.task = task
+
+
+class TaskListView:
+    """Scrollable task list that only builds widgets for the rows in view.
+
+    Rows are recycled as the list scrolls, and refresh() only reconfigures
+    rows whose task changed, so redraw cost depends on the viewport height
+    rather than the number of tasks.
+
+    Clicking a task's text selects it; Ctrl-click toggles and Shift-click
+    extends the selection. The selection holds task ids, so it survives
+    tasks being added or removed above it.
+    """
+
+    def __init__(self, parent, task_list, on_delete, on_status_click, on_rename=None):
+        self.task_list = task_list
+        self.on_delete = on_delete
+        self.on_status_click = on_status_click
+        self.on_rename = on_rename
+        self.rows = []
+        self.total = None
+        self.selected = set()
+        self.anchor = None
+
+        _, self.canvas = create_scrollable_frame(parent, on_scroll=self.layout)
+        self.canvas.configure(yscrollincrement=ROW_HEIGHT)
+        self.canvas.bind("<Configure>", self.on_resize)
+
+    def on_resize(self, event):
+        for row in self.rows:
+            self.canvas.itemconfig(row.item, width=max(event.width - 20, 1))
+        self.layout()
+
+    @timed("tasks.refresh")
+    def refresh(self):
+        if self.total != len(self.task_list):
+            self.total = len(self.task_list)
+            self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), self.total * ROW_HEIGHT))
+        self.layout()
+
+    @timed("tasks.layout")
+    def layout(self):
+        """Bind the pooled rows to the tasks currently in view."""
+        if self.total is None:
+            return
+        first = max(int(self.canvas.canvasy(0)) // ROW_HEIGHT, 0)
+        visible = self.canvas.winfo_height() // ROW_HEIGHT + 2
+        while len(self.rows) < visible:
+            row = _Row(self.canvas, self.on_delete, self.on_status_click, self.on_rename, self.select)
+            self.canvas.itemconfig(row.item, width=max(self.canvas.winfo_width() - 20, 1))
+            self.rows.append(row)
+
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            if index < len(self.task_list):
+                if row.index != index:
+                    self.canvas.coords(row.item, 10, index * ROW_HEIGHT + 2)
+                task = self.task_list[index]
+                row.show(index, task, task[2] in self.selected)
+                self.canvas.itemconfig(row.item, state="normal")
+            else:
+                self.canvas.itemconfig(row.item, state="hidden")
+                row.index = row.task = None
+
+    def see(self, index):
+        """Scroll so the task at index is visible."""
+        if self.total:
+            self.canvas.yview_moveto(max(index - 1, 0) / self.total)
+
+    def highlight(self, index):
+        """Scroll to the task at index and select only it."""
+        if 0 <= index < len(self.task_list):
+            self.select(index)
+            self.see(index)
+
+    # === Selection ===
+    def select(self, index, mode="only"):
+        if index is None or not 0 <= index < len(self.task_list):
+            return
+        task_id = self.task_list[index][2]
+        if mode == "toggle":
+            self.selected ^= {task_id}
+        elif mode == "range" and self.anchor is not None:
+            first, last = sorted((min(self.anchor, len(self.task_list) - 1), index))
+            self.selected |= {task[2] for task in self.task_list[first:last + 1]}
+        else:
+            self.selected = {task_id}
+        if mode != "range":
+            self.anchor = index
+        self.refresh()
+
+    def select_all(self):
+        self.selected = {task[2] for task in self.task_list}
+        self.refresh()
+
+    def clear_selection(self):
+        self.selected = set()
+        self.anchor = None
+        self.refresh()
+
+    def selected_ids(self):
+        """Selected task ids in list order, dropping any no longer in the list."""
+        return [task[2] for task in self.task_list if task[2] in self.selected]
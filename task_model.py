@@ -0,0 +1,339 @@
+"""Compact in-memory tasks and history records.
+
+json.load gives every task a [text, status, id] list with its own copy of
+the status emoji, and every history record a dict holding two ISO date
+strings and its own copy of the module name. With 100k+ tasks that is most
+of the planner's memory. Once loaded, tasks are Task objects and history
+records are TaskRecord objects instead. Both use __slots__. A status is a
+Status (a small int), timestamps are float seconds, and module names are
+interned.
+
+Both still read like the JSON shapes: task[1] is the status emoji,
+text, status, task_id = task unpacks, and rec["created_at"] is the ISO
+string, so code that only reads them does not change. to_json() gives back
+exactly what was loaded, so the data file format is unchanged. Whole
+documents are saved through to_document(); encode() is the json.dumps
+default for anything else holding them.
+"""
+import copy
+import sys
+from datetime import date, datetime, timedelta
+from enum import IntEnum
+
+STATUSES = ["🔴", "🟡", "🟢", "🔘"]
+
+# Timestamps are seconds since this, in local wall-clock time like the ISO strings
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+TIME_KEYS = {"created_at": "created", "completed_at": "completed"}
+PLAIN_KEYS = ("id", "text", "module", "scheduled_time")
+RECORD_KEYS = ("id", "text", "module", "created_at", "completed_at", "scheduled_time")
+_RECORD_KEY_SET = set(RECORD_KEYS)
+
+
+class _Absent:
+    """Kept in TaskRecord.extra for a RECORD_KEYS key the loaded record did not have."""
+    __slots__ = ()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return "ABSENT"
+
+ABSENT = _Absent()
+
+
+class Status(IntEnum):
+    RED = 0
+    AMBER = 1
+    GREEN = 2
+    GREY = 3
+
+    @property
+    def emoji(self):
+        return STATUSES[self]
+
+_BY_EMOJI = {status.emoji: status for status in Status}
+# Indexing STATUSES with a Status goes through __index__; a dict hit does not
+_EMOJI = {status: status.emoji for status in Status}
+
+def status_code(status):
+    """The Status for an emoji; anything unknown is kept as given."""
+    if isinstance(status, Status):
+        return status
+    return _BY_EMOJI.get(status, status)
+
+def status_text(status):
+    return _EMOJI[status] if isinstance(status, Status) else status
+
+
+def to_stamp(text):
+    """Seconds since EPOCH for an ISO date or date-time, or None if text is not one."""
+    try:
+        moment = datetime.fromisoformat(text)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.replace(tzinfo=None)
+    return (moment - EPOCH).total_seconds()
+
+def _canonical(text):
+    """Whether to_iso() gives back text exactly, for text that to_stamp() parsed.
+
+    That is datetime.isoformat() output for a naive time: no offset, and
+    microseconds written only when they are not zero.
+    """
+    return ((len(text) == 19 or (len(text) == 26 and text[19] == "." and text[20:] != "000000"))
+            and text[4] == text[7] == "-" and text[10] == "T" and text[13] == text[16] == ":")
+
+def to_iso(stamp):
+    # Floats this size still resolve microseconds, and timedelta rounds to
+    # the nearest one, so this gives back exactly what to_stamp() read
+    return (EPOCH + timedelta(0, stamp)).isoformat()
+
+
+def to_date(stamp):
+    return date.fromordinal(EPOCH_ORDINAL + int(stamp // 86400))
+
+
+def parse_clock(text):
+    """(hour, minute) for an "HH:MM" time of day ("9:30" too), or None if text is not one.
+
+    scheduled_time can come from imports and the API as free text, so
+    everything reading it goes through here.
+    """
+    try:
+        hour, minute = text.split(":")
+    except (AttributeError, ValueError):
+        return None
+    if not (hour.isdigit() and minute.isdigit() and len(hour) <= 2 and len(minute) == 2):
+        return None
+    hour, minute = int(hour), int(minute)
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+def clock_text(text):
+    """text as a zero-padded "HH:MM"; raises ValueError if it is not a time of day."""
+    clock = parse_clock(text)
+    if clock is None:
+        raise ValueError(f"Scheduled time must be HH:MM (00:00 to 23:59), not {text!r}")
+    return f"{clock[0]:02d}:{clock[1]:02d}"
+
+
+class Task:
+    """One entry of a module list: text, a Status and the id of its history record."""
+    __slots__ = ("text", "status", "id")
+
+    def __init__(self, text, status, task_id):
+        self.text = text
+        self.status = status_code(status)
+        self.id = task_id
+
+    def to_json(self):
+        return [self.text, status_text(self.status), self.id]
+
+    # Reads like the (text, status, id) it replaces. task[1] is read for
+    # every row a view draws, so the usual positions build no tuple
+    def __getitem__(self, position):
+        if position == 1:
+            return status_text(self.status)
+        if position == 0:
+            return self.text
+        if position == 2:
+            return self.id
+        return (self.text, status_text(self.status), self.id)[position]
+
+    def __iter__(self):
+        return iter((self.text, status_text(self.status), self.id))
+
+    def __len__(self):
+        return 3
+
+    # Tasks are replaced, never changed in place, so copies can share them
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, Task):
+            return self.text == other.text and self.status == other.status and self.id == other.id
+        if isinstance(other, (list, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Task({self.text!r}, {status_text(self.status)!r}, {self.id!r})"
+
+
+class TaskRecord:
+    """One task_history record.
+
+    created and completed are float seconds since EPOCH (or None), for
+    comparing without parsing. Keys beyond RECORD_KEYS live in extra, as
+    does the original text of a timestamp that to_iso() would not
+    reproduce exactly. One of RECORD_KEYS that the loaded record did not
+    have reads as None and is marked ABSENT in extra, so to_json() leaves
+    it out again until it is set.
+    """
+    __slots__ = ("id", "text", "module", "created", "completed", "scheduled_time", "extra")
+
+    def __init__(self, task_id, text, module, created_at=None, completed_at=None, scheduled_time=None):
+        self.id = task_id
+        self.text = text
+        self.module = sys.intern(module) if isinstance(module, str) else module
+        self.extra = None
+        self.created = self._stamp("created_at", created_at)
+        self.completed = self._stamp("completed_at", completed_at)
+        self.scheduled_time = scheduled_time
+
+    @classmethod
+    def from_json(cls, rec):
+        if isinstance(rec, TaskRecord):
+            return rec
+        record = cls(rec.get("id"), rec.get("text"), rec.get("module"), rec.get("created_at"),
+                     rec.get("completed_at"), rec.get("scheduled_time"))
+        if rec.keys() != _RECORD_KEY_SET:
+            for key, value in rec.items():
+                if key not in RECORD_KEYS:
+                    record[key] = value
+            for key in RECORD_KEYS:
+                if key not in rec:
+                    if record.extra is None:
+                        record.extra = {}
+                    record.extra[key] = ABSENT
+        return record
+
+    def _stamp(self, key, value):
+        if self.extra is not None:
+            self.extra.pop(key, None)
+        if value is None:
+            return None
+        stamp = to_stamp(value)
+        if stamp is None or not _canonical(value):
+            # Keep the text as written; the stamp (if any) is only for comparing
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+        return stamp
+
+    def __copy__(self):
+        record = TaskRecord.__new__(TaskRecord)
+        record.id, record.text, record.module = self.id, self.text, self.module
+        record.created, record.completed = self.created, self.completed
+        record.scheduled_time, record.extra = self.scheduled_time, self.extra
+        return record
+
+    def __deepcopy__(self, memo):
+        record = self.__copy__()
+        if record.extra is not None:
+            record.extra = copy.deepcopy(record.extra, memo)
+        return record
+
+    def to_json(self):
+        rec = {"id": self.id, "text": self.text, "module": self.module,
+               "created_at": None if self.created is None else to_iso(self.created),
+               "completed_at": None if self.completed is None else to_iso(self.completed),
+               "scheduled_time": self.scheduled_time}
+        if self.extra:
+            for key, value in self.extra.items():
+                if value is not ABSENT:
+                    rec[key] = value
+                elif rec[key] is None:
+                    del rec[key]
+        return rec
+
+    # === Reads like the dict it replaces ===
+    def __getitem__(self, key):
+        if self.extra is not None and key in self.extra:
+            value = self.extra[key]
+            if value is not ABSENT:
+                return value
+        if key in TIME_KEYS:
+            stamp = getattr(self, TIME_KEYS[key])
+            return None if stamp is None else to_iso(stamp)
+        if key in PLAIN_KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        if key in TIME_KEYS:
+            setattr(self, TIME_KEYS[key], self._stamp(key, value))
+        elif key in PLAIN_KEYS:
+            if self.extra is not None:
+                self.extra.pop(key, None)
+            setattr(self, key, sys.intern(value) if key == "module" and isinstance(value, str) else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        if self.extra is not None and key in self.extra:
+            return self.extra[key] is not ABSENT or self[key] is not None
+        return key in RECORD_KEYS
+
+    def keys(self):
+        return self.to_json().keys()
+
+    def items(self):
+        return self.to_json().items()
+
+    def __iter__(self):
+        return iter(self.to_json())
+
+    def __len__(self):
+        return len(self.to_json())
+
+    def __eq__(self, other):
+        if isinstance(other, TaskRecord):
+            return all(getattr(self, slot) == getattr(other, slot) for slot in TaskRecord.__slots__)
+        if isinstance(other, dict):
+            return self.to_json() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"TaskRecord({self.to_json()!r})"
+
+
+def encode(value):
+    """json.dumps default= for documents holding Task and TaskRecord objects."""
+    if isinstance(value, (Task, TaskRecord)):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_document(data):
+    """A shallow copy of a compacted document with plain task lists and history dicts.
+
+    For saving: with indent, json.dumps runs its pure-Python encoder, and
+    calling encode() from there once per task and record costs more than
+    converting them all in one pass first.
+    """
+    document = dict(data)
+    document["modules"] = {name: [task.to_json() for task in tasks] for name, tasks in data["modules"].items()}
+    document["task_history"] = [rec.to_json() for rec in data["task_history"]]
+    return document
+
+
+def compact_data(data):
+    """Turn the task lists and history dicts of a loaded document into Task and TaskRecord, in place."""
+    for tasks in data["modules"].values():
+        tasks[:] = [task if isinstance(task, Task) else Task(task[0], task[1], task[2]) for task in tasks]
+    history = data["task_history"]
+    for position, rec in enumerate(history):
+        if not isinstance(rec, TaskRecord):
+            history[position] = TaskRecord.from_json(rec)
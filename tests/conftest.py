@@ -0,0 +1,25 @@
+import os
+import sys
+import pytest
+
+# The planner's modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager
+
+
+@pytest.fixture
+def open_manager(tmp_path):
+    """Open DataManagers on files in tmp_path; any left open are closed after the test."""
+    managers = []
+
+    def open_manager(name="data.json", **options):
+        options = {"write_behind": False, "archive_days": None, "backup_interval": None, **options}
+        data_manager = DataManager(str(tmp_path / name), **options)
+        managers.append(data_manager)
+        return data_manager
+
+    yield open_manager
+    for data_manager in managers:
+        if not data_manager._closed:
+            data_manager.close()
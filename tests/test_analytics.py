@@ -0,0 +1,68 @@
+import pytest
+from data_manager import create_task_record
+from model import PlannerModel
+from task_model import TaskRecord
+
+np = pytest.importorskip("numpy")
+from analytics import completion_percentiles, completions_per_day, history_arrays, history_records, \
+    hour_completion_rate
+
+
+def record(task_id, scheduled_time, completed_at=None, created_at="2026-10-12T08:00:00"):
+    # 2026-10-12 is a Monday
+    return TaskRecord(task_id, "Task", "Home", created_at, completed_at, scheduled_time)
+
+
+def test_scheduled_hours_accept_unpadded_and_drop_malformed():
+    records = [record("a", "09:30"), record("b", "9:30"), record("c", "23:00"), record("d", None),
+               record("e", "9am"), record("f", "24:00"), record("g", "99:99"), record("h", ""),
+               record("i", "7")]
+    assert history_arrays(records)["scheduled_hour"].tolist() == [9, 9, 23, -1, -1, -1, -1, -1, -1]
+
+
+def test_hour_completion_rate_ignores_bad_times():
+    records = [record("a", "9:05", completed_at="2026-10-12T10:00:00"), record("b", "09:00"),
+               record("c", "30:00"), record("d", "noon"), record("e", "10:00", created_at=None)]
+    rate = hour_completion_rate(history_arrays(records))
+    assert rate.shape == (7, 24)
+    assert rate[0, 9] == 0.5
+    # Only the Monday 09:00 cell has tasks
+    assert np.count_nonzero(~np.isnan(rate)) == 1
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_archived_completions_are_counted(open_manager, backend):
+    data_manager = open_manager(backend=backend)
+    model = PlannerModel(data_manager)
+    records = []
+    for day in ("2020-01-06", "2020-02-03"):
+        rec = create_task_record("Old", "Uni", "09:00")
+        rec["created_at"], rec["completed_at"] = f"{day}T09:00:00", f"{day}T11:00:00"
+        records.append(rec)
+    data_manager.apply("history_added", records=records)
+    model.set_statuses("Home", [model.add_task("Home", "Today", "09:00")], "🟢")
+    assert data_manager.archive_history(days=30) == 2
+    assert data_manager.archived_months() == ["2020-01", "2020-02"]
+    data_manager.close()
+
+    data_manager = open_manager(backend=backend, archive_days=30)
+    old = [rec["id"] for rec in records]
+    assert not set(old) & {rec.id for rec in data_manager.data["task_history"]}
+    records = history_records(data_manager)
+    assert [rec.id for rec in records][:2] == old
+    assert sorted(rec.module for rec in records if rec.completed is not None) == ["Home", "Uni", "Uni"]
+    arrays = history_arrays(records)
+    assert completion_percentiles(arrays, (50,))[50] is not None
+    dates, modules, counts = completions_per_day(arrays, np.datetime64("2020-02-03"), days=14)
+    assert counts[list(modules).index("Uni")].tolist() == [0] * 13 + [1]
+
+
+def test_a_record_archived_and_still_live_counts_once(open_manager):
+    data_manager = open_manager()
+    rec = create_task_record("Old", "Uni", "09:00")
+    rec["created_at"], rec["completed_at"] = "2020-01-06T09:00:00", "2020-01-06T11:00:00"
+    data_manager.apply("history_added", records=[rec])
+    data_manager.archive_history(days=30)
+    # As if the run stopped after writing the archive file
+    data_manager.apply("history_added", records=[rec])
+    assert [record.id for record in history_records(data_manager)].count(rec["id"]) == 1
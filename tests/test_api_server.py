@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import pytest
+from api_server import ApiError, ApiServer
+from model import PlannerModel
+
+
+def post(server, path, payload, method="POST"):
+    request = urllib.request.Request(f"http://{server.host}:{server.port}{path}",
+                                     data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+def call(server, path, payload, method="POST"):
+    """Send a request from another thread, draining the queue here as the Tk thread would."""
+    reply = []
+    client = threading.Thread(target=lambda: reply.append(post(server, path, payload, method)))
+    client.start()
+    while client.is_alive():
+        server.drain()
+        time.sleep(0.005)
+    return reply[0]
+
+
+@pytest.fixture
+def server(open_manager):
+    api = ApiServer(PlannerModel(open_manager()))
+    api.start()
+    yield api
+    api.stop()
+
+
+def test_post_tasks_keeps_a_valid_time(server):
+    status, reply = call(server, "/tasks", {"module": "Home", "tasks": ["Lecture", "Lab"],
+                                            "scheduled_time": "9:05"})
+    assert status == 200
+    records = server.model.data_manager.tasks.records
+    assert [records[task_id].scheduled_time for task_id in reply["ids"]] == ["09:05", "09:05"]
+
+
+@pytest.mark.parametrize("scheduled_time", ["noon", "24:00", "12:60", "12", "1:2", "", 900])
+def test_post_tasks_rejects_a_bad_time(server, scheduled_time):
+    status, reply = call(server, "/tasks", {"module": "New", "tasks": ["Lecture"], "create_module": True,
+                                            "scheduled_time": scheduled_time})
+    assert status == 400
+    assert "HH:MM" in reply["error"]
+    # Nothing was added, not even the module
+    assert "New" not in server.model.data["modules"]
+
+
+def test_batch_add_tasks_rejects_a_bad_time(server):
+    with pytest.raises(ApiError) as raised:
+        server.add_tasks({"module": "Home", "tasks": ["Lecture"], "scheduled_time": "noon"})
+    assert raised.value.status == 400
+    assert server.model.tasks("Home") == []
+
+
+def test_batch_cannot_delete_home(server):
+    status, reply = call(server, "/batch", {"ops": [{"op": "add_module", "name": "Uni"},
+                                                    {"op": "delete_module", "name": "Home"}]})
+    assert status == 400
+    assert "(1 applied)" in reply["error"]
+    assert {"Home", "Uni"} <= set(server.model.data["modules"])
+
+
+@pytest.mark.parametrize("slots", [{"09:00": 5}, {"09:00": None}, ["09:00"]])
+def test_put_timetable_rejects_slots_that_are_not_text(server, slots):
+    before = dict(server.model.timetable())
+    status, reply = call(server, "/timetable", {"slots": slots}, method="PUT")
+    assert status == 400
+    assert server.model.timetable() == before
+    status, reply = call(server, "/timetable", {"slots": {"09:00": "Lecture"}}, method="PUT")
+    assert (status, reply) == (200, {"changed": ["09:00"]})
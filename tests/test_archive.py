@@ -0,0 +1,35 @@
+from data_manager import create_task_record
+from model import PlannerModel
+from transfer import iter_tasks
+
+OLD = "2020-01-07T10:00:00"
+
+
+def test_archive_keeps_records_of_listed_tasks(open_manager):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    listed = model.add_task("Home", "Still on the list", "09:00")
+    model.set_statuses("Home", [listed], "🟢")
+    gone = model.add_task("Home", "Deleted later", "10:00")
+    model.set_statuses("Home", [gone], "🟢")
+    model.delete_tasks("Home", [gone])
+    for task_id in (listed, gone):
+        data_manager.tasks.records[task_id]["completed_at"] = OLD
+
+    assert data_manager.archive_history(days=30) == 1
+    assert [rec["id"] for rec in data_manager.iter_archived_history()] == [gone]
+    assert listed in data_manager.tasks.records
+    assert [row["scheduled_time"] for row in iter_tasks(data_manager)] == ["09:00"]
+
+
+def test_archived_records_survive_reopening(open_manager):
+    data_manager = open_manager()
+    record = create_task_record("Imported", "Home", "09:00")
+    record["completed_at"] = OLD
+    data_manager.apply("history_added", records=[record])
+    assert data_manager.archive_history(days=30) == 1
+    data_manager.close()
+
+    data_manager = open_manager()
+    assert data_manager.data["task_history"] == []
+    assert [rec["text"] for rec in data_manager.iter_history()] == ["Imported"]
@@ -0,0 +1,145 @@
+import copy
+import gzip
+import json
+import os
+import pytest
+import backup
+from backup import BackupSet, atomic_write, backup_dir
+from model import PlannerModel
+
+
+def document():
+    data = {
+        "modules": {"Home": [["Laundry", "🔴", "t1"]], "Uni": [["Essay", "🟢", "t2"], ["Lab", "🟡", "t3"]]},
+        "task_history": [
+            {"id": "t1", "text": "Laundry", "module": "Home", "created_at": "2026-03-01T09:00:00",
+             "completed_at": None, "scheduled_time": "18:00"},
+            {"id": "t2", "text": "Essay", "module": "Uni", "created_at": "2026-03-01T10:00:00",
+             "completed_at": "2026-03-02T12:00:00", "scheduled_time": "10:00"},
+            {"id": "t3", "text": "Lab", "module": "Uni", "created_at": "2026-03-01T11:00:00",
+             "completed_at": None, "scheduled_time": "11:00"},
+        ],
+        "timetable": {"Mon_09:00": "Lecture"},
+        "settings": {"priority": "Essay"},
+        "pomodoro_sessions": [[1772352000, 1772353500, "work", "t2"]],
+    }
+    # Enough unchanged tasks for a diff to come out smaller than a full backup
+    data["modules"]["Archive"] = [[f"Old {number}", "🟢", f"old{number}"] for number in range(200)]
+    for number in range(200):
+        data["task_history"].append({"id": f"old{number}", "text": f"Old {number}", "module": "Archive",
+                                     "created_at": f"2025-01-01T{number % 24:02d}:00:00",
+                                     "completed_at": f"2025-01-02T{number % 24:02d}:00:00",
+                                     "scheduled_time": f"{number % 24:02d}:00"})
+    return data
+
+
+def edited(data):
+    data = copy.deepcopy(data)
+    data["modules"]["Uni"][1][1] = "🟢"
+    data["modules"]["Gym"] = [["Run", "🔴", "t4"]]
+    data["task_history"][2]["completed_at"] = "2026-03-03T08:00:00"
+    del data["task_history"][0]
+    data["task_history"].append({"id": "t4", "text": "Run", "module": "Gym", "created_at": "2026-03-03T07:00:00",
+                                 "completed_at": None, "scheduled_time": "07:00"})
+    data["timetable"]["Tue_10:00"] = "Lab"
+    del data["settings"]
+    data["pomodoro_sessions"].append([1772380000, 1772380300, "break", None])
+    return data
+
+
+def test_a_diff_restores_every_kind_of_change(tmp_path):
+    backups = BackupSet(str(tmp_path / "backups"))
+    original = document()
+    assert backups.backup(original).startswith("full-")
+    changed = edited(original)
+    assert backups.backup(changed).startswith("diff-")
+
+    (first, _), (second, _) = backups.points()
+    assert backups.restore() == changed
+    assert backups.restore(second) == changed
+    assert backups.restore(first) == original
+    assert backups.restore("19990101-000000-000000") is None
+
+
+def test_a_diff_holds_only_what_changed(tmp_path):
+    backups = BackupSet(str(tmp_path / "backups"))
+    backups.backup(document())
+    name = backups.backup(edited(document()))
+    with gzip.open(os.path.join(backups.directory, name), "rt", encoding="utf-8") as file:
+        diff = json.load(file)
+    assert sorted(diff["modules"]) == ["Gym", "Uni"]
+    assert [rec["id"] for rec in diff["history"]] == ["t3", "t4"]
+    assert diff["removed_history"] == ["t1"]
+    assert list(diff["keys"]) == ["timetable"] and diff["removed_keys"] == ["settings"]
+    assert diff["sessions"] == {"keep": 1, "append": [[1772380000, 1772380300, "break", None]]}
+
+
+def test_rewritten_sessions_are_stored_whole(tmp_path):
+    backups = BackupSet(str(tmp_path / "backups"))
+    backups.backup(document())
+    data = document()
+    data["pomodoro_sessions"] = [[1772390000, 1772391500, "work", None]]
+    backups.backup(data)
+    assert backups.restore() == data
+
+
+def test_a_reopened_set_diffs_against_the_newest_full_backup(tmp_path):
+    directory = str(tmp_path / "backups")
+    BackupSet(directory).backup(document())
+    reopened = BackupSet(directory)
+    assert reopened.backup(edited(document())).startswith("diff-")
+    assert reopened.restore() == edited(document())
+
+
+def test_only_the_newest_full_backups_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "MAX_DIFFS", 1)
+    backups = BackupSet(str(tmp_path / "backups"), keep=2)
+    versions = []
+    for number in range(6):
+        data = document()
+        data["timetable"]["Mon_09:00"] = f"Lecture {number}"
+        versions.append(data)
+        backups.backup(data)
+    names = [name for _, name in backups.points()]
+    # full, diff, full, diff, full, diff: the oldest pair has gone
+    assert [name.split("-")[0] for name in names] == ["full", "diff", "full", "diff"]
+    assert [backups.restore(stamp) for stamp, _ in backups.points()] == versions[2:]
+
+
+def test_atomic_write_replaces_the_whole_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"old contents that are longer")
+    atomic_write(str(path), b"new")
+    assert path.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_a_failed_atomic_write_leaves_the_old_file(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b"old")
+    with pytest.raises(TypeError):
+        atomic_write(str(path), "not bytes")
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_an_unreadable_data_file_loads_the_newest_backup(open_manager, tmp_path):
+    model = PlannerModel(open_manager(backup_interval=0))
+    task_id = model.add_task("Home", "Laundry", "18:00")
+    model.data_manager.close()
+    assert BackupSet(backup_dir(str(tmp_path / "data.json"))).points()
+
+    (tmp_path / "data.json").write_bytes(b'{"modules": {"Home": [')
+    data_manager = open_manager(backup_interval=0)
+    assert task_id in [task.id for task in data_manager.data["modules"]["Home"]]
+    assert (tmp_path / "data.json.corrupt").read_bytes() == b'{"modules": {"Home": ['
+    data_manager.close()
+    with open(tmp_path / "data.json", encoding="utf-8") as file:
+        assert task_id in [task[2] for task in json.load(file)["modules"]["Home"]]
+
+
+def test_an_unreadable_data_file_without_backups_starts_afresh(open_manager, tmp_path):
+    (tmp_path / "data.json").write_bytes(b"not json")
+    data_manager = open_manager()
+    assert data_manager.data["task_history"] == []
+    assert not (tmp_path / "data.json.corrupt").exists()
@@ -0,0 +1,41 @@
+import copy
+import threading
+from data_manager import DEFAULT_DATA
+from model import PlannerModel
+
+
+def test_a_burst_of_changes_is_one_save(open_manager):
+    data_manager = open_manager(write_behind=True, save_delay=0.2)
+    model = PlannerModel(data_manager)
+    for number in range(10):
+        model.add_task("Home", f"Task {number}", "09:00")
+    data_manager.close()
+    assert (data_manager.save_requests, data_manager.saves_written, data_manager.coalesced_saves) == (10, 1, 9)
+    assert len(open_manager().data["modules"]["Home"]) == 10
+
+
+def test_an_older_snapshot_never_lands_after_a_newer_save(open_manager):
+    data_manager = open_manager(write_behind=True, save_delay=0)
+    write, taken, release = data_manager._write, threading.Event(), threading.Event()
+
+    def paused_write(*args):
+        # Hold the writer thread between taking its snapshot and writing it
+        if threading.current_thread() is data_manager._writer:
+            taken.set()
+            release.wait(5)
+        write(*args)
+
+    data_manager._write = paused_write
+    PlannerModel(data_manager).add_task("Home", "Before the restore", "09:00")
+    assert taken.wait(5)
+    restored = copy.deepcopy(DEFAULT_DATA)
+    restored["modules"]["Restored"] = [["From the backup", "🔴"]]
+    data_manager.replace_data(restored)
+    release.set()
+    data_manager.close()
+    assert data_manager.saves_written == 1
+    assert not data_manager._changed_on_disk()
+
+    data_manager = open_manager()
+    assert [task.text for task in data_manager.data["modules"]["Restored"]] == ["From the backup"]
+    assert "Before the restore" not in [task.text for task in data_manager.data["modules"]["Home"]]
@@ -0,0 +1,46 @@
+import threading
+import time
+from datetime import date
+import pytest
+from locking import FileLock
+
+
+def test_day_change_waits_for_a_save_in_progress(open_manager):
+    data_manager = open_manager()
+    locked, release = threading.Event(), threading.Event()
+
+    def save_in_progress():
+        # The writer thread's order: io lock, file lock, then the data lock
+        with data_manager._io_lock, FileLock(data_manager.lock_path):
+            locked.set()
+            release.wait(5)
+            with data_manager.lock:
+                pass
+
+    writer = threading.Thread(target=save_in_progress)
+    writer.start()
+    locked.wait(5)
+    threading.Timer(0.1, release.set).start()
+    start = time.monotonic()
+    data_manager.apply("day_changed", day="2026-10-19", slots={"09:00": "Lecture"})
+    writer.join(5)
+    assert not writer.is_alive()
+    assert time.monotonic() - start < 5
+    assert data_manager.days.day(date(2026, 10, 19)) == {"09:00": "Lecture"}
+
+
+def test_day_change_cannot_be_batched(open_manager):
+    data_manager = open_manager()
+    with pytest.raises(RuntimeError):
+        with data_manager.batch():
+            data_manager.apply("day_changed", day="2026-10-19", slots={"09:00": "Lecture"})
+
+
+def test_day_overrides_only_the_changed_slots(open_manager):
+    data_manager = open_manager()
+    data_manager.apply("day_changed", day="2026-10-19", slots={"09:00": "Lecture", "10:00": ""})
+    data_manager.apply("day_changed", day="2026-10-19", slots={"10:00": None})
+    data_manager.close()
+    days = open_manager().days
+    assert days.day(date(2026, 10, 19)) == {"09:00": "Lecture"}
+    assert not days.has_day(date(2026, 10, 20))
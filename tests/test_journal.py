@@ -0,0 +1,45 @@
+import os
+from model import PlannerModel
+
+
+def snapshot(data_manager):
+    return ({name: [tuple(task) for task in tasks] for name, tasks in data_manager.data["modules"].items()},
+            [rec.to_json() for rec in data_manager.data["task_history"]])
+
+
+def test_journal_replays_onto_the_snapshot(open_manager):
+    data_manager = open_manager(journal=True)
+    model = PlannerModel(data_manager)
+    model.add_module("Uni")
+    essay = model.add_task("Uni", "Essay", "09:00")
+    model.add_task("Uni", "Reading", "10:00")
+    model.set_statuses("Uni", [essay], "🟢")
+    expected = snapshot(data_manager)
+    data_manager.close()
+    # Nothing was compacted, so the changes are only in the journal
+    assert os.path.getsize(data_manager.journal_path) > 0
+    with open(data_manager.journal_path, "a", encoding="utf-8") as file:
+        file.write('{"seq": 99, "op": "module_added", "na')
+
+    data_manager = open_manager(journal=True)
+    assert snapshot(data_manager) == expected
+    # The torn last line was cut off, so later appends start on a line of their own
+    with open(data_manager.journal_path, "rb") as file:
+        assert file.read().endswith(b"\n")
+
+
+def test_compaction_round_trips(open_manager):
+    # A limit of one byte compacts into a new snapshot after every change
+    data_manager = open_manager(journal=True, journal_limit=1)
+    model = PlannerModel(data_manager)
+    model.add_module("Uni")
+    essay = model.add_task("Uni", "Essay", "09:00")
+    model.set_statuses("Uni", [essay], "🟡")
+    model.delete_tasks("Uni", [model.add_task("Uni", "Scrapped", "11:00")])
+    expected = snapshot(data_manager)
+    data_manager.close()
+    assert os.path.getsize(data_manager.journal_path) == 0
+
+    data_manager = open_manager(journal=True)
+    assert snapshot(data_manager) == expected
+    assert data_manager.data["journal_seq"] == data_manager._seq
@@ -0,0 +1,53 @@
+from merge import merge_documents
+from model import PlannerModel
+
+
+def texts(data_manager, module="Home"):
+    return [task.text for task in data_manager.data["modules"][module]]
+
+
+def open_window(open_manager):
+    data_manager = open_manager()
+    conflicts = []
+    data_manager.listeners.append(
+        lambda op, record: conflicts.extend(record["conflicts"]) if op == "data_reloaded" else None)
+    return data_manager, PlannerModel(data_manager), conflicts
+
+
+def test_concurrent_edits_merge_and_report_the_conflict(open_manager):
+    first, first_model, _ = open_window(open_manager)
+    first_model.add_task("Home", "Shopping", "10:00")
+    first_model.add_task("Home", "Laundry", "11:00")
+    second, second_model, conflicts = open_window(open_manager)
+
+    first_model.rename_task("Home", 0, "Shopping list")
+    # The second window saves over the first one's edit
+    second_model.rename_task("Home", 0, "Groceries")
+    second.poll_external()
+    assert conflicts == ["Home: Groceries"]
+    # Each adds a task before seeing the other's
+    first_model.add_task("Home", "Dishes", "12:00")
+    second_model.add_task("Home", "Ironing", "13:00")
+    first.poll_external()
+    assert texts(first) == texts(second) == ["Groceries", "Laundry", "Dishes", "Ironing"]
+    # Both windows now agree, so neither has anything left to write back
+    saves = first.saves_written, second.saves_written
+    first.poll_external()
+    second.poll_external()
+    assert (first.saves_written, second.saves_written) == saves
+
+
+def test_task_order_takes_the_side_that_reordered():
+    def document(*texts):
+        return {"modules": {"Home": [(text, "🔴", text.lower()) for text in texts]}, "timetable": {},
+                "task_history": [], "pomodoro_sessions": []}
+
+    base = document("A", "B", "C")
+    # They moved C to the top; we added D after A
+    merged, merge = merge_documents(base, document("A", "D", "B", "C"), document("C", "A", "B"))
+    assert [task[0] for task in merged["modules"]["Home"]] == ["C", "A", "D", "B"]
+    assert merge.conflicts == []
+    # Both sides reordered: ours is kept and the conflict reported
+    merged, merge = merge_documents(base, document("B", "A", "C"), document("C", "A", "B"))
+    assert [task[0] for task in merged["modules"]["Home"]] == ["B", "A", "C"]
+    assert merge.conflicts == ["Home: order"]
@@ -0,0 +1,93 @@
+import copy
+import pytest
+from model import PlannerModel
+from task_model import to_document
+
+
+def state(data):
+    return copy.deepcopy({"modules": data["modules"], "task_history": data["task_history"]})
+
+
+def saved(data):
+    document = to_document(data)
+    return document["modules"], document["task_history"]
+
+
+@pytest.fixture
+def model(open_manager):
+    model = PlannerModel(open_manager())
+    model.add_module("Uni")
+    model.add_tasks("Uni", ["Essay", "Lab", "Reading"])
+    model.undo_stack.clear()
+    return model
+
+
+def completed_at(model, task_id):
+    return next(rec for rec in model.data["task_history"] if rec["id"] == task_id)["completed_at"]
+
+
+def bulk_actions(model):
+    home = model.add_tasks("Home", ["A", "", "B", "  C  ", "D"])
+    assert [task[0] for task in model.tasks("Home")[-4:]] == ["A", "B", "C", "D"]
+    model.set_statuses("Home", home[:3], "🟢")
+    model.set_statuses("Home", home[1:], "🟡")
+    model.move_tasks("Home", "Uni", [home[0], home[2]])
+    model.delete_tasks("Uni", [home[2], model.tasks("Uni")[0][2]])
+    model.delete_tasks("Home", [home[3]])
+    return 6
+
+
+def test_bulk_actions_undo_and_redo_as_single_steps(model):
+    before = state(model.data)
+    steps = bulk_actions(model)
+    after = state(model.data)
+
+    assert [model.undo() for _ in range(steps)][-1] == "add 4 tasks"
+    assert model.undo() is None
+    assert state(model.data) == before
+
+    assert [model.redo() for _ in range(steps)][-1] == "delete 1 tasks"
+    assert model.redo() is None
+    assert state(model.data) == after
+
+
+def test_undone_tasks_return_to_their_positions(model):
+    ids = [task[2] for task in model.tasks("Uni")]
+    model.delete_tasks("Uni", [ids[0], ids[2]])
+    assert [task[2] for task in model.tasks("Uni")] == [ids[1]]
+    model.move_tasks("Uni", "Home", [ids[1]])
+    model.undo()
+    model.undo()
+    assert [task[2] for task in model.tasks("Uni")] == ids
+    assert ids[1] not in [task[2] for task in model.tasks("Home")]
+
+
+def test_bulk_statuses_restore_completion_times(model):
+    ids = [task[2] for task in model.tasks("Uni")]
+    model.set_status("Uni", 0, "🟢")
+    done_at = completed_at(model, ids[0])
+    model.set_statuses("Uni", ids, "🟢")
+    assert completed_at(model, ids[0]) == done_at
+    assert completed_at(model, ids[1]) is not None
+    model.undo()
+    assert [task[1] for task in model.tasks("Uni")] == ["🟢", "🔴", "🔴"]
+    assert [completed_at(model, task_id) for task_id in ids] == [done_at, None, None]
+
+
+def test_bulk_actions_are_saved_through_undo_and_redo(model, open_manager):
+    steps = bulk_actions(model)
+    for _ in range(steps):
+        model.undo()
+    for _ in range(steps // 2):
+        model.redo()
+    expected = saved(model.data)
+    model.data_manager.close()
+    assert saved(open_manager().data) == expected
+
+
+def test_moving_to_a_missing_module_changes_nothing(model):
+    before = state(model.data)
+    with pytest.raises(ValueError):
+        model.move_tasks("Uni", "Nowhere", [model.tasks("Uni")[0][2]])
+    assert state(model.data) == before
+    assert not model.undo_stack.can_undo()
@@ -0,0 +1,46 @@
+from model import PlannerModel
+from next_up import NextUpQueue
+
+
+def texts(queue):
+    return [rec.text for _, rec in queue.top()]
+
+
+def test_ranked_by_status_then_due_time(open_manager):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    queue = NextUpQueue(data_manager)
+    model.add_module("Uni")
+    late = model.add_task("Uni", "Late", "18:00")
+    model.add_task("Home", "Early", "08:00")
+    done = model.add_task("Uni", "Done", "07:00")
+    model.set_statuses("Uni", [done], "🟢")
+    model.set_statuses("Uni", [late], "🔴")
+    assert texts(queue) == ["Early", "Late"]
+    model.set_statuses("Home", [model.tasks("Home")[0].id], "🟡")
+    assert texts(queue) == ["Late", "Early"]
+
+
+def test_deleting_a_module_drops_its_tasks(open_manager):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    queue = NextUpQueue(data_manager)
+    model.add_module("Uni")
+    model.add_task("Uni", "Essay", "09:00")
+    model.add_task("Home", "Shopping", "10:00")
+    # A listed task whose record is missing must not break the scan
+    del data_manager.tasks.records[model.tasks("Home")[0].id]
+    model.delete_module("Uni")
+    assert texts(queue) == []
+    model.undo()
+    assert texts(queue) == ["Essay"]
+
+
+def test_bad_scheduled_time_counts_as_unscheduled(open_manager):
+    data_manager = open_manager()
+    queue = NextUpQueue(data_manager)
+    model = PlannerModel(data_manager)
+    task_id = model.add_task("Home", "Imported", "09:00")
+    data_manager.tasks.records[task_id].scheduled_time = "25:00"
+    queue.rebuild()
+    assert texts(queue) == ["Imported"]
@@ -0,0 +1,80 @@
+import pytest
+from pomodoro import ManualClock, PomodoroCycle
+
+MINUTE = 60
+
+
+@pytest.fixture
+def clock():
+    return ManualClock(1000.0)
+
+
+def make_cycle(clock, ended):
+    return PomodoroCycle(25, 5, 15, clock, on_phase_end=lambda *phase: ended.append(phase))
+
+
+def test_work_break_and_long_break_sequence(clock):
+    ended = []
+    cycle = make_cycle(clock, ended)
+    cycle.start()
+    kinds = []
+    for _ in range(9):
+        kinds.append(cycle.kind)
+        clock.advance(cycle.advance())
+        cycle.advance()
+    assert kinds == ["work", "short_break"] * 3 + ["work", "long_break", "work"]
+    assert [kind for kind, _, _ in ended] == kinds
+    assert [round((end - start) / MINUTE) for _, start, end in ended] == [25, 5] * 3 + [25, 15, 25]
+    assert cycle.kind == "short_break"
+    assert cycle.completed_work_sessions() == 5
+
+
+def test_pause_and_resume_keep_the_time_left(clock):
+    ended = []
+    cycle = make_cycle(clock, ended)
+    cycle.start()
+    clock.advance(10 * MINUTE)
+    assert cycle.pause() == 15 * MINUTE
+
+    # A long pause neither runs the clock down nor ends the phase
+    clock.advance(60 * MINUTE)
+    assert cycle.advance() == 15 * MINUTE
+    assert ended == []
+
+    cycle.resume()
+    assert not cycle.paused
+    clock.advance(15 * MINUTE - 1)
+    assert cycle.advance() == 1
+    clock.advance(1)
+    cycle.advance()
+    assert [(kind, end - start) for kind, start, end in ended] == [("work", 25 * MINUTE)]
+    assert ended[0][2] == clock()
+    assert cycle.kind == "short_break"
+
+
+def test_missed_deadlines_close_each_phase_at_its_own_deadline(clock):
+    ended = []
+    cycle = make_cycle(clock, ended)
+    cycle.start()
+    start = clock()
+    # A two-hour stall, e.g. a suspended machine
+    clock.advance(120 * MINUTE)
+    remaining = cycle.advance()
+    assert [(kind, (begin - start) / MINUTE, (end - start) / MINUTE) for kind, begin, end in ended] == [
+        ("work", 0, 25), ("short_break", 25, 30), ("work", 30, 55), ("short_break", 55, 60),
+        ("work", 60, 85), ("short_break", 85, 90), ("work", 90, 115)]
+    assert cycle.kind == "long_break"
+    assert remaining == 10 * MINUTE
+
+
+def test_hours_of_cycles_do_not_drift(clock):
+    cycle = make_cycle(clock, [])
+    cycle.start()
+    # Late ticks (a busy main thread) must not stretch the phases
+    for _ in range(10_000):
+        clock.advance(1.37)
+        cycle.advance()
+    elapsed = 10_000 * 1.37
+    cycles, into = divmod(elapsed, 130 * MINUTE)
+    assert cycle.reps == cycles * 8 + 1 + sum(1 for end in (25, 30, 55, 60, 85, 90, 115)
+                                             if into >= end * MINUTE)
@@ -0,0 +1,92 @@
+import json
+import threading
+import pytest
+import profiling
+from model import PlannerModel
+from profiling import BUCKET_BOUNDS, PROFILER, Histogram, span, timed
+
+
+@pytest.fixture
+def profiler():
+    PROFILER.reset()
+    PROFILER.enable()
+    yield PROFILER
+    PROFILER.disable()
+    PROFILER.reset()
+
+
+def test_percentiles_fall_within_a_bucket():
+    histogram = Histogram()
+    assert histogram.percentile(0.5) == 0
+    for duration_ns in [10_000] * 90 + [2_000_000] * 10:
+        histogram.add(duration_ns)
+    assert 10_000 <= histogram.percentile(0.5) < 10_000 * 1.19
+    assert 2_000_000 <= histogram.percentile(0.95) <= histogram.max_ns == 2_000_000
+    assert histogram.count == 100 and histogram.total_ns == 20_900_000
+
+
+def test_durations_past_the_last_bucket_report_the_max():
+    histogram = Histogram()
+    histogram.add(BUCKET_BOUNDS[-1] * 3)
+    assert histogram.buckets[-1] == 1
+    assert histogram.percentile(0.5) == BUCKET_BOUNDS[-1] * 3
+
+
+@timed("test.work")
+def work(value):
+    return value * 2
+
+
+def test_nothing_is_recorded_while_disabled():
+    PROFILER.reset()
+    assert not PROFILER.enabled
+    assert work(2) == 4
+    with span("test.block"):
+        pass
+    assert PROFILER.summary() == {}
+
+
+def test_calls_and_blocks_are_recorded_while_enabled(profiler):
+    for value in range(3):
+        work(value)
+    with span("test.block"):
+        work(5)
+    with pytest.raises(ZeroDivisionError):
+        with span("test.failed"):
+            1 / 0
+    summary = profiler.summary()
+    assert {name: stats["count"] for name, stats in summary.items()} == {
+        "test.work": 4, "test.block": 1, "test.failed": 1}
+    assert summary["test.block"]["max_ms"] >= summary["test.work"]["p50_ms"] >= 0
+
+
+def test_model_changes_are_timed(profiler, open_manager):
+    PlannerModel(open_manager()).add_task("Home", "Laundry", "18:00")
+    assert profiler.summary()["data.apply"]["count"] == 1
+
+
+def test_the_trace_names_threads_and_spans(profiler, tmp_path):
+    work(1)
+    worker = threading.Thread(target=work, args=(2,), name="writer")
+    worker.start()
+    worker.join()
+    path = profiler.export_trace(str(tmp_path / "trace.json"))
+    with open(path, encoding="utf-8") as file:
+        trace = json.load(file)
+    events = trace["traceEvents"]
+    names = {event["tid"]: event["args"]["name"] for event in events if event["ph"] == "M"}
+    spans = [event for event in events if event["ph"] == "X"]
+    assert sorted(names.values()) == sorted([threading.current_thread().name, "writer"])
+    assert [names[event["tid"]] for event in spans] == [threading.current_thread().name, "writer"]
+    assert all(event["name"] == "test.work" and event["cat"] == "test" for event in spans)
+    assert all(event["ts"] >= 0 and event["dur"] >= 0 for event in spans)
+    assert spans[0]["ts"] <= spans[1]["ts"]
+
+
+def test_only_the_latest_spans_are_kept(profiler, monkeypatch):
+    monkeypatch.setattr(profiling, "TRACE_LIMIT", 3)
+    profiler.reset()
+    for value in range(5):
+        work(value)
+    assert len(profiler.trace_events()) == 1 + 3
+    assert profiler.summary()["test.work"]["count"] == 5
@@ -0,0 +1,109 @@
+from datetime import date, timedelta
+import pytest
+from model import PlannerModel
+from recurrence import make_rule, next_occurrence
+
+MONDAY = date(2026, 3, 2)
+
+
+@pytest.fixture
+def model(open_manager):
+    return PlannerModel(open_manager())
+
+
+def occurrences(model, text):
+    """Due dates of the tasks created for text, in the order they were added."""
+    return [rec["due"] for rec in model.data["task_history"] if rec["text"] == text and "due" in rec]
+
+
+def days(*offsets):
+    return [(MONDAY + timedelta(days=offset)).isoformat() for offset in offsets]
+
+
+def test_next_occurrence_of_each_kind():
+    daily = make_rule("Home", "Water plants", "daily", start=MONDAY)
+    weekdays = make_rule("Home", "Stand-up", "weekdays", start=MONDAY)
+    weekly = make_rule("Home", "Gym", "weekly", days=[1, 4], start=MONDAY)
+    every = make_rule("Home", "Bins", "every", interval=3, start=MONDAY)
+    assert [rule["next_due"] for rule in (daily, weekdays, weekly, every)] == days(0, 0, 1, 0)
+    friday = MONDAY + timedelta(days=4)
+    assert next_occurrence(daily, friday) == MONDAY + timedelta(days=5)
+    assert next_occurrence(weekdays, friday) == MONDAY + timedelta(days=7)
+    assert next_occurrence(weekly, friday) == MONDAY + timedelta(days=8)
+    assert next_occurrence(every, friday) == MONDAY + timedelta(days=6)
+
+
+@pytest.mark.parametrize("kind, options", [
+    ("fortnightly", {}),
+    ("weekly", {"days": []}),
+    ("weekly", {"days": [7]}),
+    ("every", {"interval": 0}),
+])
+def test_invalid_rules_are_rejected(kind, options):
+    with pytest.raises(ValueError):
+        make_rule("Home", "Gym", kind, start=MONDAY, **options)
+
+
+def test_each_due_day_adds_one_task(model):
+    model.add_rule("Home", "Water plants", "daily", start=MONDAY, scheduled_time="08:00")
+    model.add_rule("Home", "Gym", "weekly", days=[0, 2], start=MONDAY)
+    for offset in range(7):
+        today = MONDAY + timedelta(days=offset)
+        model.generate_recurring(today)
+        # Generating again the same day finds nothing new
+        assert model.generate_recurring(today) == set()
+    assert occurrences(model, "Water plants") == days(0, 1, 2, 3, 4, 5, 6)
+    assert occurrences(model, "Gym") == days(0, 2)
+    assert [task[0] for task in model.tasks("Home")].count("Water plants") == 7
+
+
+def test_time_away_catches_up_with_the_latest_missed_day(model):
+    model.add_rule("Home", "Stand-up", "weekdays", start=MONDAY)
+    model.add_rule("Home", "Bins", "every", interval=3, start=MONDAY)
+    model.generate_recurring(MONDAY)
+    # Back on Sunday after a week away: Friday's stand-up, the last one missed, and today's bins
+    model.generate_recurring(MONDAY + timedelta(days=6))
+    assert occurrences(model, "Stand-up") == days(0, 4)
+    assert occurrences(model, "Bins") == days(0, 6)
+    model.generate_recurring(MONDAY + timedelta(days=7))
+    assert occurrences(model, "Stand-up") == days(0, 4, 7)
+
+
+def test_a_lookahead_adds_the_days_ahead_once(model):
+    model.recurrence.lookahead = 2
+    model.add_rule("Home", "Water plants", "daily", start=MONDAY)
+    model.generate_recurring(MONDAY)
+    model.generate_recurring(MONDAY + timedelta(days=1))
+    assert occurrences(model, "Water plants") == days(0, 1, 2, 3)
+
+
+def test_rules_create_their_module(model):
+    model.add_rule("Gym", "Stretch", "daily", start=MONDAY)
+    assert model.generate_recurring(MONDAY) == {"Gym"}
+    assert [task[0] for task in model.tasks("Gym")] == ["Stretch"]
+
+
+def test_deleted_rules_stop_and_undone_ones_resume(model):
+    rule_id = model.add_rule("Home", "Water plants", "daily", start=MONDAY)
+    model.generate_recurring(MONDAY)
+    model.delete_rule(rule_id)
+    assert model.generate_recurring(MONDAY + timedelta(days=1)) == set()
+    # The rule is back in the heap next to its old entry, but adds one task a day
+    model.undo()
+    model.generate_recurring(MONDAY + timedelta(days=2))
+    assert occurrences(model, "Water plants") == days(0, 2)
+    # Tasks already created stay when the rule is deleted
+    model.delete_rule(rule_id)
+    assert model.rules() == []
+    assert occurrences(model, "Water plants") == days(0, 2)
+
+
+def test_generated_days_are_remembered_after_reopening(open_manager):
+    model = PlannerModel(open_manager())
+    model.add_rule("Home", "Water plants", "daily", start=MONDAY)
+    model.generate_recurring(MONDAY + timedelta(days=1))
+    model.data_manager.close()
+    reopened = PlannerModel(open_manager())
+    assert reopened.generate_recurring(MONDAY + timedelta(days=1)) == set()
+    reopened.generate_recurring(MONDAY + timedelta(days=3))
+    assert occurrences(reopened, "Water plants") == days(1, 3)
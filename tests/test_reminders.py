@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta
+from data_manager import create_task_record
+from reminders import ReminderQueue
+
+
+def add_task(data_manager, text, scheduled_time):
+    record = create_task_record(text, "Home", scheduled_time)
+    data_manager.apply("task_added", module="Home", text=text, status="🔴", record=record)
+    return record.id
+
+
+def test_task_reminder_fires_at_its_time(open_manager):
+    data_manager = open_manager()
+    queue = ReminderQueue(data_manager)
+    soon = datetime.now() + timedelta(minutes=2)
+    if soon.date() != datetime.now().date():
+        return  # Too close to midnight for a same-day reminder
+    task_id = add_task(data_manager, "Call back", soon.strftime("%H:%M"))
+    due = queue.pop_due(queue.next_time())
+    assert [key for key, _ in due] == [("task", task_id)]
+
+
+def test_bad_scheduled_time_gets_no_reminder(open_manager):
+    data_manager = open_manager()
+    queue = ReminderQueue(data_manager)
+    # Free text from an import must not break the listener or later ones
+    seen = []
+    data_manager.listeners.append(lambda op, record: seen.append(op))
+    for clock in ("9am", "25:00", "12:75", "noon", ""):
+        add_task(data_manager, f"at {clock}", clock)
+    assert seen == ["task_added"] * 5
+    assert not [key for key in queue.current if key[0] == "task"]
+
+
+def test_rebuild_skips_bad_times_in_saved_data(open_manager):
+    data_manager = open_manager()
+    add_task(data_manager, "Imported", "9am")
+    data_manager.save_data()
+    data_manager.close()
+    # Starting the app on that file builds the queue from scratch
+    queue = ReminderQueue(open_manager())
+    assert not [key for key in queue.current if key[0] == "task"]
@@ -0,0 +1,61 @@
+from model import PlannerModel
+from search import SearchIndex
+
+
+def state(index):
+    # Emptied per-module sets are harmless leftovers of the incremental index
+    return (index.documents, index.postings, index.vocabulary, index.deletes,
+            {module: docs for module, docs in index.module_docs.items() if docs})
+
+
+def built(data):
+    index = SearchIndex()
+    index.build(data)
+    return state(index)
+
+
+def test_index_stays_consistent_through_edits_and_undo(open_manager):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    index = SearchIndex()
+    index.build(data_manager.data)
+    data_manager.listeners.append(index.handle_data_changed)
+
+    model.add_module("Uni")
+    essay = model.add_task("Uni", "Essay draft", "09:00")
+    reading, lab = model.add_tasks("Uni", ["Reading week notes", "Lab report"])
+    model.add_tasks("Home", ["Shopping list"])
+    edits = [lambda: model.rename_task("Uni", 0, "Essay final"),
+             lambda: model.move_tasks("Uni", "Home", [reading]),
+             lambda: model.delete_tasks("Uni", [lab]),
+             lambda: model.update_timetable({"09:00": "Lecture hall"}),
+             lambda: model.delete_module("Uni")]
+    for edit in edits:
+        edit()
+        assert state(index) == built(data_manager.data)
+    while model.undo() is not None:
+        assert state(index) == built(data_manager.data)
+    while model.redo() is not None:
+        assert state(index) == built(data_manager.data)
+
+
+def test_search_finds_renamed_and_moved_tasks(open_manager):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    index = SearchIndex()
+    index.build(data_manager.data)
+    data_manager.listeners.append(index.handle_data_changed)
+    model.add_module("Uni")
+    task_id = model.add_task("Uni", "Essay draft", "09:00")
+    model.rename_task("Uni", 0, "Thesis chapter")
+    model.move_tasks("Uni", "Home", [task_id])
+
+    assert [(kind, key, module) for _, kind, key, _, module in index.search("thesis")] == [
+        ("task", task_id, "Home")]
+    # Prefixes and one typo still find it; the old name does not
+    assert index.search("thes")[0][2] == task_id
+    assert index.search("chpter")[0][2] == task_id
+    assert index.search("essay") == []
+    model.delete_tasks("Home", [task_id])
+    # Once the task is gone, its history record is what is found
+    assert [kind for _, kind, *_ in index.search("thesis")] == ["history"]
@@ -0,0 +1,70 @@
+from datetime import date, datetime, timedelta
+import pytest
+from model import PlannerModel
+
+MONDAY = date(2026, 3, 2)
+
+
+def at(day, hour, minute=0):
+    return datetime(day.year, day.month, day.day, hour, minute).timestamp()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def open_model(request, open_manager):
+    def open_model():
+        return PlannerModel(open_manager(backend=request.param))
+    return open_model
+
+
+def log_week(model, essay, lab):
+    tuesday = MONDAY + timedelta(days=1)
+    model.log_session("work", at(MONDAY, 9), at(MONDAY, 9, 25), essay)
+    model.log_session("short_break", at(MONDAY, 9, 25), at(MONDAY, 9, 30))
+    model.log_session("work", at(MONDAY, 9, 30), at(MONDAY, 9, 55), lab)
+    model.log_session("work", at(MONDAY, 23, 40), at(MONDAY, 23, 55))
+    model.log_session("work", at(tuesday, 10), at(tuesday, 10, 50), essay)
+
+
+def test_focus_time_per_day_task_and_module(open_model):
+    model = open_model()
+    model.add_module("Uni")
+    essay = model.add_task("Uni", "Essay", "09:00")
+    lab = model.add_task("Home", "Lab", "09:30")
+    log_week(model, essay, lab)
+    sessions = model.sessions
+    tuesday = MONDAY + timedelta(days=1)
+
+    assert sessions.focus_minutes(MONDAY) == 65
+    assert sessions.minutes_by_task(MONDAY) == {essay: 25, lab: 25, None: 15}
+    assert sessions.minutes_by_task(MONDAY, tuesday) == {essay: 75, lab: 25, None: 15}
+    assert sessions.minutes_by_module(MONDAY, tuesday) == {"Uni": 75, "Home": 25, None: 15}
+    assert sessions.minutes_by_day(MONDAY, tuesday + timedelta(days=1)) == {
+        MONDAY: 65, tuesday: 50, tuesday + timedelta(days=1): 0}
+    assert len(sessions.day_sessions(MONDAY)) == 4
+
+
+def test_cached_days_take_in_new_sessions(open_model):
+    model = open_model()
+    assert model.sessions.focus_minutes(MONDAY) == 0
+    model.log_session("work", at(MONDAY, 14), at(MONDAY, 14, 25))
+    model.log_session("long_break", at(MONDAY, 14, 25), at(MONDAY, 14, 40))
+    assert model.sessions.focus_minutes(MONDAY) == 25
+    # A day not yet cached is read from the sessions when first asked for
+    tuesday = MONDAY + timedelta(days=1)
+    model.log_session("work", at(tuesday, 8), at(tuesday, 8, 10))
+    assert tuesday not in model.sessions.days
+    assert model.sessions.minutes_by_day(MONDAY, tuesday) == {MONDAY: 25, tuesday: 10}
+
+
+def test_sessions_and_settings_are_saved(open_model):
+    model = open_model()
+    essay = model.add_task("Home", "Essay", "09:00")
+    log_week(model, essay, None)
+    model.set_priority("  Finish the essay ", "🟡")
+    model.data_manager.close()
+
+    reopened = open_model()
+    assert reopened.data["priority"] == "Finish the essay"
+    assert reopened.data["priority_rag"] == "🟡"
+    assert reopened.data["pomodoro_sessions"] == model.data["pomodoro_sessions"]
+    assert reopened.sessions.minutes_by_module(MONDAY) == {"Home": 25, None: 40}
@@ -0,0 +1,119 @@
+import json
+from data_manager import create_task_record
+from model import PlannerModel
+
+
+def snapshot(data_manager):
+    data = data_manager.data
+    return ({name: [tuple(task) for task in tasks] for name, tasks in data["modules"].items()},
+            [rec.to_json() for rec in data["task_history"]], data["timetable"], data["pomodoro_sessions"],
+            data.get("priority"))
+
+
+def test_json_document_migrates_to_sqlite(open_manager, tmp_path):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    model.add_module("Uni")
+    essay = model.add_task("Uni", "Essay", "09:00")
+    model.add_task("Home", "Shopping", "17:30")
+    model.set_statuses("Uni", [essay], "🟢")
+    model.update_timetable({"09:00": "Lecture"})
+    model.log_session("work", 1_700_000_000, 1_700_001_500, essay)
+    model.set_priority("Essay", "🔴")
+    expected = snapshot(data_manager)
+    data_manager.close()
+
+    data_manager = open_manager(backend="sqlite")
+    assert snapshot(data_manager) == expected
+    PlannerModel(data_manager).add_task("Home", "Laundry", "18:00")
+    data_manager.close()
+
+    # The migration runs once: later opens read the database, not data.json
+    assert "Laundry" not in (tmp_path / "data.json").read_text(encoding="utf-8")
+    data_manager = open_manager(backend="sqlite")
+    assert [task.text for task in data_manager.data["modules"]["Home"]] == ["Shopping", "Laundry"]
+
+
+def test_tasks_without_ids_migrate_with_history(open_manager, tmp_path):
+    # Data files from before tasks carried the id of their history record
+    document = {"modules": {"Home": [["Shopping", "🔴"]]}, "timetable": {}, "task_history": [],
+                "pomodoro_sessions": []}
+    (tmp_path / "data.json").write_text(json.dumps(document), encoding="utf-8")
+
+    data_manager = open_manager(backend="sqlite")
+    task = data_manager.data["modules"]["Home"][0]
+    assert data_manager.tasks.records[task.id].text == "Shopping"
+    data_manager.close()
+    data_manager = open_manager(backend="sqlite")
+    assert data_manager.data["modules"]["Home"][0].id == task.id
+
+
+def tasks_in(data_manager):
+    return {name: [task.text for task in tasks] for name, tasks in data_manager.data["modules"].items()}
+
+
+def test_single_task_writes_touch_their_own_rows(open_manager):
+    data_manager = open_manager(backend="sqlite")
+    model = PlannerModel(data_manager)
+    model.add_tasks("Home", [f"Task {number}" for number in range(50)])
+    connection = data_manager.backend.connection
+    for change in (lambda: model.delete_tasks("Home", [model.tasks("Home")[0].id]),
+                   lambda: model.add_task("Home", "Laundry", "18:00")):
+        before = connection.total_changes
+        change()
+        # The task's row, its history row and the stats setting; nothing is renumbered
+        assert connection.total_changes - before <= 3
+
+
+def test_edits_keep_their_order_after_reopening(open_manager):
+    data_manager = open_manager(backend="sqlite")
+    model = PlannerModel(data_manager)
+    model.add_module("Uni")
+    model.add_tasks("Home", ["A", "B", "C", "D", "E"])
+    model.add_tasks("Uni", ["Essay"])
+    ids = {task.text: task.id for task in model.tasks("Home")}
+    model.delete_tasks("Home", [ids["B"]])
+    model.move_tasks("Home", "Uni", [ids["D"], ids["A"]])
+    model.add_task("Home", "F", "09:00")
+    model.undo()
+    model.undo()
+    model.move_tasks("Home", "Uni", [ids["E"]])
+    model.undo()
+    model.redo()
+    expected = tasks_in(data_manager)
+    assert expected["Home"] == ["A", "C", "D"] and expected["Uni"] == ["Essay", "E"]
+    data_manager.close()
+    assert tasks_in(open_manager(backend="sqlite")) == expected
+
+
+def test_old_history_stays_in_the_database(open_manager):
+    data_manager = open_manager(backend="sqlite")
+    model = PlannerModel(data_manager)
+    listed = model.add_task("Home", "Still listed", "09:00")
+    model.set_statuses("Home", [listed], "🟢")
+    records = []
+    for text, completed_at in (("Done long ago", "2020-01-07T10:00:00"), ("Never done", None)):
+        record = create_task_record(text, "Home", "09:00")
+        record["created_at"], record["completed_at"] = "2020-01-06T09:00:00", completed_at
+        records.append(record)
+    data_manager.apply("history_added", records=records)
+    data_manager.tasks.records[listed]["completed_at"] = "2020-01-07T11:00:00"
+    data_manager.save_data()
+    data_manager.close()
+
+    data_manager = open_manager(backend="sqlite", archive_days=30)
+    assert sorted(rec.text for rec in data_manager.data["task_history"]) == ["Never done", "Still listed"]
+    assert len(data_manager.query_history()) == 3
+    # A full save rewrites what was loaded and keeps the rest
+    data_manager.save_data()
+    data_manager.close()
+    assert len(open_manager(backend="sqlite").data["task_history"]) == 3
+
+
+def test_changes_are_backed_up(open_manager):
+    data_manager = open_manager(backend="sqlite", backup_interval=0)
+    PlannerModel(data_manager).add_task("Home", "Laundry", "18:00")
+    assert [task[0] for task in data_manager.backups.restore()["modules"]["Home"]] == ["Laundry"]
+    PlannerModel(data_manager).add_task("Home", "Dishes", "19:00")
+    data_manager.save_data()
+    assert [task[0] for task in data_manager.backups.restore()["modules"]["Home"]] == ["Laundry", "Dishes"]
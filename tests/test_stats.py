@@ -0,0 +1,80 @@
+import json
+from data_manager import create_task_record
+from model import PlannerModel
+from stats import PlannerStats
+
+
+def aggregates(stats):
+    return stats.by_module, stats.by_status, stats.completed_by_day, stats.added_by_day
+
+
+def rebuilt(data):
+    stats = PlannerStats()
+    stats.rebuild(data)
+    return aggregates(stats)
+
+
+def edits(model):
+    """Each step of a session touching every op the stats observe."""
+    def imported():
+        record = create_task_record("Imported", "Uni", "09:00")
+        record["completed_at"] = record["created_at"]
+        model.data_manager.apply("history_added", records=[record])
+
+    ids = {}
+    yield lambda: model.add_module("Uni")
+    yield lambda: ids.update(essay=model.add_task("Uni", "Essay", "09:00"))
+    yield lambda: ids.update(zip(("a", "b", "c"), model.add_tasks("Home", ["A", "B", "C"])))
+    yield lambda: model.cycle_status("Uni", 0)
+    yield lambda: model.set_status("Uni", 0, "🟢")
+    yield lambda: model.set_statuses("Home", [ids["a"], ids["b"]], "🟢")
+    yield lambda: model.set_statuses("Home", [ids["a"], ids["c"]], "🟡")
+    yield lambda: model.rename_task("Home", 1, "B2")
+    yield lambda: model.move_tasks("Home", "Uni", [ids["b"], ids["c"]])
+    yield lambda: model.delete_task("Uni", 0)
+    yield lambda: model.delete_tasks("Uni", [ids["c"]])
+    yield imported
+    yield lambda: model.delete_tasks("Home", [ids["a"]])
+    yield lambda: model.delete_module("Uni")
+
+
+def test_observed_stats_match_a_rebuild_through_undo_and_redo(open_manager):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    stats = data_manager.stats
+    steps = 0
+    for edit in edits(model):
+        edit()
+        steps += 1
+        assert aggregates(stats) == rebuilt(data_manager.data)
+    while model.undo() is not None:
+        assert aggregates(stats) == rebuilt(data_manager.data)
+    while model.redo() is not None:
+        assert aggregates(stats) == rebuilt(data_manager.data)
+    # Every module's tasks were deleted, so none is left counted
+    assert "Uni" not in stats.by_module and "Home" not in stats.by_module
+
+
+def test_saved_stats_load_only_while_the_data_matches(open_manager):
+    data_manager = open_manager()
+    model = PlannerModel(data_manager)
+    for edit in edits(model):
+        edit()
+    model.undo()
+    data_manager.close()
+
+    data = json.loads(open(data_manager.filepath, encoding="utf-8").read())
+    data_manager = open_manager()
+    stats = PlannerStats()
+    assert stats.load(data_manager.data)
+    assert aggregates(stats) == rebuilt(data_manager.data)
+
+    # A task added by hand, or by an older version, makes the checksum stale
+    data["modules"]["Home"].append(["By hand", "🔴", "task_by_hand"])
+    with open(data_manager.filepath, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    data_manager = open_manager()
+    stats = PlannerStats()
+    assert not stats.load(data_manager.data)
+    assert stats.open_tasks("Home") == data_manager.stats.open_tasks("Home") == 1
+    assert aggregates(stats) == rebuilt(data_manager.data)
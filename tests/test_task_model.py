@@ -0,0 +1,57 @@
+import copy
+import json
+import pytest
+from task_model import Task, TaskRecord, compact_data, encode, to_document
+
+CANONICAL = {"id": "task_1", "text": "Essay", "module": "Uni", "created_at": "2026-10-19T09:00:00",
+             "completed_at": "2026-10-19T17:45:12.250000", "scheduled_time": "09:00"}
+
+
+@pytest.mark.parametrize("rec", [
+    CANONICAL,
+    # Keys beyond RECORD_KEYS
+    {**CANONICAL, "due": "2026-10-19", "rule": "rule_1", "notes": {"tags": ["a", "b"]}},
+    # Timestamps to_iso() would write differently
+    {**CANONICAL, "created_at": "2026-10-19T09:00:00+02:00", "completed_at": "2026-10-19T17:00:00.000000"},
+    {**CANONICAL, "created_at": "2026-10-19", "completed_at": "2026-10-19T17:00"},
+    {**CANONICAL, "created_at": "yesterday", "completed_at": ""},
+    # Keys the record never had
+    {"id": "task_2", "text": "Old", "module": "Home", "created_at": "2020-01-06T09:00:00"},
+    {"id": "task_3", "text": "Odd", "module": "Home", "due": None},
+])
+def test_record_round_trips(rec):
+    record = TaskRecord.from_json(copy.deepcopy(rec))
+    assert record.to_json() == rec
+    assert record == rec
+    assert copy.deepcopy(record).to_json() == rec
+    assert dict(record.items()) == rec
+
+
+def test_absent_key_reads_as_none_until_set():
+    record = TaskRecord.from_json({"id": "task_2", "text": "Old", "module": "Home"})
+    assert record["completed_at"] is None and record.get("scheduled_time", "-") == "-"
+    assert "scheduled_time" not in record
+    record["scheduled_time"] = "10:00"
+    record["completed_at"] = "2026-10-19T10:00:00"
+    assert record.to_json() == {"id": "task_2", "text": "Old", "module": "Home",
+                                "completed_at": "2026-10-19T10:00:00", "scheduled_time": "10:00"}
+    # Set on the slot directly, as the merge and the views do
+    record.created = 0.0
+    assert record.to_json()["created_at"] == "1970-01-01T00:00:00"
+
+
+def test_task_reads_like_its_list():
+    task = Task("Essay", "🟡", "task_1")
+    assert (task[0], task[1], task[2], task[-1], task[:2]) == ("Essay", "🟡", "task_1", "task_1", ("Essay", "🟡"))
+    assert Task("Odd", "⭐", "task_2")[1] == "⭐"
+
+
+def test_document_saves_as_loaded():
+    document = {"modules": {"Home": [["Essay", "🟢", "task_1"], ["Odd", "⭐", "task_2"]]}, "timetable": {},
+                "task_history": [CANONICAL, {"id": "task_2", "text": "Odd", "module": "Home", "extra": 1}],
+                "pomodoro_sessions": []}
+    text = json.dumps(document, indent=4, ensure_ascii=False)
+    data = json.loads(text)
+    compact_data(data)
+    assert json.dumps(to_document(data), indent=4, ensure_ascii=False) == text
+    assert json.dumps(data, indent=4, ensure_ascii=False, default=encode) == text
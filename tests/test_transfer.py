@@ -0,0 +1,100 @@
+import csv
+import pytest
+from data_manager import create_task_record
+from transfer import export_file, import_file, import_history, import_tasks
+
+
+def old_record(text):
+    record = create_task_record(text, "Home", "09:00")
+    record["created_at"] = "2020-01-06T09:00:00"
+    record["completed_at"] = "2020-01-07T10:00:00"
+    return record
+
+
+def test_history_import_skips_archived_ids(open_manager, tmp_path):
+    data_manager = open_manager()
+    data_manager.apply("history_added", records=[old_record("Essay"), old_record("Lab report")])
+    assert data_manager.archive_history(days=30) == 2
+    assert data_manager.tasks.records == {}
+
+    path = str(tmp_path / "history.csv")
+    assert export_file(data_manager, "history", path) == 2
+    assert import_file(data_manager, "history", path) == 0
+    assert data_manager.data["task_history"] == []
+
+
+def test_history_import_keeps_new_ids(open_manager):
+    data_manager = open_manager()
+    rows = [{"id": "task_1", "module": "Home", "text": "Essay", "scheduled_time": "09:00",
+             "created_at": "2020-01-06T09:00:00", "completed_at": ""}]
+    assert import_history(data_manager, rows) == 1
+    assert import_history(data_manager, rows) == 0
+    assert data_manager.tasks.records["task_1"].text == "Essay"
+
+
+def test_task_import_skips_bad_times(open_manager, tmp_path, capsys):
+    data_manager = open_manager()
+    path = tmp_path / "tasks.csv"
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, ["module", "text", "scheduled_time"])
+        writer.writeheader()
+        writer.writerows([{"module": "Uni", "text": "Lecture", "scheduled_time": "9:00"},
+                          {"module": "Uni", "text": "Seminar", "scheduled_time": "9am"},
+                          {"module": "Uni", "text": "Lab", "scheduled_time": ""}])
+    assert import_file(data_manager, "tasks", str(path)) == 2
+    assert "Skipped row 2" in capsys.readouterr().out
+    records = data_manager.tasks.records
+    assert [(task.text, records[task.id].scheduled_time) for task in data_manager.data["modules"]["Uni"]] == [
+        ("Lecture", "09:00"), ("Lab", None)]
+
+
+def test_task_import_batches(open_manager):
+    data_manager = open_manager()
+    rows = [{"text": f"Task {number}", "scheduled_time": "08:30"} for number in range(7)]
+    assert import_tasks(data_manager, rows, module="Uni", batch_size=3) == 7
+    assert len(data_manager.data["modules"]["Uni"]) == 7
+
+
+def test_ics_round_trip_keeps_minutes(open_manager, tmp_path):
+    data_manager = open_manager()
+    data_manager.apply("tasks_added", module="Home",
+                       tasks=[("Seminar", "🔴", create_task_record("Seminar", "Home", "09:30"))])
+    path = str(tmp_path / "tasks.ics")
+    assert export_file(data_manager, "tasks", path) == 1
+
+    data_manager = open_manager("other.json")
+    assert import_file(data_manager, "tasks", path) == 1
+    task = data_manager.data["modules"]["Home"][-1]
+    assert data_manager.tasks.records[task.id].scheduled_time == "09:30"
+
+
+def test_failed_export_leaves_the_file(open_manager, tmp_path):
+    path = tmp_path / "history.ics"
+    path.write_text("kept", encoding="utf-8")
+    with pytest.raises(ValueError):
+        export_file(open_manager(), "history", str(path))
+    assert path.read_text(encoding="utf-8") == "kept"
+
+
+def test_history_import_checks_archived_ids_per_batch(open_manager):
+    data_manager = open_manager()
+    records = [old_record(f"Essay {number}") for number in range(5)]
+    data_manager.apply("history_added", records=records)
+    assert data_manager.archive_history(days=30) == 5
+    rows = [record.to_json() for record in records]
+    rows.insert(2, {**rows[0], "id": "task_new", "text": "New"})
+    assert import_history(data_manager, rows, batch_size=2) == 1
+    assert list(data_manager.tasks.records) == ["task_new"]
+
+
+def test_completed_ics_task_imports_as_done(open_manager, tmp_path):
+    path = tmp_path / "tasks.ics"
+    path.write_text("BEGIN:VCALENDAR\r\nBEGIN:VTODO\r\nUID:1@elsewhere\r\nDTSTART:20261019T093000\r\n"
+                    "SUMMARY:Essay\r\nCATEGORIES:Uni\r\nSTATUS:COMPLETED\r\nX-PLANNER-STATUS:🔴\r\n"
+                    "END:VTODO\r\nEND:VCALENDAR\r\n", encoding="utf-8")
+    data_manager = open_manager()
+    assert import_file(data_manager, "tasks", str(path)) == 1
+    task = data_manager.data["modules"]["Uni"][0]
+    assert task[1] == "🟢"
+    assert data_manager.tasks.records[task.id]["completed_at"] == "2026-10-19T09:30:00"
+    assert data_manager.stats.open_tasks("Uni") == 0
@@ -0,0 +1,114 @@
+import copy
+from datetime import date
+from model import PlannerModel
+from undo import UndoStack
+
+DAY = date(2026, 3, 2)
+
+
+class Recorder:
+    """Stands in for DataManager, keeping the operations applied to it."""
+
+    def __init__(self):
+        self.applied = []
+
+    def apply(self, op, **record):
+        self.applied.append((op, record))
+
+
+def push(stack, label, size=1):
+    stack.push(label, [("forward", {"label": label})], [("inverse", {"label": label})], size)
+
+
+def test_undo_and_redo_apply_the_recorded_operations():
+    recorder = Recorder()
+    stack = UndoStack(recorder)
+    push(stack, "first")
+    push(stack, "second")
+    assert stack.undo() == "second"
+    assert stack.redo() == "second"
+    assert stack.redo() is None
+    assert recorder.applied == [("inverse", {"label": "second"}), ("forward", {"label": "second"})]
+
+
+def test_a_new_change_clears_redo():
+    stack = UndoStack(Recorder())
+    push(stack, "first", 3)
+    push(stack, "second", 2)
+    stack.undo()
+    assert stack.can_redo()
+    push(stack, "third", 4)
+    assert not stack.can_redo()
+    assert stack.size == 7
+    assert [stack.undo(), stack.undo(), stack.undo()] == ["third", "first", None]
+
+
+def test_the_oldest_commands_go_past_the_limit():
+    stack = UndoStack(Recorder(), limit=5)
+    for label in "abc":
+        push(stack, label, 2)
+    assert [command.label for command in stack.undo_commands] == ["b", "c"]
+    assert stack.size == 4
+    # The newest command is kept however large it is
+    push(stack, "huge", 50)
+    assert [command.label for command in stack.undo_commands] == ["huge"]
+    assert stack.undo() == "huge" and stack.undo() is None
+
+
+def test_redone_records_are_not_shared_with_the_data():
+    recorder = Recorder()
+    stack = UndoStack(recorder)
+    record = {"id": "t1", "completed_at": None}
+    stack.push("add", [("history_added", {"records": [record]})], [("tasks_removed", {"task_ids": ["t1"]})])
+    record["completed_at"] = "2026-03-02T10:00:00"
+    stack.undo()
+    stack.redo()
+    assert recorder.applied[-1][1]["records"][0]["completed_at"] is None
+
+
+def state(model):
+    data = model.data
+    return copy.deepcopy({"modules": data["modules"], "task_history": data["task_history"],
+                          "timetable": data["timetable"], "recurring": data["recurring"],
+                          "day": model.data_manager.days.day(DAY)})
+
+
+def test_every_edit_undoes_and_redoes(open_manager):
+    model = PlannerModel(open_manager())
+    before = state(model)
+    slot = next(iter(model.timetable()))
+    edits = [
+        ("add module 'Uni'", lambda: model.add_module("Uni")),
+        ("add task", lambda: model.add_task("Uni", "Essay", "09:30")),
+        ("add task", lambda: model.add_task("Uni", "Lab", "11:00")),
+        ("rename task", lambda: model.rename_task("Uni", 0, "Essay draft")),
+        ("change status", lambda: model.set_status("Uni", 0, "🟢")),
+        ("change status", lambda: model.cycle_status("Uni", 1)),
+        ("delete task", lambda: model.delete_task("Uni", 0)),
+        ("edit timetable", lambda: model.update_timetable({slot: "Lecture"})),
+        (f"edit timetable for {DAY}", lambda: model.update_day(DAY, {slot: "Exam"})),
+        ("repeat 'Gym'", lambda: model.add_rule("Uni", "Gym", "daily")),
+        ("delete module 'Uni'", lambda: model.delete_module("Uni")),
+    ]
+    for _, edit in edits:
+        edit()
+    after = state(model)
+    assert "Uni" not in model.data["modules"]
+
+    for label, _ in reversed(edits):
+        assert model.undo() == label
+    assert state(model) == before
+
+    for label, _ in edits:
+        assert model.redo() == label
+    assert state(model) == after
+
+
+def test_unchanged_edits_are_not_recorded(open_manager):
+    model = PlannerModel(open_manager())
+    task_id = model.add_task("Home", "Laundry", "18:00")
+    index = model.find_task(task_id)[1]
+    model.rename_task("Home", index, "  Laundry ")
+    assert model.update_timetable(dict(model.timetable())) == {}
+    assert model.undo() == "add task"
+    assert not model.undo_stack.can_undo()
@@ -0,0 +1,380 @@
+"""Streaming import and export of tasks, task history and the timetable.
+
+Formats are CSV, JSON Lines and iCalendar (.ics; timetable slots as daily
+events, scheduled tasks as to-dos), chosen by file extension. Records pass
+through generators one at a time, so a multi-million-row history export
+never builds a list. Imports create their records with create_task_record
+and commit every IMPORT_BATCH rows as one write.
+
+Usage: python transfer.py export tasks|history|timetable OUT [--file data.json] [--backend json|sqlite]
+       python transfer.py import tasks|history|timetable IN [--module NAME] [--file data.json]
+"""
+import argparse
+import csv
+import json
+from datetime import date, datetime, timezone
+from itertools import islice
+from data_manager import DataManager, create_task_record
+from model import DONE, STATUSES
+from task_model import clock_text
+
+IMPORT_BATCH = 5000
+TASK_FIELDS = ("id", "module", "text", "status", "scheduled_time", "created_at", "completed_at")
+HISTORY_FIELDS = ("id", "module", "text", "scheduled_time", "created_at", "completed_at")
+TIMETABLE_FIELDS = ("slot", "text")
+FIELDS = {"tasks": TASK_FIELDS, "history": HISTORY_FIELDS, "timetable": TIMETABLE_FIELDS}
+
+
+# === Records ===
+def iter_tasks(data_manager):
+    records = data_manager.tasks.records
+    for module, tasks in list(data_manager.data["modules"].items()):
+        for text, status, task_id in list(tasks):
+            rec = records.get(task_id, {})
+            yield {"id": task_id, "module": module, "text": text, "status": status,
+                   "scheduled_time": rec.get("scheduled_time"), "created_at": rec.get("created_at"),
+                   "completed_at": rec.get("completed_at")}
+
+def iter_timetable(data_manager):
+    for slot, text in sorted(data_manager.data["timetable"].items()):
+        if text:
+            yield {"slot": slot, "text": text}
+
+def iter_records(data_manager, kind):
+    if kind == "tasks":
+        return iter_tasks(data_manager)
+    if kind == "history":
+        return data_manager.iter_history()
+    return iter_timetable(data_manager)
+
+
+# === CSV and JSON Lines ===
+def write_csv(rows, file, fields):
+    writer = csv.DictWriter(file, fields, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_jsonl(rows, file):
+    count = 0
+    for row in rows:
+        file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+def read_csv(file):
+    for row in csv.DictReader(file):
+        # Empty cells mean "not set", as None does in the other formats
+        yield {key: value or None for key, value in row.items()}
+
+def read_jsonl(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+# === iCalendar ===
+def _escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def _unescape(text):
+    out, chars = [], iter(text)
+    for char in chars:
+        if char == "\\":
+            char = next(chars, "")
+            char = "\n" if char in "nN" else char
+        out.append(char)
+    return "".join(out)
+
+def _fold(line):
+    """Split a content line into 75-octet pieces (RFC 5545 3.1)."""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    pieces, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never cut inside a multi-byte character
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        pieces.append(encoded[start:end].decode("utf-8"))
+        start, limit = end, 74
+    return "\r\n ".join(pieces) + "\r\n"
+
+def _local_stamp(moment):
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+def _utc_stamp(iso):
+    return datetime.fromisoformat(iso).astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def _parse_stamp(value):
+    """Local ISO string for an iCalendar DATE-TIME (UTC ones converted to local time)."""
+    if value.endswith("Z"):
+        moment = datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        return moment.astimezone().replace(tzinfo=None).isoformat()
+    if "T" not in value:
+        return datetime.strptime(value, "%Y%m%d").isoformat()
+    return datetime.strptime(value[:15], "%Y%m%dT%H%M%S").isoformat()
+
+def _ics_components(rows, kind):
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    if kind == "timetable":
+        today = date.today()
+        for row in rows:
+            start = datetime.combine(today, datetime.strptime(row["slot"], "%H:%M").time())
+            yield ["BEGIN:VEVENT", f"UID:slot-{row['slot'].replace(':', '')}@planner", f"DTSTAMP:{stamp}",
+                   f"DTSTART:{_local_stamp(start)}", "DURATION:PT1H", "RRULE:FREQ=DAILY",
+                   f"SUMMARY:{_escape(row['text'])}", "END:VEVENT"]
+        return
+    for row in rows:
+        if not row.get("scheduled_time") or not row.get("created_at"):
+            continue
+        day = datetime.fromisoformat(row["created_at"]).date()
+        start = datetime.combine(day, datetime.strptime(row["scheduled_time"], "%H:%M").time())
+        lines = ["BEGIN:VTODO", f"UID:{row['id']}@planner", f"DTSTAMP:{stamp}",
+                 f"DTSTART:{_local_stamp(start)}", f"SUMMARY:{_escape(row['text'])}",
+                 f"CATEGORIES:{_escape(row['module'])}"]
+        if row.get("completed_at"):
+            lines += ["STATUS:COMPLETED", f"COMPLETED:{_utc_stamp(row['completed_at'])}"]
+        else:
+            lines.append("STATUS:NEEDS-ACTION")
+        if row.get("status"):
+            lines.append(f"X-PLANNER-STATUS:{row['status']}")
+        yield lines + ["END:VTODO"]
+
+def write_ics(rows, file, kind):
+    file.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Planner//Planner//EN\r\n")
+    count = 0
+    for lines in _ics_components(rows, kind):
+        file.write("".join(_fold(line) for line in lines))
+        count += 1
+    file.write("END:VCALENDAR\r\n")
+    return count
+
+def _unfolded(file):
+    line = None
+    for raw in file:
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and line is not None:
+            line += raw[1:]
+            continue
+        if line is not None:
+            yield line
+        line = raw
+    if line is not None:
+        yield line
+
+def read_ics(file):
+    """Yield VEVENT and VTODO components as {"type": ..., NAME: value} with parameters dropped."""
+    component = None
+    for line in _unfolded(file):
+        name, _, value = line.partition(":")
+        name = name.split(";", 1)[0].upper()
+        if name == "BEGIN" and value in ("VEVENT", "VTODO"):
+            component = {"type": value}
+        elif name == "END" and component is not None and value == component["type"]:
+            yield component
+            component = None
+        elif component is not None:
+            component[name] = _unescape(value)
+
+def ics_rows(components, kind):
+    """Turn iCalendar components into timetable or task rows."""
+    for component in components:
+        start = component.get("DTSTART")
+        if not start or "SUMMARY" not in component:
+            continue
+        start = _parse_stamp(start)
+        if kind == "timetable":
+            if component["type"] == "VEVENT":
+                yield {"slot": f"{start[11:13] or '00'}:00", "text": component["SUMMARY"]}
+            continue
+        completed = component.get("COMPLETED")
+        yield {"module": component.get("CATEGORIES", "").split(",")[0] or None,
+               "text": component["SUMMARY"], "status": component.get("X-PLANNER-STATUS"),
+               "scheduled_time": clock_text(start[11:16]), "created_at": start,
+               "completed_at": _parse_stamp(completed) if completed else
+               (start if component.get("STATUS") == "COMPLETED" else None)}
+
+
+# === Import ===
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _record(row, module):
+    """A TaskRecord for row; raises ValueError if its scheduled_time is not HH:MM."""
+    scheduled_time = row.get("scheduled_time")
+    record = create_task_record(row["text"].strip(), module, clock_text(scheduled_time) if scheduled_time else None)
+    for key in ("created_at", "completed_at"):
+        if row.get(key):
+            record[key] = row[key]
+    return record
+
+def _archived(data_manager, rows):
+    """Ids of rows already in the archive.
+
+    Records are archived by the month they were completed in, so only
+    those months' files are read, and only the rows' ids are kept.
+    """
+    months = {}
+    for _, row in rows:
+        if row.get("id") and row.get("completed_at"):
+            months.setdefault(row["completed_at"][:7], set()).add(row["id"])
+    archived = set()
+    for month, ids in months.items():
+        archived.update(rec["id"] for rec in data_manager.iter_archived_history(month, month) if rec["id"] in ids)
+    return archived
+
+def import_tasks(data_manager, rows, module=None, batch_size=IMPORT_BATCH):
+    """Add a task per row (module, text, optional status and times); returns the count added.
+
+    Each batch is applied as one tasks_added per module and written once.
+    Rows without a module go to module, or Home, and rows with a
+    completed_at are 🟢. Rows with a scheduled_time that is not HH:MM are
+    skipped and reported.
+    """
+    count = 0
+    for chunk in _chunks(enumerate(rows, 1), batch_size):
+        by_module = {}
+        for number, row in chunk:
+            if not (row.get("text") or "").strip():
+                continue
+            name = (row.get("module") or module or "Home").strip()
+            try:
+                record = _record(row, name)
+            except ValueError as exception:
+                print(f"Skipped row {number}: {exception}")
+                continue
+            # A completed task is done whatever status it was exported with
+            status = row.get("status")
+            if record["completed_at"]:
+                status = DONE
+            elif status not in STATUSES:
+                status = STATUSES[0]
+            by_module.setdefault(name, []).append((record["text"], status, record))
+        with data_manager.batch():
+            for name, tasks in by_module.items():
+                if name not in data_manager.data["modules"]:
+                    data_manager.apply("module_added", name=name)
+                data_manager.apply("tasks_added", module=name, tasks=tasks)
+                count += len(tasks)
+    return count
+
+def import_history(data_manager, rows, batch_size=IMPORT_BATCH):
+    """Add history records (e.g. from another planner's export); returns the count added.
+
+    A row's id is kept unless it is already taken, live or archived, so
+    importing the same export twice adds nothing the second time. Rows with
+    a scheduled_time that is not HH:MM are skipped and reported.
+    """
+    count = 0
+    for chunk in _chunks(enumerate(rows, 1), batch_size):
+        records, seen, archived = [], set(), _archived(data_manager, chunk)
+        for number, row in chunk:
+            if not (row.get("text") or "").strip():
+                continue
+            task_id = row.get("id")
+            if task_id in data_manager.tasks.records or task_id in archived or task_id in seen:
+                continue
+            try:
+                record = _record(row, (row.get("module") or "Home").strip())
+            except ValueError as exception:
+                print(f"Skipped row {number}: {exception}")
+                continue
+            if row.get("id"):
+                record["id"] = row["id"]
+            seen.add(record["id"])
+            records.append(record)
+        if records:
+            data_manager.apply("history_added", records=records)
+            count += len(records)
+    return count
+
+def import_timetable(data_manager, rows):
+    """Set the slots in rows; returns the number changed."""
+    timetable = data_manager.data["timetable"]
+    slots = {}
+    for row in rows:
+        text = (row.get("text") or "").strip()
+        if row.get("slot") and text != timetable.get(row["slot"], ""):
+            slots[row["slot"]] = text
+    if slots:
+        data_manager.apply("timetable_changed", slots=slots)
+    return len(slots)
+
+
+# === Files ===
+def _format(path):
+    extension = path.rsplit(".", 1)[-1].lower()
+    if extension not in ("csv", "jsonl", "ics"):
+        raise ValueError(f"Unknown format '.{extension}': use .csv, .jsonl or .ics")
+    return extension
+
+def export_file(data_manager, kind, path):
+    """Write tasks, history or timetable to path; returns the number of records written."""
+    extension = _format(path)
+    if kind not in FIELDS:
+        raise ValueError(f"Unknown kind '{kind}': use tasks, history or timetable")
+    # Checked before the file is opened, which would empty it
+    if kind == "history" and extension == "ics":
+        raise ValueError("History has no calendar form; export tasks or timetable to .ics")
+    rows = iter_records(data_manager, kind)
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        if extension == "csv":
+            return write_csv(rows, file, FIELDS[kind])
+        if extension == "jsonl":
+            return write_jsonl(rows, file)
+        return write_ics(rows, file, kind)
+
+def import_file(data_manager, kind, path, module=None):
+    extension = _format(path)
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if extension == "csv":
+            rows = read_csv(file)
+        elif extension == "jsonl":
+            rows = read_jsonl(file)
+        else:
+            rows = ics_rows(read_ics(file), kind)
+        if kind == "tasks":
+            return import_tasks(data_manager, rows, module)
+        if kind == "history":
+            return import_history(data_manager, rows)
+        return import_timetable(data_manager, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export planner data")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("kind", choices=["tasks", "history", "timetable"])
+    parser.add_argument("path", help="a .csv, .jsonl or .ics file")
+    parser.add_argument("--module", help="module for imported tasks that do not name one")
+    parser.add_argument("--file", default="data.json")
+    parser.add_argument("--backend", default="json", choices=["json", "sqlite"])
+    args = parser.parse_args()
+
+    # Write-behind, so a long import is saved every few batches rather than after each
+    data_manager = DataManager(args.file, journal=True, backend=args.backend, archive_days=None)
+    try:
+        if args.command == "export":
+            count = export_file(data_manager, args.kind, args.path)
+            print(f"Exported {count} {args.kind} records to {args.path}")
+        else:
+            count = import_file(data_manager, args.kind, args.path, args.module)
+            print(f"Imported {count} {args.kind} records from {args.path}")
+    except (OSError, ValueError, KeyError) as exception:
+        print(f"Error: {exception}")
+    finally:
+        data_manager.close()
+
+
+if __name__ == "__main__":
+    main()
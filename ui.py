@@ -1,48 +1,80 @@
+import time
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
 from functools import partial
-from datetime import datetime, timedelta
-import uuid
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from datetime import date, datetime, timedelta
 from utils import *
-
-# Add task history logging helper
-def create_task_record(task_text, module_name, scheduled_time=None):
-    return {
-        "id": f"task_{int(datetime.now().timestamp())}_{uuid.uuid4().hex[:6]}",
-        "text": task_text,
-        "module": module_name,
-        "created_at": datetime.now().isoformat(),
-        "completed_at": None,
-        "scheduled_time": scheduled_time
-    }
-
-def guess_scheduled_time():
-    hour = datetime.now().hour
-    return f"{hour:02d}:00"
-
+from model import PlannerModel, next_status, STATUSES
+from next_up import NEXT_UP_COUNT, NextUpQueue, due_time
+from profiling import span, timed
+from task_list_view import TaskListView
+from search import SearchIndex
+from recurrence import DAY_NAMES, describe
+from reminders import ReminderQueue
+from task_model import to_date
+
+# How often to look for changes saved by another Planner window (ms)
+WATCH_INTERVAL = 2000
+# Longest single wait for the next reminder, so a suspended machine or a
+# clock change is caught up with (ms)
+REMINDER_MAX_WAIT = 15 * 60 * 1000
+REMINDER_SHOW_MS = 60 * 1000
 
 class PlannerUI:
-    def __init__(self, root, data_manager, on_closing):
+    def __init__(self, root, data_manager, on_closing, lazy_tabs=True):
         self.root = root
         self.data_manager = data_manager
+        self.model = PlannerModel(data_manager)
         self.on_closing = on_closing
+        self.lazy_tabs = lazy_tabs
         self.tab_frames = {}
+        # Tab widget name -> builder for tabs not opened yet
+        self.pending_tabs = {}
+        self.analytics_tab = None
+        self.profiler_overlay = None
+        self.analytics = None
+        self.task_views = {}
+        self.timetable_entries = {}
+        self.timetable_vars = {}
+        # The date the timetable panel shows (None for the template) and the
+        # text it was loaded with, so Save writes only what was edited
+        self.timetable_day = date.today()
+        self.timetable_shown = {}
+        # Built the first time the search box is used
+        self.search_index = None
+        self.search_matches = []
         self.priority_rag = data_manager.data.get("priority_rag", "🔴")
         self.priority_var = tk.StringVar(value=data_manager.data.get("priority", ""))
+        # Recurring tasks are generated once per day, starting before the tabs are built
+        self.today = date.today()
+        self.reminders = None
+        # Ids of the tasks listed under Next Up, in order
+        self.next_up = None
+        self.next_up_ids = []
+        # The single pending after() for the next reminder, and its time
+        self.reminder_job = None
+        self.reminder_at = None
+        self.reminder_lines = []
+        self.reminder_hide_job = None
 
     def build(self):
         self.root.title("Planner")
         self.root.state("zoomed")
         self.root.config(bg=BG_COLOUR)
 
+        self.model.generate_recurring(self.today)
+        # Registered before the UI's own listener, so arm_reminders sees the update
+        self.reminders = ReminderQueue(self.data_manager)
+        self.next_up = NextUpQueue(self.data_manager)
         self.setup_styles()
         self.create_heading()
         self.create_notebook_with_add_button()
         self.create_home_tab()
         self.load_module_tabs()
+        self.create_analytics_tab()
         self.bind_events()
+        self.root.after(WATCH_INTERVAL, self.watch_data_file)
+        self.arm_reminders()
 
     def setup_styles(self):
         style = ttk.Style()
@@ -69,11 +101,228 @@ class PlannerUI:
             font=FONT, bg=BG_COLOUR, fg=TEXT
         ).pack()
 
+        search_frame = tk.Frame(heading_frame, bg=BG_COLOUR)
+        search_frame.pack(pady=(8, 0))
+        tk.Label(search_frame, text="🔍", font=FONT, bg=BG_COLOUR, fg=TEXT).pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_var,
+                                     font=(FONT_NAME, 11), relief="solid", bd=2, width=50)
+        self.search_entry.pack(side="left", ipady=2)
+        self.undo_button = tk.Button(search_frame, text="↶ Undo", command=self.undo,
+                                     bg=ACCENT, fg="white", font=(FONT_NAME, 9, "bold"), relief="flat")
+        self.undo_button.pack(side="left", padx=(10, 2))
+        self.redo_button = tk.Button(search_frame, text="↷ Redo", command=self.redo,
+                                     bg=ACCENT, fg="white", font=(FONT_NAME, 9, "bold"), relief="flat")
+        self.redo_button.pack(side="left", padx=2)
+        self.search_results = tk.Listbox(self.root, font=(FONT_NAME, 10), height=8, activestyle="none")
+        self.reminder_banner = tk.Label(self.root, font=TITLE_FONT, bg=HIGHLIGHT_COLOUR, fg="white",
+                                        justify="left", padx=15, pady=8, cursor="hand2")
+        self.reminder_banner.bind("<Button-1>", self.hide_reminders)
+
         self.update_clock()
 
     def update_clock(self):
         self.time_label.config(text=f"📅 {get_current_time_str()}")
-        self.root.after(60000, self.update_clock)
+        if date.today() != self.today:
+            if self.timetable_day == self.today and not self.timetable_edited():
+                self.show_timetable(date.today())
+            self.today = date.today()
+            if self.model.generate_recurring(self.today):
+                self.sync_with_data()
+            # Slot reminders look only at today and tomorrow
+            self.reminders.rebuild()
+            self.arm_reminders()
+            self.update_next_up()
+        # Tick on the minute boundary so the clock never lags the real time
+        now = datetime.now()
+        self.root.after(60000 - now.second * 1000 - now.microsecond // 1000, self.update_clock)
+
+    # === Reminders ===
+    def arm_reminders(self):
+        """Point the one reminder timer at the earliest reminder, if that has changed."""
+        when = self.reminders.next_time()
+        if when == self.reminder_at and self.reminder_job is not None:
+            return
+        if self.reminder_job is not None:
+            self.root.after_cancel(self.reminder_job)
+            self.reminder_job = None
+        self.reminder_at = when
+        if when is not None:
+            delay = min(max(0, int((when - time.time()) * 1000)), REMINDER_MAX_WAIT)
+            self.reminder_job = self.root.after(delay, self.fire_reminders)
+
+    def fire_reminders(self):
+        self.reminder_job = None
+        for _, text in self.reminders.pop_due():
+            self.show_reminder(text)
+        self.arm_reminders()
+
+    def show_reminder(self, text):
+        self.root.bell()
+        self.reminder_lines = (self.reminder_lines + [f"⏰ {text}"])[-5:]
+        self.reminder_banner.config(text="\n".join(self.reminder_lines))
+        self.reminder_banner.place(relx=1.0, y=10, x=-20, anchor="ne")
+        self.reminder_banner.lift()
+        if self.reminder_hide_job is not None:
+            self.root.after_cancel(self.reminder_hide_job)
+        self.reminder_hide_job = self.root.after(REMINDER_SHOW_MS, self.hide_reminders)
+
+    def hide_reminders(self, event=None):
+        if self.reminder_hide_job is not None:
+            self.root.after_cancel(self.reminder_hide_job)
+            self.reminder_hide_job = None
+        self.reminder_lines = []
+        self.reminder_banner.place_forget()
+
+    # === Search ===
+    def handle_search_key(self, event):
+        if event.keysym in ("Up", "Down", "Return", "Escape"):
+            return
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            self.search_index.build(self.model.data)
+            self.data_manager.listeners.append(self.search_index.handle_data_changed)
+        self.search_matches = self.search_index.search(self.search_var.get())
+        self.search_results.delete(0, "end")
+        for _, kind, key, title, module in self.search_matches:
+            if kind == "task":
+                label = f"📝 {module} › {title}"
+            elif kind == "module":
+                label = f"📁 {title}"
+            elif kind == "slot":
+                label = f"🕒 {key} › {title}"
+            else:
+                label = f"📜 {module} › {title}"
+            self.search_results.insert("end", label)
+        if self.search_matches:
+            self.search_results.place(in_=self.search_entry, relx=0, rely=1, relwidth=1)
+            self.search_results.lift()
+        else:
+            self.hide_search_results()
+
+    def hide_search_results(self, event=None):
+        self.search_results.place_forget()
+
+    def focus_search_results(self, event):
+        if self.search_matches:
+            self.search_results.focus_set()
+            self.search_results.selection_clear(0, "end")
+            self.search_results.selection_set(0)
+            self.search_results.activate(0)
+
+    def handle_search_choice(self, event):
+        if event.widget is self.search_results:
+            selection = self.search_results.curselection()
+            position = selection[0] if selection else 0
+        else:
+            position = 0
+        if position < len(self.search_matches):
+            self.open_search_result(self.search_matches[position])
+        self.hide_search_results()
+
+    def open_search_result(self, result):
+        _, kind, key, _, module = result
+        if kind == "task":
+            self.show_task(key)
+        elif kind == "slot":
+            self.show_tab("Home")
+            if self.timetable_day is not None:
+                self.go_to_timetable(None)
+            entry = self.timetable_entries.get(key)
+            if entry is not None:
+                entry.focus_set()
+                entry.select_range(0, "end")
+        else:
+            # History of a deleted or archived task: open the module it was in
+            self.show_tab(module)
+
+    def show_task(self, task_id):
+        """Open the tab holding a task and select it there."""
+        location = self.model.find_task(task_id)
+        if location is None:
+            return
+        module, index = location
+        self.show_tab(module)
+        if module in self.task_views:
+            self.root.update_idletasks()
+            self.task_views[module].highlight(index)
+
+    def show_tab(self, name):
+        """Select a module's tab, building its content now if it is still pending."""
+        tab = self.tab_frames.get(name)
+        if tab is None:
+            return
+        self.notebook.select(tab)
+        self.build_pending_tab(str(tab))
+
+    # === Undo ===
+    def undo(self, event=None):
+        if self.model.undo() is None:
+            self.root.bell()
+        else:
+            self.sync_with_data()
+
+    def redo(self, event=None):
+        if self.model.redo() is None:
+            self.root.bell()
+        else:
+            self.sync_with_data()
+
+    @timed("ui.sync")
+    def sync_with_data(self):
+        """Bring tabs, task lists and the timetable in line with the data after undo or redo."""
+        modules = self.model.data["modules"]
+        for name in [name for name in self.tab_frames if name != "Home" and name not in modules]:
+            self.remove_module_tab(name)
+        for name, tasks in modules.items():
+            if name not in self.tab_frames:
+                self.add_module_tab(name, tasks)
+        for view in self.task_views.values():
+            view.refresh()
+        self.refresh_timetable()
+
+    # === Other instances ===
+    def watch_data_file(self):
+        self.data_manager.poll_external()
+        if self.timetable_day is not None and self.data_manager.days.stale(self.timetable_day):
+            self.refresh_timetable(keep_edits=True)
+        self.root.after(WATCH_INTERVAL, self.watch_data_file)
+
+    def apply_external_changes(self, changes):
+        """Update only the widgets showing what another window changed."""
+        modules = self.model.data["modules"]
+        for name in changes["removed"]:
+            if name in self.tab_frames and name != "Home":
+                self.remove_module_tab(name)
+        for name in changes["added"]:
+            if name not in self.tab_frames:
+                self.add_module_tab(name, modules[name])
+        for name in changes["modules"]:
+            if name in self.task_views:
+                self.task_views[name].refresh()
+        if changes["slots"]:
+            self.refresh_timetable(keep_edits=True)
+        if "priority" in changes["settings"]:
+            self.priority_var.set(self.model.data.get("priority", ""))
+        if "priority_rag" in changes["settings"]:
+            self.priority_rag = self.model.data.get("priority_rag", "🔴")
+            self.rag_button.config(text=self.priority_rag)
+            set_rag_color(self.rag_button, self.priority_rag)
+        if changes["sessions"]:
+            self.update_focus_label()
+        if changes["modules"] or changes["added"] or changes["removed"] or changes["slots"]:
+            # Undo records positions in the data as it was before the merge
+            self.model.undo_stack.clear()
+            if self.search_index is not None:
+                self.data_manager.listeners.remove(self.search_index.handle_data_changed)
+                self.search_index = None
+        if changes["conflicts"]:
+            shown = "\n".join(changes["conflicts"][:10])
+            more = len(changes["conflicts"]) - 10
+            if more > 0:
+                shown += f"\n…and {more} more"
+            messagebox.showwarning("Changes Merged",
+                                   f"Another Planner window changed the same items. Your version was kept for:\n{shown}")
 
     def create_notebook_with_add_button(self):
         notebook_frame = tk.Frame(self.root, bg=BG_COLOUR)
@@ -126,17 +375,34 @@ class PlannerUI:
         set_rag_color(self.rag_button, self.priority_rag)
         self.rag_button.bind("<Button-1>", self.handle_priority_rag_click)
 
+        # Next Up
+        tk.Label(left_frame, text="⏭ Next Up", font=TITLE_FONT,
+                 bg=BG_COLOUR, fg=TEXT).pack(anchor="w", padx=25, pady=(10, 2))
+        self.next_up_list = tk.Listbox(left_frame, font=FONT, height=NEXT_UP_COUNT, activestyle="none",
+                                       relief="solid", bd=1, cursor="hand2")
+        self.next_up_list.pack(fill="x", padx=25)
+        self.next_up_list.bind("<<ListboxSelect>>", self.handle_next_up_choice)
+        self.update_next_up()
+
         # To-Do List
         tk.Label(left_frame, text="✅ Today's To-Do List", font=TITLE_FONT,
-                 bg=BG_COLOUR, fg=TEXT).pack(anchor="w", padx=25, pady=(10, 8))
-        self.create_task_list(left_frame, self.data_manager.data["modules"]["Home"], "Home")
+                 bg=BG_COLOUR, fg=TEXT).pack(anchor="w", padx=25, pady=(10, 2))
+        self.stats_label = tk.Label(left_frame, font=FONT, bg=BG_COLOUR, fg=TEXT)
+        self.stats_label.pack(anchor="w", padx=25)
+        self.update_stats_label()
+        self.data_manager.listeners.append(self.handle_data_changed)
+        self.create_task_list(left_frame, self.model.tasks("Home"), "Home")
 
         # Timetable
-        tk.Label(right_frame, text="📅 Today's Timetable", font=(FONT_NAME, 14, "bold"),
+        tk.Label(right_frame, text="📅 Timetable", font=(FONT_NAME, 14, "bold"),
                  bg=BG_COLOUR, fg=TEXT).pack(anchor="w", padx=25, pady=(10, 10))
         self.create_timetable(right_frame)
 
         # Pomodoro Button
+        self.focus_label = tk.Label(left_frame, font=FONT, bg=BG_COLOUR, fg=TEXT)
+        self.focus_label.pack(anchor="w", padx=25, pady=(10, 0))
+        self.update_focus_label()
+
         tk.Button(
             left_frame,
             text="⏱ Open Pomodoro Timer",
@@ -148,58 +414,88 @@ class PlannerUI:
             height=2
         ).pack(pady=10, padx=25, fill="x")
 
+    def handle_data_changed(self, op, record):
+        self.update_stats_label()
+        self.update_next_up()
+        self.arm_reminders()
+        if op == "session_logged":
+            self.update_focus_label()
+        elif op == "data_reloaded":
+            self.apply_external_changes(record)
+
+    def update_focus_label(self):
+        minutes = self.model.sessions.focus_minutes()
+        self.focus_label.config(text=f"🍅 Focus today: {minutes:.0f} min")
+
+    def update_stats_label(self):
+        stats = self.data_manager.stats
+        rate = stats.completion_rate()
+        rate_text = "–" if rate is None else f"{rate:.0%}"
+        self.stats_label.config(
+            text=f"Open: {stats.open_tasks()}   Done today: {stats.completions_today()}   "
+                 f"7-day completion rate: {rate_text}"
+        )
+
+    def update_next_up(self):
+        """Show the most pressing open tasks across every module."""
+        top = self.next_up.top()
+        self.next_up_ids = [rec.id for _, rec in top]
+        self.next_up_list.delete(0, "end")
+        for status, rec in top:
+            if rec.scheduled_time:
+                day = to_date(due_time(rec))
+                when = rec.scheduled_time if day == self.today else f"{day:%d %b} {rec.scheduled_time}"
+            else:
+                when = "anytime"
+            self.next_up_list.insert("end", f"{status.emoji}  {when}   {rec.text}   ({rec.module})")
+        if not top:
+            self.next_up_list.insert("end", "Nothing open. Add a task to any module.")
+
+    def handle_next_up_choice(self, event):
+        selection = self.next_up_list.curselection()
+        self.next_up_list.selection_clear(0, "end")
+        if selection and selection[0] < len(self.next_up_ids):
+            self.show_task(self.next_up_ids[selection[0]])
+
     def handle_priority_rag_click(self, event):
         self.cycle_priority_rag()
 
     def cycle_priority_rag(self):
-        statuses = ["🔴", "🟡", "🟢", "🔘"]
-        if self.priority_rag in statuses:
-            idx = statuses.index(self.priority_rag)
-            new_idx = (idx + 1) % 4
-            self.priority_rag = statuses[new_idx]
-        else:
-            self.priority_rag = "🔴"
-
+        self.priority_rag = next_status(self.priority_rag)
         self.rag_button.config(text=self.priority_rag)
         set_rag_color(self.rag_button, self.priority_rag)
 
     def open_pomodoro(self):
         try:
             from pomodoro import PomodoroTimer
-            PomodoroTimer(self.root)
+            PomodoroTimer(self.root, self.model)
         except Exception as exception:
             messagebox.showerror("Error", f"Could not open Pomodoro timer:\n{str(exception)}")
 
     def create_task_list(self, parent, task_list, tab_name):
-        scrollable_frame, canvas = create_scrollable_frame(parent)
-
-        def refresh():
-            for widget in scrollable_frame.winfo_children():
-                widget.destroy()
-            for idx, (task, status) in enumerate(task_list):
-                row = tk.Frame(scrollable_frame, bg="white")
-                row.pack(fill="x", pady=2, padx=10)
-
-                delete_btn = tk.Button(row, text="❌", command=lambda i=idx: delete_task(i),
-                                       bg="lightcoral", fg="white", width=2, font=(FONT_NAME, 8))
-                delete_btn.pack(side="left", padx=2)
-
-                tk.Label(row, text=task, bg="white", font=FONT, anchor="w").pack(
-                    side="left", padx=6, fill="x", expand=True
-                )
-
-                rag_label = tk.Label(row, text=status, width=3, font=TITLE_FONT)
-                rag_label.pack(side="right", padx=6)
-                set_rag_color(rag_label, status)
-                rag_label.bind("<Button-1>", lambda event, i=idx: self.handle_rag_click(task_list, i, tab_name, refresh))
+        def delete_task(idx):
+            self.model.delete_task(tab_name, idx)
+            view.refresh()
 
-            canvas.config(scrollregion=canvas.bbox("all"))
+        def rename_task(idx):
+            if not 0 <= idx < len(task_list):
+                return
+            text = simpledialog.askstring("Rename Task", "Task:", initialvalue=task_list[idx][0])
+            if text is None:
+                return
+            try:
+                self.model.rename_task(tab_name, idx, text)
+            except ValueError as exception:
+                messagebox.showwarning("Empty Task", str(exception))
+                return
+            view.refresh()
 
-        def delete_task(idx):
-            if 0 <= idx < len(task_list):
-                del task_list[idx]
-                self.data_manager.save_data()
-                refresh()
+        view = TaskListView(
+            parent, task_list, delete_task,
+            lambda idx: self.handle_rag_click(task_list, idx, tab_name, view.refresh),
+            rename_task
+        )
+        self.task_views[tab_name] = view
 
         # Input box
         input_frame = tk.Frame(parent, bg=BG_COLOUR)
@@ -212,53 +508,171 @@ class PlannerUI:
         entry.pack(fill="x", pady=4)
 
         def add_task():
-            text = entry.get().strip()
-            if not text:
-                messagebox.showwarning("Empty Task", "Please enter a task!")
+            try:
+                self.model.add_task(tab_name, entry.get())
+            except ValueError as exception:
+                messagebox.showwarning("Empty Task", str(exception))
                 return
-
-            # Log to history
-            record = create_task_record(text, tab_name, guess_scheduled_time())
-            self.data_manager.data["task_history"].append(record)
-
-            task_list.append((text, "🔴"))
-            self.data_manager.save_data()
-            refresh()
+            view.refresh()
+            view.see(len(task_list) - 1)
             entry.delete(0, "end")
 
         entry.bind("<Return>", lambda event: add_task())
-        tk.Button(input_frame, text="➕ Add", command=add_task,
-                  bg=ACCENT, fg="white", font=(FONT_NAME, 9, "bold"), width=10).pack(pady=4)
+        button_row = tk.Frame(input_frame, bg=BG_COLOUR)
+        button_row.pack(pady=4)
+        tk.Button(button_row, text="➕ Add", command=add_task,
+                  bg=ACCENT, fg="white", font=(FONT_NAME, 9, "bold"), width=10).pack(side="left", padx=2)
+        tk.Button(button_row, text="🔁 Repeat…", command=lambda: self.open_repeat_dialog(tab_name, entry),
+                  bg=ACCENT, fg="white", font=(FONT_NAME, 9, "bold"), width=10).pack(side="left", padx=2)
 
-        refresh()  # Show tasks now
+        self.create_bulk_actions(parent, view, tab_name)
+
+        view.refresh()  # Show tasks now
         return parent
 
+    def open_repeat_dialog(self, module, entry):
+        """Make the entry's text a recurring task, and list or stop the module's repeats."""
+        dialog = tk.Toplevel(self.root, bg=BG_COLOUR, padx=15, pady=10)
+        dialog.title(f"Repeating tasks – {module}")
+        dialog.transient(self.root)
+
+        text_var = tk.StringVar(value=entry.get())
+        tk.Label(dialog, text="Task:", font=FONT, bg=BG_COLOUR, fg=TEXT).grid(row=0, column=0, sticky="w")
+        tk.Entry(dialog, textvariable=text_var, font=(FONT_NAME, 11), width=40).grid(
+            row=0, column=1, columnspan=7, sticky="we", pady=4)
+
+        kind_var = tk.StringVar(value="daily")
+        for row, (kind, label) in enumerate((("daily", "Every day"), ("weekdays", "Weekdays"),
+                                             ("weekly", "Weekly on"), ("every", "Every")), start=1):
+            tk.Radiobutton(dialog, text=label, variable=kind_var, value=kind, font=FONT,
+                           bg=BG_COLOUR, fg=TEXT, anchor="w").grid(row=row, column=0, sticky="w")
+        day_vars = [tk.BooleanVar() for _ in DAY_NAMES]
+        for day, name in enumerate(DAY_NAMES):
+            tk.Checkbutton(dialog, text=name, variable=day_vars[day], bg=BG_COLOUR,
+                           command=lambda: kind_var.set("weekly")).grid(row=3, column=day + 1)
+        interval_var = tk.StringVar(value="2")
+        every_frame = tk.Frame(dialog, bg=BG_COLOUR)
+        every_frame.grid(row=4, column=1, columnspan=7, sticky="w")
+        tk.Spinbox(every_frame, from_=1, to=365, width=4, textvariable=interval_var,
+                   command=lambda: kind_var.set("every")).pack(side="left")
+        tk.Label(every_frame, text="days", font=FONT, bg=BG_COLOUR, fg=TEXT).pack(side="left", padx=4)
+
+        rules_list = tk.Listbox(dialog, font=(FONT_NAME, 10), height=6, width=60)
+        rules_list.grid(row=6, column=0, columnspan=8, sticky="we", pady=(10, 4))
+        rule_ids = []
+
+        def show_rules():
+            rules_list.delete(0, "end")
+            rule_ids.clear()
+            for rule_id, rule in self.model.rules(module):
+                rule_ids.append(rule_id)
+                rules_list.insert("end", f"{rule['text']}  —  {describe(rule)}, next {rule['next_due']}")
+
+        def refresh_tasks():
+            if self.model.generate_recurring(self.today):
+                self.sync_with_data()
+
+        def save():
+            try:
+                self.model.add_rule(module, text_var.get(), kind_var.get(),
+                                    days=[day for day, var in enumerate(day_vars) if var.get()],
+                                    interval=interval_var.get())
+            except ValueError as exception:
+                messagebox.showwarning("Repeat", str(exception), parent=dialog)
+                return
+            entry.delete(0, "end")
+            text_var.set("")
+            refresh_tasks()
+            show_rules()
+
+        def stop_selected():
+            for index in rules_list.curselection():
+                self.model.delete_rule(rule_ids[index])
+            show_rules()
+
+        tk.Button(dialog, text="🔁 Repeat", command=save, bg=ACCENT, fg="white",
+                  font=(FONT_NAME, 9, "bold"), width=12).grid(row=5, column=0, columnspan=8, pady=6)
+        tk.Button(dialog, text="Stop Repeating", command=stop_selected, bg="lightcoral", fg="white",
+                  font=(FONT_NAME, 9, "bold")).grid(row=7, column=0, columnspan=8, pady=4)
+        show_rules()
+
+    def create_bulk_actions(self, parent, view, tab_name):
+        """Buttons acting on every selected task at once, each as a single change."""
+        def selection():
+            task_ids = view.selected_ids()
+            if not task_ids:
+                messagebox.showinfo("No Selection", "Click tasks to select them (Ctrl/Shift-click for more).")
+            return task_ids
+
+        def delete_selected():
+            task_ids = selection()
+            if task_ids and messagebox.askyesno("Delete Tasks", f"Delete {len(task_ids)} task(s)?"):
+                self.model.delete_tasks(tab_name, task_ids)
+                view.clear_selection()
+
+        def set_selected_status(status):
+            task_ids = selection()
+            if task_ids:
+                self.model.set_statuses(tab_name, task_ids, status)
+                view.refresh()
+
+        def move_selected():
+            task_ids = selection()
+            if not task_ids:
+                return
+            target = simpledialog.askstring("Move Tasks", f"Move {len(task_ids)} task(s) to module:")
+            if not target or not target.strip():
+                return
+            try:
+                self.model.move_tasks(tab_name, target.strip(), task_ids)
+            except ValueError as exception:
+                messagebox.showwarning("Move Tasks", str(exception))
+                return
+            view.clear_selection()
+            if target.strip() in self.task_views:
+                self.task_views[target.strip()].refresh()
+
+        def paste_tasks():
+            try:
+                text = self.root.clipboard_get()
+            except tk.TclError:
+                messagebox.showwarning("Paste Tasks", "The clipboard is empty.")
+                return
+            if self.model.add_tasks(tab_name, text.splitlines()):
+                view.refresh()
+                view.see(len(view.task_list) - 1)
+
+        bulk_frame = tk.Frame(parent, bg=BG_COLOUR)
+        bulk_frame.pack(padx=25, pady=(0, 8), fill="x")
+        button_options = {"bg": ACCENT, "fg": "white", "font": (FONT_NAME, 9, "bold"), "relief": "flat"}
+
+        tk.Button(bulk_frame, text="☑ All", command=view.select_all, **button_options).pack(side="left", padx=2)
+        tk.Button(bulk_frame, text="🗑 Delete", command=delete_selected, **button_options).pack(side="left", padx=2)
+        for status in STATUSES:
+            tk.Button(bulk_frame, text=status, command=partial(set_selected_status, status),
+                      **button_options).pack(side="left", padx=2)
+        tk.Button(bulk_frame, text="➡ Move", command=move_selected, **button_options).pack(side="left", padx=2)
+        tk.Button(bulk_frame, text="📋 Paste", command=paste_tasks, **button_options).pack(side="right", padx=2)
+
+    @timed("ui.rag_click")
     def handle_rag_click(self, task_list, idx, tab_name, refresh_func):
-        if 0 <= idx < len(task_list):
-            task, current_status = task_list[idx]
-            statuses = ["🔴", "🟡", "🟢", "🔘"]
-            if current_status in statuses:
-                current_index = statuses.index(current_status)
-            else:
-                current_index = 0
-            new_status = statuses[(current_index + 1) % 4]
-
-            task_list[idx] = (task, new_status)
-            self.data_manager.save_data()
-
-            # If turned green, log completion time
-            if new_status == "🟢" and current_status != "🟢":
-                for rec in reversed(self.data_manager.data["task_history"]):
-                    if rec["text"] == task and rec["module"] == tab_name and rec["completed_at"] is None:
-                        rec["completed_at"] = datetime.now().isoformat()
-                        break
-                self.data_manager.save_data()
-
+        if self.model.cycle_status(tab_name, idx) is not None:
             refresh_func()
 
     def create_timetable(self, parent):
+        nav = tk.Frame(parent, bg=BG_COLOUR)
+        nav.pack(fill="x", padx=25, pady=(0, 5))
+        nav_options = dict(bg=ACCENT, fg="white", font=FONT, relief="flat")
+        tk.Button(nav, text="◀", command=lambda: self.step_timetable(-1), **nav_options).pack(side="left")
+        self.timetable_label = tk.Label(nav, font=FONT, bg=BG_COLOUR, fg=TEXT, width=38)
+        self.timetable_label.pack(side="left", padx=5)
+        tk.Button(nav, text="▶", command=lambda: self.step_timetable(1), **nav_options).pack(side="left")
+        tk.Button(nav, text="Template", command=lambda: self.go_to_timetable(None),
+                  **nav_options).pack(side="right", padx=2)
+        tk.Button(nav, text="Today", command=lambda: self.go_to_timetable(date.today()),
+                  **nav_options).pack(side="right", padx=2)
+
         scrollable_frame, canvas = create_scrollable_frame(parent)
-        entries = {}
 
         for h in range(24):
             hour = (4 + h) % 24
@@ -275,33 +689,152 @@ class PlannerUI:
             tk.Label(row, text=time_str, width=15, anchor="w", bg="white",
                      font=("Courier", 11, "bold"), fg=ACCENT).pack(side="left")
 
-            saved = self.data_manager.data["timetable"].get(f"{hour:02d}:00", "")
-            var = tk.StringVar(value=saved)
-            entries[f"{hour:02d}:00"] = var
-
-            tk.Entry(row, textvariable=var, font=(FONT_NAME, 11), width=50).pack(
-                side="left", padx=10, fill="x", expand=True)
+            var = tk.StringVar()
+            self.timetable_vars[f"{hour:02d}:00"] = var
+
+            entry = tk.Entry(row, textvariable=var, font=(FONT_NAME, 11), width=50)
+            entry.pack(side="left", padx=10, fill="x", expand=True)
+            self.timetable_entries[f"{hour:02d}:00"] = entry
+
+        self.show_timetable(self.timetable_day)
+
+        button_row = tk.Frame(parent, bg=BG_COLOUR)
+        button_row.pack(pady=15)
+        tk.Button(button_row, text="💾 Save All Entries", command=self.save_timetable,
+                  bg=ACCENT, fg="white", font=TITLE_FONT, height=2).pack(side="left", padx=5)
+        tk.Button(button_row, text="📋 Copy from Template", command=self.copy_template,
+                  bg=ACCENT, fg="white", font=FONT, height=2).pack(side="left", padx=5)
+        tk.Button(button_row, text="⭐ Save as Template", command=self.save_as_template,
+                  bg=ACCENT, fg="white", font=FONT, height=2).pack(side="left", padx=5)
+
+    # === Timetable days ===
+    def timetable_values(self):
+        return self.model.timetable() if self.timetable_day is None else self.model.day_timetable(self.timetable_day)
+
+    def timetable_edited(self):
+        return any(var.get() != self.timetable_shown.get(key, "") for key, var in self.timetable_vars.items())
+
+    def show_timetable(self, day):
+        """Load the timetable for day (a date, or None for the template) into the panel."""
+        self.timetable_day = day
+        values = self.timetable_values()
+        for key, var in self.timetable_vars.items():
+            var.set(values.get(key, ""))
+        self.timetable_shown = {key: var.get() for key, var in self.timetable_vars.items()}
+        self.update_timetable_label()
+
+    def refresh_timetable(self, keep_edits=False):
+        """Reload the day shown after its data changed, keeping unsaved edits if asked."""
+        values = self.timetable_values()
+        for key, var in self.timetable_vars.items():
+            if keep_edits and var.get() != self.timetable_shown.get(key, ""):
+                continue
+            if var.get() != values.get(key, ""):
+                var.set(values.get(key, ""))
+            self.timetable_shown[key] = values.get(key, "")
+        self.update_timetable_label()
+
+    def update_timetable_label(self):
+        day = self.timetable_day
+        if day is None:
+            text = "Template – used for any day not edited on its own"
+        else:
+            text = day.strftime("%A %d %B %Y")
+            if day == date.today():
+                text += " (today)"
+            if not self.model.has_day(day):
+                text += " – following the template"
+        self.timetable_label.config(text=text)
+
+    def go_to_timetable(self, day):
+        if day == self.timetable_day:
+            return
+        if self.timetable_edited() and not messagebox.askyesno(
+                "Unsaved Timetable", "Discard the changes you have not saved?"):
+            return
+        self.show_timetable(day)
 
-        def save_timetable():
-            for key, var in entries.items():
-                self.data_manager.data["timetable"][key] = var.get().strip()
-            self.data_manager.save_data()
-            messagebox.showinfo("Saved", "Timetable saved! 🌟")
+    def step_timetable(self, days):
+        self.go_to_timetable((self.timetable_day or date.today()) + timedelta(days=days))
 
-        tk.Button(parent, text="💾 Save All Entries", command=save_timetable,
-                  bg=ACCENT, fg="white", font=TITLE_FONT, height=2).pack(pady=15)
+    def save_timetable(self):
+        entries = {key: var.get() for key, var in self.timetable_vars.items()}
+        # Only the slots edited since loading are written
+        edited = {key: text for key, text in entries.items() if text != self.timetable_shown.get(key, "")}
+        if self.timetable_day is None:
+            self.model.update_timetable(edited)
+        else:
+            self.model.update_day(self.timetable_day, edited)
+        self.refresh_timetable()
+        messagebox.showinfo("Saved", "Timetable saved! 🌟")
+
+    def copy_template(self):
+        """Fill the panel with the template, to save for this day."""
+        template = self.model.timetable()
+        for key, var in self.timetable_vars.items():
+            var.set(template.get(key, ""))
+
+    def save_as_template(self):
+        if not messagebox.askyesno("Save as Template",
+                                   "Use these entries for every day not edited on its own?"):
+            return
+        entries = {key: var.get() for key, var in self.timetable_vars.items()}
+        self.model.update_timetable(entries)
+        if self.timetable_day is not None:
+            # Slots this day had of its own now just follow the template
+            self.model.update_day(self.timetable_day, entries)
+        self.refresh_timetable()
 
     def load_module_tabs(self):
-        for name, tasks in self.data_manager.data["modules"].items():
+        for name, tasks in self.model.data["modules"].items():
             if name == "Home":
                 continue
             self.add_module_tab(name, tasks)
 
     def add_module_tab(self, name, task_list):
         tab = tk.Frame(self.notebook, bg=BG_COLOUR)
-        self.notebook.add(tab, text=name)
+        if self.analytics_tab is not None:
+            # Keep Analytics as the last tab
+            self.notebook.insert(self.analytics_tab, tab, text=name)
+        else:
+            self.notebook.add(tab, text=name)
         self.tab_frames[name] = tab
+        self.add_lazy_content(tab, partial(self.build_module_content, name, tab, task_list))
 
+    def add_lazy_content(self, tab, builder):
+        """Build a tab's content the first time it is selected."""
+        if self.lazy_tabs:
+            self.pending_tabs[str(tab)] = builder
+        else:
+            with span("ui.build_tab"):
+                builder()
+
+    def build_pending_tab(self, key):
+        builder = self.pending_tabs.pop(key, None)
+        if builder is not None:
+            with span("ui.build_tab"):
+                builder()
+
+    def handle_tab_changed(self, event):
+        self.build_pending_tab(self.notebook.select())
+        if self.analytics is not None and self.notebook.select() == str(self.analytics_tab):
+            self.analytics.refresh()
+
+    def create_analytics_tab(self):
+        self.analytics_tab = tk.Frame(self.notebook, bg=BG_COLOUR)
+        self.notebook.add(self.analytics_tab, text="📊 Analytics")
+        # Always lazy: NumPy and matplotlib are only loaded if the tab is opened
+        self.pending_tabs[str(self.analytics_tab)] = self.build_analytics_content
+
+    def build_analytics_content(self):
+        try:
+            from analytics import AnalyticsDashboard
+            self.analytics = AnalyticsDashboard(self.analytics_tab, self.data_manager)
+        except ImportError as exception:
+            tk.Label(self.analytics_tab, text=f"Analytics needs numpy and matplotlib:\n{exception}",
+                     font=FONT, bg=BG_COLOUR, fg=TEXT).pack(pady=40)
+
+    def build_module_content(self, name, tab, task_list):
         button_frame = tk.Frame(tab, bg=BG_COLOUR)
         button_frame.pack(anchor="ne", padx=20, pady=10)
 
@@ -316,19 +849,46 @@ class PlannerUI:
         self.create_task_list(tab, task_list, name)
 
     def delete_module(self, name, tab):
-        if messagebox.askyesno("Delete Module", f"Delete '{name}'?\nAll tasks will be lost.", icon="warning"):
-            if name in self.data_manager.data["modules"]:
-                del self.data_manager.data["modules"][name]
-            self.data_manager.save_data()
-            self.notebook.forget(tab)
-            if name in self.tab_frames:
-                del self.tab_frames[name]
+        if messagebox.askyesno("Delete Module", f"Delete '{name}' and all its tasks?\nYou can undo this with Ctrl+Z.", icon="warning"):
+            self.model.delete_module(name)
+            self.remove_module_tab(name)
             messagebox.showinfo("Deleted", f"'{name}' deleted.")
 
+    def remove_module_tab(self, name):
+        tab = self.tab_frames.pop(name)
+        self.notebook.forget(tab)
+        self.pending_tabs.pop(str(tab), None)
+        self.task_views.pop(name, None)
+
     def bind_events(self):
         self.add_tab_button.bind("<Button-1>", self.handle_add_module_click)
+        self.notebook.bind("<<NotebookTabChanged>>", self.handle_tab_changed)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+        self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
+        self.root.bind("<Control-Z>", self.redo)
+        self.root.bind("<F12>", self.toggle_profiler_overlay)
+
+        self.search_entry.bind("<KeyRelease>", self.handle_search_key)
+        self.search_entry.bind("<Down>", self.focus_search_results)
+        self.search_entry.bind("<Return>", self.handle_search_choice)
+        self.search_entry.bind("<Escape>", self.hide_search_results)
+        self.search_results.bind("<Return>", self.handle_search_choice)
+        self.search_results.bind("<Double-Button-1>", self.handle_search_choice)
+        self.search_results.bind("<Escape>", self.hide_search_results)
+
+    def toggle_profiler_overlay(self, event=None):
+        """F12 shows or hides the live timings; profiling runs while it is open."""
+        if self.profiler_overlay is not None:
+            self.profiler_overlay.close()
+            return
+        from profiler_overlay import ProfilerOverlay
+
+        def closed():
+            self.profiler_overlay = None
+        self.profiler_overlay = ProfilerOverlay(self.root, on_close=closed)
+
     def handle_add_module_click(self, event):
         self.add_new_module()
 
@@ -336,12 +896,11 @@ class PlannerUI:
         name = simpledialog.askstring("New Module", "Enter module name:")
         if not name or not name.strip():
             return
-        name = name.strip()
-        if name in self.data_manager.data["modules"]:
-            messagebox.showwarning("Exists", f"Module '{name}' already exists!")
+        try:
+            name = self.model.add_module(name)
+        except ValueError as exception:
+            messagebox.showwarning("Exists", str(exception))
             return
 
-        self.data_manager.data["modules"][name] = []
-        self.data_manager.save_data()
-        self.add_module_tab(name, [])
+        self.add_module_tab(name, self.model.tasks(name))
         messagebox.showinfo("Success", f"Module '{name}' created!")
@@ -0,0 +1,81 @@
+import copy
+from collections import deque
+
+# Total task entries kept across all undo and redo commands
+UNDO_LIMIT = 100_000
+
+
+class Command:
+    """One undoable change: the operations that made it and the ones that reverse it.
+
+    Both are lists of (op, record) for DataManager.apply(), so a command
+    holds only the delta it touched, never a copy of the data.
+    """
+    __slots__ = ("label", "forward", "inverse", "size")
+
+    def __init__(self, label, forward, inverse, size=1):
+        self.label = label
+        self.forward = forward
+        self.inverse = inverse
+        self.size = size
+
+
+class UndoStack:
+    """Undo/redo history bounded by the number of task entries it holds.
+
+    When the limit is passed the oldest commands are dropped first; the
+    newest command is always kept so the last change can be undone.
+    """
+
+    def __init__(self, data_manager, limit=UNDO_LIMIT):
+        self.data_manager = data_manager
+        self.limit = limit
+        self.undo_commands = deque()
+        self.redo_commands = []
+        self.size = 0
+
+    def push(self, label, forward, inverse, size=1):
+        """Record a change that has just been applied."""
+        for command in self.redo_commands:
+            self.size -= command.size
+        self.redo_commands.clear()
+        # Forward records can end up inside the data (new history records),
+        # which later changes edit in place, so keep a copy
+        self._append(Command(label, copy.deepcopy(forward), inverse, size))
+
+    def _append(self, command):
+        self.undo_commands.append(command)
+        self.size += command.size
+        while self.size > self.limit and len(self.undo_commands) > 1:
+            self.size -= self.undo_commands.popleft().size
+
+    def can_undo(self):
+        return bool(self.undo_commands)
+
+    def can_redo(self):
+        return bool(self.redo_commands)
+
+    def undo(self):
+        """Reverse the last change; returns its label, or None if there is nothing to undo."""
+        if not self.undo_commands:
+            return None
+        command = self.undo_commands.pop()
+        for op, record in command.inverse:
+            self.data_manager.apply(op, **record)
+        self.redo_commands.append(command)
+        return command.label
+
+    def redo(self):
+        if not self.redo_commands:
+            return None
+        command = self.redo_commands.pop()
+        self.size -= command.size
+        for op, record in command.forward:
+            self.data_manager.apply(op, **copy.deepcopy(record))
+        self._append(command)
+        return command.label
+
+    def clear(self):
+        self.undo_commands.clear()
+        self.redo_commands.clear()
+        self.size = 0
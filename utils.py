@@ -1,5 +1,6 @@
 from tkinter import Canvas, Frame, Scrollbar
 from datetime import datetime
+from profiling import span
 
 # === Colors & Fonts ===
 BG_COLOUR = "#BAD7E0"
@@ -13,7 +14,12 @@ FONT_NAME = "Segoe UI"
 FONT = (FONT_NAME, 10)
 TITLE_FONT = (FONT_NAME, 12, "bold")
 
-def create_scrollable_frame(parent):
+def create_scrollable_frame(parent, on_scroll=None):
+    """Return a scrollable (frame, canvas) pair.
+
+    Passing on_scroll marks a virtual list: the caller owns the canvas
+    scrollregion and on_scroll is called whenever the view moves.
+    """
     frame = Frame(parent, bg="white", bd=1, relief="solid")
     frame.pack(pady=10, fill="both", expand=True, padx=25)
 
@@ -22,11 +28,19 @@ def create_scrollable_frame(parent):
     scrollable_frame = Frame(canvas, bg="white")
 
     def on_frame_configure(event):
-        canvas.configure(scrollregion=canvas.bbox("all"))
+        with span("ui.scroll_region"):
+            canvas.configure(scrollregion=canvas.bbox("all"))
+
+    def on_yscroll(first, last):
+        scrollbar.set(first, last)
+        on_scroll()
 
-    scrollable_frame.bind("<Configure>", on_frame_configure)
     canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-    canvas.configure(yscrollcommand=scrollbar.set)
+    if on_scroll is None:
+        scrollable_frame.bind("<Configure>", on_frame_configure)
+        canvas.configure(yscrollcommand=scrollbar.set)
+    else:
+        canvas.configure(yscrollcommand=on_yscroll)
 
     canvas.pack(side="left", fill="both", expand=True)
     scrollbar.pack(side="right", fill="y")